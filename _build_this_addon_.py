@@ -30,6 +30,7 @@ def copy_files() -> Path:
         if file.is_dir():
             if file.name == parent_path.name: continue
             if file.name.startswith('__') or file.name.startswith('.'): continue
+            if file.name == 'benchmark': continue
 
             shutil.copytree(file, sub_dir.joinpath(file.name))
 
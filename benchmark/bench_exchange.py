@@ -0,0 +1,90 @@
+"""Round trip of notes between two grease pencil data:
+- exchange: write / memory map / import the .estn file
+- blend: bpy.data.libraries.write / load, the append workflow
+- join: copy and join the data, what EST_OT_add_gp does for every new note
+Before the timings, a template is placed with a middle layer active, the other notes must keep their colors.
+
+blender --background --factory-startup --python benchmark/bench_exchange.py -- --layers 100 --points 200
+"""
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+from bench_utils import import_addon_module, parse_args, timeit, report, make_notes  # noqa: E402
+
+model_gp = import_addon_module('model.model_gp')
+CreateGreasePencilData, BuildGreasePencilData = model_gp.CreateGreasePencilData, model_gp.BuildGreasePencilData
+GreasePencilExchange = import_addon_module('model.model_gp_exchange').GreasePencilExchange
+GPencilTemplateLibrary = import_addon_module('model.model_gp_template').GPencilTemplateLibrary
+
+
+def check_place_keeps_layers():
+    """The new layer is inserted after the active one, its attributes must not go to the notes after it."""
+    gp_data = make_notes('check', 5, 2, 20)
+    for i, layer in enumerate(gp_data.layers):
+        layer.color = (i / 10, 0, 0)
+    name = GPencilTemplateLibrary.add(gp_data, gp_data.layers[0], 'check')
+    GPencilTemplateLibrary.library().layers[name].color = (0, 1, 0)
+    GPencilTemplateLibrary.cache.pop(name, None)  # packed again with the new color
+    colors = {layer.info: tuple(layer.color) for layer in gp_data.layers}
+    gp_data.layers.active_index = 2
+    new_layer = GPencilTemplateLibrary.place(name, gp_data, np.zeros(2))
+    assert new_layer.info not in colors and tuple(new_layer.color) == (0, 1, 0), tuple(new_layer.color)
+    changed = [info for info, color in colors.items() if tuple(gp_data.layers[info].color) != color]
+    assert not changed, f'colors changed: {changed}'
+    GPencilTemplateLibrary.remove(name)
+    bpy.data.grease_pencils.remove(gp_data)
+    print('place with a middle layer active: ok')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--layers', type=int, default=100)
+    parser.add_argument('--strokes', type=int, default=4)
+    parser.add_argument('--points', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parse_args(parser)
+    check_place_keeps_layers()
+
+    src = make_notes('src', args.layers, args.strokes, args.points)
+    tmp_dir = Path(tempfile.mkdtemp())
+    estn_path = tmp_dir.joinpath('notes.estn')
+    blend_path = tmp_dir.joinpath('notes.blend')
+    dst: list[bpy.types.GreasePencil] = []
+
+    def new_dst():
+        for gp_data in dst:
+            bpy.data.grease_pencils.remove(gp_data)
+        dst[:] = [bpy.data.grease_pencils.new('dst')]
+
+    def exchange():
+        GreasePencilExchange.write(estn_path, src)
+        GreasePencilExchange.load(estn_path, dst[0])
+
+    def blend():
+        bpy.data.libraries.write(str(blend_path), {src}, fake_user=True)
+        with bpy.data.libraries.load(str(blend_path)) as (data_from, data_to):
+            data_to.grease_pencils = list(data_from.grease_pencils)
+        dst.extend(data_to.grease_pencils)
+
+    def join():
+        with BuildGreasePencilData(dst[0]) as gp_data_builder:
+            CreateGreasePencilData.ensure_context_obj()
+            gp_data_builder.join(src.copy())
+        dst[0] = gp_data_builder.gp_data
+
+    results = {name: timeit(func, args.repeat, setup=new_dst)
+               for name, func in (('exchange (.estn)', exchange), ('blend append', blend), ('copy + join', join))}
+    points = args.layers * args.strokes * args.points
+    report(f'Round trip of {args.layers} notes, {points} points, '
+           f'{estn_path.stat().st_size / 1024:.0f} KB .estn / {blend_path.stat().st_size / 1024:.0f} KB .blend',
+           results)
+
+
+if __name__ == '__main__':
+    main()
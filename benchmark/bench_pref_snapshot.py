@@ -0,0 +1,88 @@
+"""Cost of reading the preferences in the constructors of the modal models:
+- lookup: get_pref() on every read, the reads of the constructors before the snapshot
+- snapshot: the cached PreferenceSnapshot
+
+blender --background --factory-startup --python benchmark/bench_pref_snapshot.py -- --number 10000
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from bench_utils import import_addon_module, parse_args, timeit, report  # noqa: E402
+
+public_path = import_addon_module('public_path')
+MouseDetectModel = import_addon_module('view_model.view_model_mouse').MouseDetectModel
+RotateHandler = import_addon_module('view_model.handlers').RotateHandler
+model_draw = import_addon_module('model.model_draw')
+DrawPreference = model_draw.DrawPreference
+
+
+class LookupPreference:
+    """Reads the attributes of the snapshot from get_pref() on every read, as the code before the snapshot did."""
+    draw = {'line_width', 'drag', 'drag_area', 'draw_budget_ms'}
+
+    def __getattr__(self, name):
+        pref = public_path.get_pref()
+        if name == 'debug':
+            return pref.debug
+        return getattr(pref.gp_draw if name in self.draw else pref.gp_performance, name)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parse_args(parser)
+    get_pref, get_pref_snapshot = public_path.get_pref, public_path.get_pref_snapshot
+
+    def lookup_reads():
+        for _ in range(args.number):
+            performance = get_pref().gp_performance
+            performance.detect_edge_px, performance.detect_corner_px, performance.detect_rotate_px
+
+    def snapshot_reads():
+        for _ in range(args.number):
+            pref = get_pref_snapshot()
+            pref.detect_edge_px, pref.detect_corner_px, pref.detect_rotate_px
+
+    report(f'Read 3 preferences x {args.number}', {
+        'lookup': timeit(lookup_reads, args.repeat),
+        'snapshot': timeit(snapshot_reads, args.repeat),
+    })
+
+    def old_mouse_detect_model():
+        return MouseDetectModel(d_edge=get_pref().gp_performance.detect_edge_px,
+                                d_corner=get_pref().gp_performance.detect_corner_px,
+                                d_rotate=get_pref().gp_performance.detect_rotate_px)
+
+    def old_rotate_handler():
+        return RotateHandler(snap_degree=get_pref().gp_performance.snap_degree)
+
+    def old_draw_preference():
+        """DrawPreference.__post_init__ with the snapshot swapped for the lookups, one get_pref() per read."""
+        model_draw.get_pref_snapshot = LookupPreference
+        try:
+            return DrawPreference()
+        finally:
+            model_draw.get_pref_snapshot = get_pref_snapshot
+
+    # the constructors as they read the preferences before the snapshot, against the current ones
+    for cls, old_construct in ((MouseDetectModel, old_mouse_detect_model), (RotateHandler, old_rotate_handler),
+                               (DrawPreference, old_draw_preference)):
+        def construct_lookup():
+            for _ in range(args.number):
+                old_construct()
+
+        def construct_snapshot():
+            for _ in range(args.number):
+                cls()
+
+        report(f'{cls.__name__}() x {args.number}', {
+            'lookup': timeit(construct_lookup, args.repeat),
+            'snapshot': timeit(construct_snapshot, args.repeat),
+        })
+
+
+if __name__ == '__main__':
+    main()
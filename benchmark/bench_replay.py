@@ -0,0 +1,225 @@
+"""Replay a record of the events of the transform tools and report the latency of every event.
+Record in blender: preferences > Debug > Record Events, use the tools, then Save Event Record.
+The record is replayed against the notes of a fixture file (or generated notes) in background,
+the view of every event is the recorded one, see ViewTransform.
+Snapping follows the preference, there is no editor in background so its targets are the other notes, not the nodes.
+
+blender --background --factory-startup --python benchmark/bench_replay.py -- events.json --blend notes.blend
+blender --background --factory-startup --python benchmark/bench_replay.py -- events.json --save base.json
+blender --background --factory-startup --python benchmark/bench_replay.py -- events.json --baseline base.json
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Iterator
+
+import bpy
+
+sys.path.insert(0, str(Path(__file__).parent))
+from bench_utils import import_addon_module, parse_args, make_notes  # noqa: E402
+
+EventRecorder = import_addon_module('view_model.view_model_record').EventRecorder
+ViewTransform = import_addon_module('model.model_points').ViewTransform
+handlers = import_addon_module('view_model.handlers')
+DragGreasePencilViewModal = import_addon_module('view_model.view_model_drag').DragGreasePencilViewModal
+SelectedGPLayersRuntime = import_addon_module('view_model.view_model_select').SelectedGPLayersRuntime
+model_gp = import_addon_module('model.model_gp')
+GPencilLayerBBox = import_addon_module('model.model_gp_bbox').GPencilLayerBBox
+MouseDragState = import_addon_module('view_model.view_model_mouse').MouseDragState
+get_pref_snapshot = import_addon_module('public_path').get_pref_snapshot
+
+PERCENTILES = (50, 90, 99)
+
+
+def split_runs(events: list) -> Iterator[tuple[str, list]]:
+    """The events of every operator run, a run starts with the invoke (the hover view has no invoke)."""
+    run: list = []
+    for event in events:
+        if run and (event.phase == 'INVOKE' or event.operator != run[0].operator):
+            yield run[0].operator, run
+            run = []
+        run.append(event)
+    if run:
+        yield run[0].operator, run
+
+
+def restore_state(gp_data: bpy.types.GreasePencil, event) -> None:
+    """The active layer and the selection when the operator was invoked."""
+    if event.phase != 'INVOKE':
+        return
+    if 0 <= event.active_layer < len(gp_data.layers):
+        gp_data.layers.active_index = event.active_layer
+    SelectedGPLayersRuntime.clear()
+    for name in event.selected_layers:
+        if layer := gp_data.layers.get(name):
+            SelectedGPLayersRuntime.set_active(layer)
+    SelectedGPLayersRuntime.update_from_gp_data(gp_data, mode='LOCAL')
+
+
+def begin_edit(build_model, layers: list, proxy: bool = True) -> None:
+    """What the modals do before the first event, see TransformModal._init"""
+    pref = get_pref_snapshot()
+    if proxy:  # copy mode duplicates the layer, the copy needs the full resolution and all its frames
+        build_model.defer_other_frames(layers)
+        build_model.begin_proxy(layers, pref.proxy_points)
+        if pref.deferred_transform:
+            build_model.begin_transform(layers)
+
+
+def replay_drag(gp_data: bpy.types.GreasePencil, events: list) -> Iterator[tuple[object, Callable[[], None]]]:
+    """EST_OT_gp_drag_modal"""
+    drag_vm = DragGreasePencilViewModal(gp_data=gp_data)
+    layers = SelectedGPLayersRuntime.selected_layers() or [drag_vm.build_model.active_layer_index]
+    begin_edit(drag_vm.build_model, layers, proxy=not events[0].alt)
+    drag_vm.drag_handles = {'SCALE': handlers.ScaleHandler(), 'ROTATE': handlers.RotateHandler(),
+                            'MOVE': handlers.MoveHandler()}
+    drag_vm.set_bbox_mode('LOCAL')
+    state = {'init': False}
+
+    def step(event):
+        if event.phase == 'INVOKE':
+            drag_vm.update_mouse_pos(None, event)
+        elif event.type == 'MOUSEMOVE':
+            drag_vm.update_mouse_pos(None, event)
+            if not state['init']:
+                drag_vm.mouse_init(event)
+                drag_vm.update_near_widgets()
+                state['init'] = True
+            drag_vm.handle_drag(None, event)
+        elif event.type in {'ESC', 'RIGHTMOUSE'} or (event.type == 'LEFTMOUSE' and event.value == 'RELEASE'):
+            drag_vm.build_model.bake_transform().commit_proxy().commit_other_frames()
+            SelectedGPLayersRuntime.update_from_gp_data(gp_data, mode='LOCAL')
+
+    for event in events:
+        yield event, lambda e=event: step(e)
+
+
+def replay_transform(gp_data: bpy.types.GreasePencil, events: list,
+                     handler_type: type) -> Iterator[tuple[object, Callable[[], None]]]:
+    """EST_OT_move_gp_modal / EST_OT_rotate_gp_modal / EST_OT_scale_gp_modal"""
+    build_model = model_gp.BuildGreasePencilData(gp_data)
+    bbox_model = GPencilLayerBBox(gp_data=gp_data, mode='LOCAL')
+    bbox_model.calc_active_layer_bbox()
+    mouse_state = MouseDragState()
+    mouse_state.init(events[0])
+    layers = SelectedGPLayersRuntime.selected_layers() or [build_model.active_layer_index]
+    begin_edit(build_model, layers)
+    handler = handler_type(build_model=build_model, bbox_model=bbox_model, mouse_state=mouse_state)
+    if handler_type is handlers.ScaleHandler:
+        handler.force_center_scale = True
+
+    def step(event):
+        if event.type == 'MOUSEMOVE':
+            mouse_state.update_mouse_position(event)
+            handler.selected_layers = SelectedGPLayersRuntime.selected_layers()
+            handler.accept_event(event)
+        elif event.type in {'ESC', 'RIGHTMOUSE', 'LEFTMOUSE'}:
+            build_model.bake_transform().commit_proxy().commit_other_frames()
+            SelectedGPLayersRuntime.update_from_gp_data(gp_data, mode='LOCAL')
+
+    for event in events[1:]:
+        yield event, lambda e=event: step(e)
+
+
+def replay_view(gp_data: bpy.types.GreasePencil, events: list) -> Iterator[tuple[object, Callable[[], None]]]:
+    """EST_OT_gp_view, the hover of the tool"""
+    drag_vm = DragGreasePencilViewModal(gp_data=gp_data)
+    drag_vm.bbox_model.calc_active_layer_bbox()
+    drag_vm.set_bbox_mode('LOCAL')
+
+    def step(event):
+        drag_vm.update_mouse_pos(None, event)
+        drag_vm.update_near_widgets()
+
+    for event in events:
+        yield event, lambda e=event: step(e)
+
+
+REPLAYS = {
+    'est.gp_drag_modal': replay_drag,
+    'est.move_gp_modal': lambda gp_data, events: replay_transform(gp_data, events, handlers.MoveHandler),
+    'est.rotate_gp_modal': lambda gp_data, events: replay_transform(gp_data, events, handlers.RotateHandler),
+    'est.scale_gp_modal': lambda gp_data, events: replay_transform(gp_data, events, handlers.ScaleHandler),
+    'est.gp_view': replay_view,
+}
+
+
+def replay(gp_data: bpy.types.GreasePencil, events: list) -> dict[str, list[float]]:
+    """:return: operator: latency of every event in seconds"""
+    latencies = defaultdict(list)
+    for operator, run in split_runs(events):
+        if operator not in REPLAYS:
+            continue
+        restore_state(gp_data, run[0])
+        # the setup of a run is done on the first step, not timed
+        with ViewTransform.override(run[0].view2d, run[0].ui_scale):
+            for event, step in REPLAYS[operator](gp_data, run):
+                with ViewTransform.override(event.view2d, event.ui_scale):
+                    start = time.perf_counter()
+                    step()
+                    latencies[operator].append(time.perf_counter() - start)
+    return latencies
+
+
+def percentile(times: list[float], p: int) -> float:
+    return statistics.quantiles(times, n=100, method='inclusive')[p - 1] if len(times) > 1 else times[0]
+
+
+def summary(latencies: dict[str, list[float]]) -> dict[str, dict[str, float]]:
+    """operator: {count, p50, p90, p99, max}, ms"""
+    return {operator: {'count': len(times),
+                       **{f'p{p}': percentile(times, p) * 1000 for p in PERCENTILES},
+                       'max': max(times) * 1000}
+            for operator, times in latencies.items() if times}
+
+
+def load_fixture(args) -> bpy.types.GreasePencil:
+    if args.blend:
+        with bpy.data.libraries.load(args.blend) as (data_from, data_to):
+            data_to.grease_pencils = [args.gp] if args.gp else data_from.grease_pencils[:1]
+        return data_to.grease_pencils[0]
+    return make_notes('replay', args.layers, args.strokes, args.points)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('record', help='the json saved by Record Events')
+    parser.add_argument('--blend', help='fixture file with the notes, generated notes if not given')
+    parser.add_argument('--gp', help='name of the grease pencil data in the fixture, the first one if not given')
+    parser.add_argument('--layers', type=int, default=50)
+    parser.add_argument('--strokes', type=int, default=4)
+    parser.add_argument('--points', type=int, default=200)
+    parser.add_argument('--save', help='write the summary as json, the baseline of a later run')
+    parser.add_argument('--baseline', help='compare to a saved summary, exit 1 if the p90 of an operator regressed')
+    parser.add_argument('--tolerance', type=float, default=1.25, help='p90 / baseline p90 that fails')
+    args = parse_args(parser)
+
+    events = EventRecorder.load(args.record)
+    gp_data = load_fixture(args)
+    result = summary(replay(gp_data, events))
+
+    snap = 'on, the notes only (no node tree in background)' if get_pref_snapshot().use_snap else 'off'
+    print(f'\nReplay of {len(events)} events on {len(gp_data.layers)} layers, snap {snap}, latency per event (ms)')
+    for operator, stats in result.items():
+        print(f'  {operator:<22} n {stats["count"]:6d}  ' +
+              '  '.join(f'{key} {stats[key]:8.3f}' for key in ('p50', 'p90', 'p99', 'max')))
+    if args.save:
+        Path(args.save).write_text(json.dumps(result, indent=2), encoding='utf-8')
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        regressed = [operator for operator, stats in result.items()
+                     if operator in baseline and stats['p90'] > baseline[operator]['p90'] * args.tolerance]
+        for operator in regressed:
+            print(f'  regressed: {operator} p90 {result[operator]["p90"]:.3f} ms, '
+                  f'baseline {baseline[operator]["p90"]:.3f} ms')
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Startup cost of the add-on, every sample is a new blender process:
+- blender: blender --background --factory-startup without the add-on
+- add-on: the same with the add-on enabled from this checkout
+
+Run with the python of the system, not inside blender:
+python benchmark/bench_startup.py --blender /path/to/blender --repeat 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+ADDON_DIR = Path(__file__).parent.parent
+
+# run inside blender, print one json line with the timings
+ENABLE_ADDON = f'''
+import json, sys, time
+import addon_utils
+sys.path.insert(0, {str(ADDON_DIR.parent)!r})
+start = time.perf_counter()
+addon_utils.enable({ADDON_DIR.name!r}, default_set=False, handle_error=None)
+enable_ms = (time.perf_counter() - start) * 1000
+numpy = sys.modules.get('numpy')
+print('EST_STARTUP ' + json.dumps({{
+    'enable_ms': enable_ms,
+    'numpy_loaded': numpy is not None and type(numpy).__name__ != '_LazyModule',
+    'modules': len(sys.modules),
+}}))
+'''
+
+
+def run_blender(blender: str, expr: str | None) -> tuple[float, dict]:
+    args = [blender, '--background', '--factory-startup', '--python-exit-code', '1']
+    if expr:
+        args += ['--python-expr', expr]
+    start = time.perf_counter()
+    out = subprocess.run(args, capture_output=True, text=True, check=True).stdout
+    wall = time.perf_counter() - start
+    info = next((json.loads(line.split(' ', 1)[1]) for line in out.splitlines() if line.startswith('EST_STARTUP ')),
+                {})
+    return wall, info
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--blender', default='blender')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    base = [run_blender(args.blender, None)[0] for _ in range(args.repeat)]
+    runs = [run_blender(args.blender, ENABLE_ADDON) for _ in range(args.repeat)]
+    wall = [w for w, _ in runs]
+    enable = [info['enable_ms'] for _, info in runs]
+
+    print(f'\nStartup, {args.repeat} processes each')
+    print(f'  {"blender":<24} median {statistics.median(base) * 1000:9.1f} ms')
+    print(f'  {"blender + add-on":<24} median {statistics.median(wall) * 1000:9.1f} ms  '
+          f'(+{(statistics.median(wall) - statistics.median(base)) * 1000:.1f} ms)')
+    print(f'  {"enable add-on":<24} median {statistics.median(enable):9.1f} ms  min {min(enable):9.1f} ms')
+    print(f'  numpy executed at startup: {runs[-1][1]["numpy_loaded"]}, modules: {runs[-1][1]["modules"]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Shared helpers of the benchmark scripts.
+The scripts run inside blender, e.g.
+blender --background --factory-startup --python benchmark/bench_exchange.py -- --layers 200
+"""
+import argparse
+import importlib
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import Callable
+
+import bpy
+import numpy as np
+
+ADDON_DIR = Path(__file__).parent.parent
+
+
+def import_addon() -> ModuleType:
+    """Import the add-on package from this checkout and register it."""
+    if str(ADDON_DIR.parent) not in sys.path:
+        sys.path.insert(0, str(ADDON_DIR.parent))
+    addon = importlib.import_module(ADDON_DIR.name)
+    if ADDON_DIR.name not in bpy.context.preferences.addons:
+        bpy.ops.preferences.addon_enable(module=ADDON_DIR.name)
+    return addon
+
+
+def import_addon_module(name: str) -> ModuleType:
+    """Import a submodule of the add-on, e.g. import_addon_module('model.model_gp')"""
+    import_addon()
+    return importlib.import_module(f'{ADDON_DIR.name}.{name}')
+
+
+def parse_args(parser: argparse.ArgumentParser) -> argparse.Namespace:
+    """Parse the arguments after '--', the ones before are blender's."""
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    return parser.parse_args(argv)
+
+
+def timeit(func: Callable[[], None], repeat: int = 5, setup: Callable[[], None] | None = None) -> list[float]:
+    """Return the time of every run in seconds, setup is called before every run and not timed."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def report(title: str, results: dict[str, list[float]]):
+    """Print the median / min time of every case, relative to the first one."""
+    print(f'\n{title}')
+    base = statistics.median(next(iter(results.values())))
+    for name, times in results.items():
+        median = statistics.median(times)
+        print(f'  {name:<32} median {median * 1000:9.2f} ms  min {min(times) * 1000:9.2f} ms  x{median / base:6.2f}')
+
+
+def make_notes(name: str, layer_count: int, stroke_count: int, point_count: int) -> bpy.types.GreasePencil:
+    """Create an annotation data with random strokes."""
+    rng = np.random.default_rng(0)
+    gp_data = bpy.data.grease_pencils.new(name)
+    for i in range(layer_count):
+        layer = gp_data.layers.new(f'Note {i}')
+        layer.color = rng.random(3)
+        frame = layer.frames.new(0)
+        for _ in range(stroke_count):
+            stroke = frame.strokes.new()
+            stroke.display_mode = '2DSPACE'
+            stroke.points.add(point_count)
+            co = np.cumsum(rng.normal(0, 5, (point_count, 3)), axis=0).astype('f')
+            co[:, 2] = 0
+            stroke.points.foreach_set('co', co.ravel())
+    return gp_data
@@ -1,5 +1,6 @@
 from . import ops_notes, ops_gp_modal, ops_gp_basic, op_icon_viewer, op_doc_server, op_palette_viewer, \
-    pt_gp_active_layer, ops_gp_align, pt_gp_replace_panel
+    pt_gp_active_layer, ops_gp_align, pt_gp_replace_panel, ops_gp_batch, \
+    ops_gp_exchange, ops_gp_template, ops_gp_anchor, cache_handlers, ops_memory, ops_gp_inspect
 
 
 def register():
@@ -12,6 +13,13 @@ def register():
     ops_gp_align.register()
     pt_gp_active_layer.register()
     pt_gp_replace_panel.register()
+    ops_gp_batch.register()
+    ops_gp_exchange.register()
+    ops_gp_template.register()
+    ops_gp_anchor.register()
+    cache_handlers.register()
+    ops_memory.register()
+    ops_gp_inspect.register()
 
 
 def unregister():
@@ -24,3 +32,10 @@ def unregister():
     ops_gp_align.unregister()
     pt_gp_active_layer.unregister()
     pt_gp_replace_panel.unregister()
+    ops_gp_batch.unregister()
+    ops_gp_exchange.unregister()
+    ops_gp_template.unregister()
+    ops_gp_anchor.unregister()
+    cache_handlers.unregister()
+    ops_memory.unregister()
+    ops_gp_inspect.unregister()
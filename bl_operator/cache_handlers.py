@@ -0,0 +1,99 @@
+from typing import Optional
+
+import bpy
+
+from ..model.model_cache_bus import CacheBus
+from ..model.model_gp_anchor import GPencilNodeAnchor
+from ..model.model_gp_bbox import CalcBBox
+from ..model.model_gp_cost import GPencilLayerCost
+from ..model.model_gp_hull import GPencilLayerHitTest
+from ..model.model_gp_layer_id import GPencilLayerID
+from ..model.model_gp_simplify import GPencilLayerLOD
+from ..model.model_gp_template import GPencilTemplateLibrary
+from ..model.model_gp_transform import GPencilLayerTransform
+from ..model.model_note_index import NoteIndex
+from ..view_model.view_model_session import EditorSessions
+
+
+# seconds without a grease pencil update before the marked data are revalidated
+REVALIDATE_DELAY = 0.25
+
+
+def register_caches():
+    # caches of the points, revalidated per layer
+    CacheBus.register('bbox', CalcBBox.clear_cache, invalidate_layer=CalcBBox.invalidate)
+    CacheBus.register('hit_test', GPencilLayerHitTest.clear_cache, invalidate_layer=GPencilLayerHitTest.invalidate)
+    CacheBus.register('lod', GPencilLayerLOD.clear_cache, invalidate_layer=GPencilLayerLOD.invalidate)
+    CacheBus.register('cost', GPencilLayerCost.clear_cache, invalidate_layer=GPencilLayerCost.invalidate)
+    # small caches, cleared on undo
+    CacheBus.register('anchor', GPencilNodeAnchor.invalidate)
+    CacheBus.register('layer_id', GPencilLayerID.invalidate)
+    CacheBus.register('template', GPencilTemplateLibrary.clear_cache)
+    CacheBus.register('session', EditorSessions.forget_data)
+    # not changed by an undo, the texts are checked by their checksum and no transform is pending out of a modal
+    CacheBus.register('note_index', NoteIndex.clear, scope='FILE')
+    CacheBus.register('transform', GPencilLayerTransform.clear, scope='FILE')
+
+
+def watch_caches() -> None:
+    """Timer, bpy.data can't be read while the add-on is registered at startup."""
+    CacheBus.watch_all()
+
+
+@bpy.app.handlers.persistent
+def watch_caches_undo(*args) -> None:
+    CacheBus.before_undo()
+
+
+@bpy.app.handlers.persistent
+def revalidate_caches_undo(*args) -> None:
+    CacheBus.on_undo()
+
+
+@bpy.app.handlers.persistent
+def clear_caches_load(*args) -> None:
+    CacheBus.on_load()
+
+
+@bpy.app.handlers.persistent
+def revalidate_caches_depsgraph(scene: bpy.types.Scene, depsgraph: bpy.types.Depsgraph) -> None:
+    """The points may be changed by the other tools (annotate, undo of a stroke...)"""
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.GreasePencil):
+            CacheBus.mark(update.id.original)
+    if CacheBus.marked and not bpy.app.timers.is_registered(revalidate_marked_caches):
+        bpy.app.timers.register(revalidate_marked_caches, first_interval=REVALIDATE_DELAY)
+
+
+def revalidate_marked_caches() -> Optional[float]:
+    """Timer, once per burst of updates instead of once per update."""
+    return CacheBus.revalidate_marked(REVALIDATE_DELAY)
+
+
+def register():
+    register_caches()
+    bpy.app.timers.register(watch_caches, first_interval=0)
+    bpy.app.handlers.undo_pre.append(watch_caches_undo)
+    bpy.app.handlers.redo_pre.append(watch_caches_undo)
+    bpy.app.handlers.undo_post.append(revalidate_caches_undo)
+    bpy.app.handlers.redo_post.append(revalidate_caches_undo)
+    bpy.app.handlers.load_post.append(clear_caches_load)
+    bpy.app.handlers.depsgraph_update_post.append(revalidate_caches_depsgraph)
+
+
+def unregister():
+    for timer in (watch_caches, revalidate_marked_caches):
+        if bpy.app.timers.is_registered(timer):
+            bpy.app.timers.unregister(timer)
+    for handlers, handler in ((bpy.app.handlers.undo_pre, watch_caches_undo),
+                              (bpy.app.handlers.redo_pre, watch_caches_undo),
+                              (bpy.app.handlers.undo_post, revalidate_caches_undo),
+                              (bpy.app.handlers.redo_post, revalidate_caches_undo),
+                              (bpy.app.handlers.load_post, clear_caches_load),
+                              (bpy.app.handlers.depsgraph_update_post, revalidate_caches_depsgraph)):
+        if handler in handlers:
+            handlers.remove(handler)
+    CacheBus.clear()
+    CacheBus.caches.clear()
+    CacheBus.fingerprints.clear()
+    CacheBus.marked.clear()
@@ -7,8 +7,10 @@ from contextlib import contextmanager
 
 from ..model.data_enums import ShootAngles
 from ..model.model_gp_bbox import GPencilLayerBBox
+from ..model.model_gp_hull import GPencilLayerHitTest
+from ..model.utils import VecTool
 from ..view_model.view_model_mouse import MouseDetectModel
-from ..public_path import get_svg_icon
+from ..public_path import get_svg_icon, get_pref_snapshot
 
 
 def tag_redraw():
@@ -57,9 +59,23 @@ def is_valid_workspace_tool(context: bpy.types.Context) -> bool:
 
 def get_pos_layer_index(gp_data: bpy.types.GreasePencil, pos: Sequence | Vector, feather=0,
                         local: bool = True) -> int | None:
-    """get the layer index by the mouse position."""
+    """get the layer index by the mouse position.
+    The layers are tested with their cached convex hull (and strokes if tight fit) unless the pick shape preference
+    is the bounding box, so the empty corners of a round / diagonal note do not steal the click.
+    :param local: use the local bounding box, only for the bounding box pick shape"""
     # TODO select through if some layers are overlapped
     try:
+        pick_shape = get_pref_snapshot().pick_shape
+        if pick_shape != 'BBOX':
+            pos_3d = VecTool.r2d_2_loc3d(Vector(pos))
+            feather_3d = (VecTool.r2d_2_loc3d(Vector(pos) + Vector((feather, 0))) - pos_3d).length if feather else 0
+            for i, layer in enumerate(gp_data.layers):
+                if GPencilLayerHitTest.shape(layer).contains(pos_3d.xy, feather_3d, tight=pick_shape == 'TIGHT'):
+                    if gp_data.layers.active_index == i:
+                        continue
+                    return i
+            return None
+
         bbox = GPencilLayerBBox(gp_data)
         bbox.mode = 'LOCAL' if local else 'GLOBAL'
         mouse_detect = MouseDetectModel()
@@ -1,10 +1,11 @@
 import bpy
 import re
-from bpy.props import StringProperty
+from bpy.props import StringProperty, BoolProperty, FloatProperty
 from ..model.model_color import ColorPaletteModel
 from ..public_path import get_color_palettes
 from .functions import get_icons, has_edit_tree, is_valid_workspace_tool
 from ..model.utils import ColorTool
+from ..model.model_gp import BuildGreasePencilData
 
 ICONS = []
 
@@ -17,7 +18,7 @@ class EST_OT_set_color(bpy.types.Operator):
     hex: StringProperty()
 
     def execute(self, context):
-        context.scene.est_palette_color = ColorTool.hex_2_rgb(self.hex)
+        context.scene.est_palette_color = ColorPaletteModel.lut().get_srgb(self.hex)
         context.area.tag_redraw()
         return {'FINISHED'}
 
@@ -25,15 +26,49 @@ class EST_OT_set_color(bpy.types.Operator):
 class EST_OT_set_gp_active_color(bpy.types.Operator):
     bl_idname = "est.set_gp_active_color"
     bl_label = "Set GP Active Color"
+    bl_description = "Set the color of the active layer\nShift: Recolor all the layers with the same color"
     bl_options = {'UNDO'}
 
     hex: StringProperty()
+    same_color: BoolProperty(name='Same Color', default=False, options={'SKIP_SAVE', 'HIDDEN'})
+
+    def invoke(self, context, event):
+        self.same_color = event.shift
+        return self.execute(context)
 
     def execute(self, context):
         gp_data = context.space_data.edit_tree.grease_pencil
-        if gp_data is None:
+        if gp_data is None or gp_data.layers.active is None:
             return {'CANCELLED'}
-        gp_data.layers.active.color = ColorTool.hex_2_rgb(self.hex)
+        color = ColorPaletteModel.lut().get_srgb(self.hex)
+        if self.same_color:
+            with BuildGreasePencilData(gp_data) as gp_data_builder:
+                gp_data_builder.recolor(gp_data.layers.active.color, color)
+        else:
+            gp_data.layers.active.color = color
+        return {'FINISHED'}
+
+
+class EST_OT_recolor_gp(bpy.types.Operator):
+    bl_idname = "est.recolor_gp"
+    bl_label = "Recolor Notes"
+    bl_description = "Recolor all the notes of a color to another color in the node tree"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    src_hex: StringProperty(name='From', default='#A1A1A1')
+    hex: StringProperty(name='To', default='#ED9E5C')
+    tolerance: FloatProperty(name='Tolerance', default=1 / 255, min=0, max=1)
+
+    @classmethod
+    def poll(cls, context):
+        return has_edit_tree(context) and context.space_data.edit_tree.grease_pencil
+
+    def execute(self, context):
+        gp_data = context.space_data.edit_tree.grease_pencil
+        lut = ColorPaletteModel.lut()
+        with BuildGreasePencilData(gp_data) as gp_data_builder:
+            gp_data_builder.recolor(lut.get_srgb(self.src_hex), lut.get_srgb(self.hex), self.tolerance)
+        context.area.tag_redraw()
         return {'FINISHED'}
 
 
@@ -87,6 +122,7 @@ class EST_PT_palette_viewer_active(bpy.types.Panel):
 def register():
     bpy.utils.register_class(EST_OT_set_color)
     bpy.utils.register_class(EST_OT_set_gp_active_color)
+    bpy.utils.register_class(EST_OT_recolor_gp)
     bpy.utils.register_class(EST_PT_palette_viewer)
     bpy.utils.register_class(EST_PT_palette_viewer_active)
 
@@ -94,5 +130,6 @@ def register():
 def unregister():
     bpy.utils.unregister_class(EST_OT_set_color)
     bpy.utils.unregister_class(EST_OT_set_gp_active_color)
+    bpy.utils.unregister_class(EST_OT_recolor_gp)
     bpy.utils.unregister_class(EST_PT_palette_viewer)
     bpy.utils.unregister_class(EST_PT_palette_viewer_active)
@@ -10,6 +10,7 @@ from .functions import get_edit_tree_gp_data, has_edit_tree
 from ..view_model.view_model_select import SelectedGPLayersRuntime
 from ..model.data_enums import AlignMode, DistributionMode
 from ..public_path import get_png_icons_directory
+from ..model.model_memory import MemoryAccounting
 
 
 class EST_OT_align_gp(bpy.types.Operator):
@@ -28,15 +29,16 @@ class EST_OT_align_gp(bpy.types.Operator):
         return has_edit_tree(context) and get_edit_tree_gp_data(context) and SelectedGPLayersRuntime.selected_layers()
 
     def execute(self, context):
-        gp_data = get_edit_tree_gp_data(context)
-        bboxs = GPencilLayersBBox(gp_data)
-        diff = bboxs.calc_layers_edge_difference(SelectedGPLayersRuntime.selected_layers(),
-                                                 mode=getattr(AlignMode, self.align_mode))
-        with BuildGreasePencilData(gp_data) as gp_data_builder:
-            for layer_name, diff_vector in diff.items():
-                gp_data_builder.move(layer_name, -diff_vector)
-        SelectedGPLayersRuntime.update_from_gp_data(gp_data)
-        return {'FINISHED'}
+        with MemoryAccounting.trace('align'):
+            gp_data = get_edit_tree_gp_data(context)
+            bboxs = GPencilLayersBBox(gp_data)
+            diff = bboxs.calc_layers_edge_difference(SelectedGPLayersRuntime.selected_layers(),
+                                                     mode=getattr(AlignMode, self.align_mode))
+            with BuildGreasePencilData(gp_data) as gp_data_builder:
+                for layer_name, diff_vector in diff.items():
+                    gp_data_builder.move(layer_name, -diff_vector)
+            SelectedGPLayersRuntime.update_from_gp_data(gp_data)
+            return {'FINISHED'}
 
 
 class EST_OT_distribution_gp(bpy.types.Operator):
@@ -55,15 +57,16 @@ class EST_OT_distribution_gp(bpy.types.Operator):
         return has_edit_tree(context) and get_edit_tree_gp_data(context) and SelectedGPLayersRuntime.selected_layers()
 
     def execute(self, context):
-        gp_data = get_edit_tree_gp_data(context)
-        bboxs = GPencilLayersBBox(gp_data)
-        diff = bboxs.calc_layers_distribute_difference(SelectedGPLayersRuntime.selected_layers(),
-                                                       mode=getattr(DistributionMode, self.distribution_mode))
-        with BuildGreasePencilData(gp_data) as gp_data_builder:
-            for layer_name, diff_vector in diff.items():
-                gp_data_builder.move(layer_name, diff_vector)
-        SelectedGPLayersRuntime.update_from_gp_data(gp_data)
-        return {'FINISHED'}
+        with MemoryAccounting.trace('align'):
+            gp_data = get_edit_tree_gp_data(context)
+            bboxs = GPencilLayersBBox(gp_data)
+            diff = bboxs.calc_layers_distribute_difference(SelectedGPLayersRuntime.selected_layers(),
+                                                           mode=getattr(DistributionMode, self.distribution_mode))
+            with BuildGreasePencilData(gp_data) as gp_data_builder:
+                for layer_name, diff_vector in diff.items():
+                    gp_data_builder.move(layer_name, diff_vector)
+            SelectedGPLayersRuntime.update_from_gp_data(gp_data)
+            return {'FINISHED'}
 
 
 @dataclass
@@ -74,11 +77,14 @@ class AlignIcon:
 
     @classmethod
     def get_icon_id(cls, name: str) -> int:
+        """Return the icon id of the png icon, the previews are loaded on the first call."""
+        if not cls.pv_coll:
+            cls.register_icon()
         return cls.icon_id.get(name)
 
     @classmethod
     def register_icon(cls):
-        if bpy.app.background: return
+        if bpy.app.background or cls.pv_coll: return
 
         d = get_png_icons_directory()
         cls.paths.extend([fp for fp in d.iterdir()])
@@ -103,6 +109,8 @@ class AlignIcon:
         for pcoll in cls.pv_coll.values():
             previews.remove(pcoll)
         cls.pv_coll.clear()
+        cls.icon_id.clear()
+        cls.paths.clear()
 
 
 class EST_MT_align_menu(bpy.types.Menu):
@@ -138,8 +146,7 @@ class EST_MT_distribution_menu(bpy.types.Menu):
 
 
 def register():
-    AlignIcon.register_icon()
-
+    # the align icons are loaded on the first draw, see AlignIcon.get_icon_id
     bpy.utils.register_class(EST_OT_align_gp)
     bpy.utils.register_class(EST_MT_align_menu)
     bpy.utils.register_class(EST_OT_distribution_gp)
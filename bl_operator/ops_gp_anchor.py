@@ -0,0 +1,80 @@
+import bpy
+
+from ..model.model_gp_anchor import GPencilNodeAnchor
+from ..model.model_gp_layer_id import GPencilLayerID
+from ..view_model.view_model_select import SelectedGPLayersRuntime
+from .functions import has_edit_tree, get_edit_tree_gp_data
+
+
+def get_target_layers(gp_data: bpy.types.GreasePencil) -> list[bpy.types.GPencilLayer]:
+    """The selected layers, or the active layer if none is selected."""
+    names = SelectedGPLayersRuntime.selected_layers()
+    layers = [layer for name in names if (layer := gp_data.layers.get(name))]
+    return layers or ([gp_data.layers.active] if gp_data.layers.active else [])
+
+
+# noinspection PyPep8Naming
+class EST_OT_attach_gp_to_node(bpy.types.Operator):
+    bl_idname = "est.attach_gp_to_node"
+    bl_label = "Attach to Active Node"
+    bl_description = "The selected notes follow the active node when it moves"
+    bl_options = {'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return has_edit_tree(context) and get_edit_tree_gp_data(context) and context.space_data.edit_tree.nodes.active
+
+    def execute(self, context):
+        node_tree = context.space_data.edit_tree
+        gp_data = get_edit_tree_gp_data(context)
+        GPencilLayerID.assign(gp_data)
+        GPencilNodeAnchor.prune(gp_data)
+        layers = get_target_layers(gp_data)
+        for layer in layers:
+            GPencilNodeAnchor.attach(node_tree, layer, node_tree.nodes.active)
+        self.report({'INFO'}, f'{len(layers)} -> {node_tree.nodes.active.name}')
+        return {'FINISHED'}
+
+
+# noinspection PyPep8Naming
+class EST_OT_detach_gp_from_node(bpy.types.Operator):
+    bl_idname = "est.detach_gp_from_node"
+    bl_label = "Detach from Node"
+    bl_description = "The selected notes stay in place when the nodes move"
+    bl_options = {'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return has_edit_tree(context) and get_edit_tree_gp_data(context)
+
+    def execute(self, context):
+        gp_data = get_edit_tree_gp_data(context)
+        GPencilLayerID.assign(gp_data)
+        GPencilNodeAnchor.prune(gp_data)
+        for layer in get_target_layers(gp_data):
+            GPencilNodeAnchor.detach(gp_data, layer)
+        return {'FINISHED'}
+
+
+@bpy.app.handlers.persistent
+def sync_node_anchors(scene: bpy.types.Scene, depsgraph: bpy.types.Depsgraph) -> None:
+    """Move the anchored notes of the node trees updated in this change."""
+    for update in depsgraph.updates:
+        # embedded trees (material, world, compositor) may be reported by their owner
+        node_tree = update.id if isinstance(update.id, bpy.types.NodeTree) else getattr(update.id, 'node_tree', None)
+        if node_tree and (node_tree := node_tree.original).grease_pencil:
+            GPencilNodeAnchor.sync(node_tree)
+
+
+def register():
+    bpy.utils.register_class(EST_OT_attach_gp_to_node)
+    bpy.utils.register_class(EST_OT_detach_gp_from_node)
+    bpy.app.handlers.depsgraph_update_post.append(sync_node_anchors)
+
+
+def unregister():
+    bpy.utils.unregister_class(EST_OT_attach_gp_to_node)
+    bpy.utils.unregister_class(EST_OT_detach_gp_from_node)
+    if sync_node_anchors in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(sync_node_anchors)
+    GPencilNodeAnchor.invalidate()
@@ -11,6 +11,7 @@ from .functions import has_edit_tree, get_pos_layer_index, load_icon_svg, \
     get_edit_tree_gp_data, ensure_builtin_font
 
 from ..public_path import get_pref
+from ..model.model_memory import MemoryAccounting
 
 
 class EST_OT_toggle_gp_space(bpy.types.Operator):
@@ -54,8 +55,8 @@ class EST_OT_remove_gp(bpy.types.Operator):
         with BuildGreasePencilData(gp_data) as gp_data_builder:
             if SelectedGPLayersRuntime.selected_layers() and not self.delete_active_only:
                 for layer in SelectedGPLayersRuntime.selected_layers():
-                    gp_data_builder.remove_layer(layer)
                     SelectedGPLayersRuntime.remove(layer)
+                    gp_data_builder.remove_layer(layer)
             else:
                 gp_data_builder.remove_active_layer()
         SelectedGPLayersRuntime.update_from_gp_data(gp_data)
@@ -172,47 +173,52 @@ class EST_OT_add_gp(bpy.types.Operator):
         return self.execute(context)
 
     def execute(self, context: bpy.types.Context):
-        ori_active_obj = context.object
-        font_gp_data: bpy.types.GreasePencil = None
-        obj: bpy.types.Object = bpy.data.objects.get(self.obj)
-        nt: bpy.types.NodeTree = context.space_data.edit_tree
-        vec: Vector = VecTool.r2d_2_v2d(self.mouse_pos) if self.use_mouse_pos else self.location
-        gp_data: bpy.types.GreasePencil = CreateGreasePencilData.empty() if not nt.grease_pencil else nt.grease_pencil
-
-        if self.add_type == 'TEXT':
-            ensure_builtin_font()
-            font_gp_data = CreateGreasePencilData.from_text(self.text, self.size, context.scene.est_gp_text_font.name)
-        elif self.add_type == 'OBJECT':
-            euler = getattr(ShootAngles, self.obj_shot_angle)
-            if obj.type == 'MESH':
-                font_gp_data = CreateGreasePencilData.from_mesh_obj(obj, self.size, euler=euler)
-            elif obj.type == 'GPENCIL':
-                font_gp_data = CreateGreasePencilData.from_gp_obj(obj, self.size, euler=euler)
-            else:
-                return {'CANCELLED'}
-        elif self.add_type == 'BL_ICON':
-            icon_obj = load_icon_svg(self.icon)
-            if not icon_obj: return {'CANCELLED'}
-            font_gp_data = CreateGreasePencilData.from_gp_obj(icon_obj, self.size, euler=ShootAngles.FRONT)
-            CreateGreasePencilData.del_later(icon_obj)
-        if not font_gp_data: return {'CANCELLED'}
-
-        color = context.scene.est_palette_color
-        with BuildGreasePencilData(gp_data) as gp_data_builder:
-            gp_data_builder.link(context).join(font_gp_data) \
-                .set_active_layer(-1) \
-                .move_active(vec, space='v2d') \
-                .fit_size(Vector((self.size, self.size)), fit_type='min') \
-                .color_active(color=color) \
-                .opacity_active(context.scene.est_gp_opacity) \
-                .thickness_active(context.scene.est_gp_thickness) \
-                .to_2d()
-            if self.add_type == 'BL_ICON' and get_pref().gp_performance.try_remove_svg_bound_stroke:
-                gp_data_builder.remove_svg_bound()
-
-        context.view_layer.objects.active = ori_active_obj
+        with MemoryAccounting.trace('add'):
+            ori_active_obj = context.object
+            font_gp_data: bpy.types.GreasePencil = None
+            obj: bpy.types.Object = bpy.data.objects.get(self.obj)
+            nt: bpy.types.NodeTree = context.space_data.edit_tree
+            vec: Vector = VecTool.r2d_2_v2d(self.mouse_pos) if self.use_mouse_pos else self.location
+            gp_data: bpy.types.GreasePencil = CreateGreasePencilData.empty() if not nt.grease_pencil \
+                else nt.grease_pencil
+
+            if self.add_type == 'TEXT':
+                ensure_builtin_font()
+                font_gp_data = CreateGreasePencilData.from_text(self.text, self.size,
+                                                                context.scene.est_gp_text_font.name)
+            elif self.add_type == 'OBJECT':
+                euler = getattr(ShootAngles, self.obj_shot_angle)
+                if obj.type == 'MESH':
+                    font_gp_data = CreateGreasePencilData.from_mesh_obj(obj, self.size, euler=euler)
+                elif obj.type == 'GPENCIL':
+                    font_gp_data = CreateGreasePencilData.from_gp_obj(obj, self.size, euler=euler)
+                else:
+                    return {'CANCELLED'}
+            elif self.add_type == 'BL_ICON':
+                icon_obj = load_icon_svg(self.icon)
+                if not icon_obj: return {'CANCELLED'}
+                font_gp_data = CreateGreasePencilData.from_gp_obj(icon_obj, self.size, euler=ShootAngles.FRONT)
+                CreateGreasePencilData.del_later(icon_obj)
+            if not font_gp_data: return {'CANCELLED'}
 
-        return {'FINISHED'}
+            color = context.scene.est_palette_color
+            with BuildGreasePencilData(gp_data) as gp_data_builder:
+                gp_data_builder.link(context).join(font_gp_data) \
+                    .set_active_layer(-1) \
+                    .move_active(vec, space='v2d') \
+                    .fit_size(Vector((self.size, self.size)), fit_type='min') \
+                    .color_active(color=color) \
+                    .opacity_active(context.scene.est_gp_opacity) \
+                    .thickness_active(context.scene.est_gp_thickness) \
+                    .to_2d()
+                if self.add_type == 'BL_ICON' and get_pref().gp_performance.try_remove_svg_bound_stroke:
+                    gp_data_builder.remove_svg_bound()
+                # simplify after the bound is removed, the bound is detected by its points count
+                gp_data_builder.simplify_active(get_pref().gp_performance.simplify_tolerance_px)
+
+            context.view_layer.objects.active = ori_active_obj
+
+            return {'FINISHED'}
 
 
 class EST_OT_gp_drop_layer_color(bpy.types.Operator):
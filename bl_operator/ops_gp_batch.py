@@ -0,0 +1,91 @@
+import bpy
+from bpy.props import BoolProperty, FloatProperty, IntProperty, EnumProperty, FloatVectorProperty
+from mathutils import Vector
+
+from ..model.model_gp_batch import GreasePencilBatch, collect_gp_data
+from ..model.model_memory import MemoryAccounting
+
+
+# noinspection PyPep8Naming
+class EST_OT_batch_gp(bpy.types.Operator):
+    """Apply the same edit to the notes of every node tree in the file.
+    Also work in background mode, e.g.
+    blender --background file.blend --python-expr "import bpy; bpy.ops.est.batch_gp(use_thickness=True, thickness=2); bpy.ops.wm.save_mainfile()"
+    """
+    bl_idname = "est.batch_gp"
+    bl_label = "Batch Edit All Notes"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    use_color: BoolProperty(name='Color', default=False)
+    color: FloatVectorProperty(name='Color', size=3, subtype='COLOR_GAMMA', min=0.0, max=1.0, default=(0.8, 0.8, 0.8))
+    use_thickness: BoolProperty(name='Thickness', default=False)
+    thickness: IntProperty(name='Thickness', default=1, min=1, max=10)
+    use_opacity: BoolProperty(name='Opacity', default=False)
+    opacity: FloatProperty(name='Opacity', default=1.0, min=0.0, max=1.0)
+    use_move: BoolProperty(name='Move', default=False)
+    move: FloatVectorProperty(name='Move', size=2, default=(0, 0))
+    use_scale: BoolProperty(name='Scale', default=False)
+    scale: FloatProperty(name='Scale', default=1.0, min=0.001)
+    use_display: BoolProperty(name='Display', default=False)
+    display: EnumProperty(name='Display', items=[('2D', '2D', ''), ('3D', '3D', '')], default='2D')
+    use_simplify: BoolProperty(name='Simplify', default=False)
+    simplify: FloatProperty(name='Simplify Tolerance', default=0.5, min=0, subtype='PIXEL')
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def draw(self, context):
+        layout = self.layout
+        layout.label(text=f'{len(collect_gp_data())} Grease Pencil Data', icon='OUTLINER_DATA_GREASEPENCIL')
+        col = layout.column()
+        for prop in ('color', 'thickness', 'opacity', 'move', 'scale', 'display', 'simplify'):
+            row = col.row(align=True)
+            row.prop(self, 'use_' + prop, text='')
+            sub = row.row(align=True)
+            sub.active = getattr(self, 'use_' + prop)
+            sub.prop(self, prop)
+
+    def execute(self, context):
+        with MemoryAccounting.trace('batch'):
+            batch = GreasePencilBatch(on_progress=self.progress)
+            if self.use_color:
+                batch.color(self.color)
+            if self.use_thickness:
+                batch.thickness(self.thickness)
+            if self.use_opacity:
+                batch.opacity(self.opacity)
+            if self.use_move:
+                batch.move(Vector(self.move), space='v2d')
+            if self.use_scale:
+                batch.scale(self.scale)
+            if self.use_display:
+                batch.display(self.display)
+            if self.use_simplify:
+                batch.simplify(self.simplify)
+            if not batch.steps:
+                return {'CANCELLED'}
+
+            context.window_manager.progress_begin(0, 1)
+            try:
+                count = batch.run()
+            finally:
+                context.window_manager.progress_end()
+            self.report({'INFO'}, f'{count} Grease Pencil Data Processed')
+            if context.area:
+                context.area.tag_redraw()
+            return {'FINISHED'}
+
+    @staticmethod
+    def progress(done: int, total: int, name: str):
+        if bpy.app.background:
+            print(f'[{done}/{total}] {name}')
+        else:
+            bpy.context.window_manager.progress_update(done / total)
+
+
+def register():
+    bpy.utils.register_class(EST_OT_batch_gp)
+
+
+def unregister():
+    bpy.utils.unregister_class(EST_OT_batch_gp)
@@ -0,0 +1,77 @@
+import bpy
+from bpy.props import StringProperty, BoolProperty
+from bpy_extras.io_utils import ExportHelper, ImportHelper
+
+from ..model.model_gp import CreateGreasePencilData, BuildGreasePencilData
+from ..model.model_gp_exchange import GreasePencilExchange, EXCHANGE_SUFFIX
+from ..view_model.view_model_select import SelectedGPLayersRuntime
+from .functions import has_edit_tree, get_edit_tree_gp_data
+from ..model.model_memory import MemoryAccounting
+
+
+# noinspection PyPep8Naming
+class EST_OT_export_gp(bpy.types.Operator, ExportHelper):
+    bl_idname = "est.export_gp"
+    bl_label = "Export Notes"
+    bl_description = "Export the notes of the node tree to a file, the selected notes only if there is a selection"
+
+    filename_ext = EXCHANGE_SUFFIX
+    filter_glob: StringProperty(default='*' + EXCHANGE_SUFFIX, options={'HIDDEN'})
+    selected_only: BoolProperty(name='Selected Only', default=True)
+
+    @classmethod
+    def poll(cls, context):
+        return has_edit_tree(context) and get_edit_tree_gp_data(context) is not None
+
+    def execute(self, context):
+        with MemoryAccounting.trace('exchange'):
+            gp_data = get_edit_tree_gp_data(context)
+            layers = None
+            if self.selected_only and (selected := SelectedGPLayersRuntime.selected_layers()):
+                layers = [layer for name in selected if (layer := gp_data.layers.get(name))] or None
+            size = GreasePencilExchange.write(self.filepath, gp_data, layers)
+            self.report({'INFO'}, f'{len(layers) if layers else len(gp_data.layers)} Notes, {size / 1024:.1f} KB')
+            return {'FINISHED'}
+
+
+# noinspection PyPep8Naming
+class EST_OT_import_gp(bpy.types.Operator, ImportHelper):
+    bl_idname = "est.import_gp"
+    bl_label = "Import Notes"
+    bl_description = "Import the notes from a file to the node tree"
+    bl_options = {'UNDO'}
+
+    filename_ext = EXCHANGE_SUFFIX
+    filter_glob: StringProperty(default='*' + EXCHANGE_SUFFIX, options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        return has_edit_tree(context)
+
+    def execute(self, context):
+        with MemoryAccounting.trace('exchange'):
+            try:
+                data = GreasePencilExchange.read(self.filepath)
+            except (OSError, ValueError) as e:
+                self.report({'ERROR'}, str(e))
+                return {'CANCELLED'}
+
+            gp_data = get_edit_tree_gp_data(context)
+            with BuildGreasePencilData(gp_data or CreateGreasePencilData.empty()) as gp_data_builder:
+                if not gp_data:
+                    gp_data_builder.link(context)
+                new_layers = GreasePencilExchange.unpack(data, gp_data_builder.gp_data)
+            SelectedGPLayersRuntime.update_from_gp_data(gp_data_builder.gp_data)
+            self.report({'INFO'}, f'{len(new_layers)} Notes')
+            context.area.tag_redraw()
+            return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(EST_OT_export_gp)
+    bpy.utils.register_class(EST_OT_import_gp)
+
+
+def unregister():
+    bpy.utils.unregister_class(EST_OT_export_gp)
+    bpy.utils.unregister_class(EST_OT_import_gp)
@@ -0,0 +1,105 @@
+import bpy
+from bpy.props import EnumProperty, FloatProperty, IntProperty
+
+from ..model.data_enums import InspectMetric
+from ..model.model_cache_bus import CacheBus
+from ..model.model_gp import BuildGreasePencilData
+from ..model.model_gp_cost import GPencilLayerCost
+from ..model.model_gp_layer_id import GPencilLayerID
+from ..model.model_memory import MemoryAccounting
+from ..view.view_node_editor import ViewDrawHandle, ViewCostInspector
+from ..view_model.view_model_select import SelectedGPLayersRuntime
+from .functions import has_edit_tree, get_edit_tree_gp_data, is_workspace_tool_edit
+from ..public_path import get_pref
+
+inspector_view = ViewCostInspector()
+inspector_handle = ViewDrawHandle()
+
+
+def draw_inspector() -> None:
+    """Draw handler of the node editors, only draws while the inspector of the Tweak tool is on."""
+    context = bpy.context
+    if not context.window_manager.est_gp_inspect: return
+    if not (has_edit_tree(context) and is_workspace_tool_edit(context)): return
+    if not (gp_data := get_edit_tree_gp_data(context)) or not len(gp_data.layers): return
+    inspector_view.draw(gp_data, context.window_manager.est_gp_inspect_metric)
+
+
+class InspectOperator:
+    metric: EnumProperty(name='Metric', items=InspectMetric.enum_items())
+
+    @classmethod
+    def poll(cls, context):
+        return has_edit_tree(context) and get_edit_tree_gp_data(context)
+
+    def invoke(self, context, event):
+        if not self.properties.is_property_set('metric'):
+            self.metric = context.window_manager.est_gp_inspect_metric
+        return self.execute(context)
+
+
+# noinspection PyPep8Naming
+class EST_OT_select_heavy_gp(InspectOperator, bpy.types.Operator):
+    bl_idname = "est.select_heavy_gp"
+    bl_label = "Select Heavy Notes"
+    bl_description = "Select the notes whose cost is close to the heaviest one, on a log scale"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    threshold: FloatProperty(name='Threshold', default=0.75, min=0, max=1, subtype='FACTOR')
+
+    def execute(self, context):
+        with MemoryAccounting.trace('inspect'):
+            gp_data = get_edit_tree_gp_data(context)
+            GPencilLayerID.assign(gp_data)
+            mask = GPencilLayerCost.heavy_mask(gp_data, self.threshold, self.metric)
+            SelectedGPLayersRuntime.clear()
+            for index in mask.nonzero()[0]:
+                SelectedGPLayersRuntime.set_active(gp_data.layers[int(index)])
+            if mask.any():
+                gp_data.layers.active_index = int(GPencilLayerCost.heaviest(gp_data, 1, self.metric)[0])
+            SelectedGPLayersRuntime.update_from_gp_data(gp_data)
+            self.report({'INFO'}, f'{int(mask.sum())} / {len(mask)}')
+            context.area.tag_redraw()
+            return {'FINISHED'}
+
+
+# noinspection PyPep8Naming
+class EST_OT_simplify_heavy_gp(InspectOperator, bpy.types.Operator):
+    bl_idname = "est.simplify_heavy_gp"
+    bl_label = "Simplify Heaviest Notes"
+    bl_description = "Simplify the strokes of the heaviest notes, all the frames"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    count: IntProperty(name='Count', default=5, min=1, soft_max=50)
+    tolerance: FloatProperty(name='Simplify Tolerance', default=0.5, min=0, soft_max=5, subtype='PIXEL')
+
+    def invoke(self, context, event):
+        if not self.properties.is_property_set('tolerance'):
+            self.tolerance = get_pref().gp_performance.simplify_tolerance_px
+        return super().invoke(context, event)
+
+    def execute(self, context):
+        with MemoryAccounting.trace('inspect'):
+            gp_data = get_edit_tree_gp_data(context)
+            points = GPencilLayerCost.values(gp_data, 'POINTS')
+            before = int(points.sum())
+            builder = BuildGreasePencilData(gp_data)
+            for index in GPencilLayerCost.heaviest(gp_data, self.count, self.metric):
+                builder.simplify(int(index), self.tolerance)
+                CacheBus.invalidate_layer(gp_data.layers[int(index)])
+            removed = before - int(GPencilLayerCost.values(gp_data, 'POINTS').sum())
+            self.report({'INFO'}, f'{removed} points removed')
+            context.area.tag_redraw()
+            return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(EST_OT_select_heavy_gp)
+    bpy.utils.register_class(EST_OT_simplify_heavy_gp)
+    inspector_handle.add_to_node_editor(draw_inspector, ())
+
+
+def unregister():
+    inspector_handle.remove_from_node_editor()
+    bpy.utils.unregister_class(EST_OT_select_heavy_gp)
+    bpy.utils.unregister_class(EST_OT_simplify_heavy_gp)
@@ -1,17 +1,22 @@
 import bpy
 from bpy.props import StringProperty, EnumProperty
-from typing import ClassVar
 from mathutils import Vector
 
 from ..model.model_gp import BuildGreasePencilData, CreateGreasePencilData
 from ..model.model_gp_bbox import GPencilLayerBBox
+from ..model.model_gp_transform import GPencilLayerTransform
+from ..model.model_memory import MemoryAccounting
 from ..model.utils import VecTool
 from ..view_model.handlers import ScaleHandler, RotateHandler, MoveHandler
 from ..view_model.view_model_drag import DragGreasePencilViewModal
+from ..view_model.view_model_draw import DrawViewModel
 from ..view_model.view_model_select import SelectedGPLayersRuntime
+from ..view_model.view_model_session import EditorSession, EditorSessions
 from ..view.view_node_editor import ViewHover, ViewDrawHandle, ViewDrag
 from ..view_model.view_model_mouse import MouseDragState
+from ..view_model.view_model_record import EventRecorder
 
+from ..public_path import get_pref_snapshot
 from .functions import has_edit_tree, tag_redraw, is_valid_workspace_tool, get_pos_layer_index, get_edit_tree_gp_data
 
 
@@ -25,18 +30,30 @@ class TransformModal(bpy.types.Operator):
     scale_handler: ScaleHandler = None
 
     mouse_state: MouseDragState = None
+    # draws the layers while their transform is pending, see deferred_transform
+    draw_handle: ViewDrawHandle = None
 
     @classmethod
     def poll(cls, context):
         return has_edit_tree(context) and get_edit_tree_gp_data(context) and is_valid_workspace_tool(context)
 
     def _init(self, context, event):
+        EventRecorder.record(self.bl_idname, context, event, invoke=True)
+        EditorSessions.activate(context)
         gp_data = get_edit_tree_gp_data(context)
         self.build_model = BuildGreasePencilData(gp_data)
         self.bbox_model = GPencilLayerBBox(gp_data=self.build_model.gp_data, mode="LOCAL")
         self.bbox_model.calc_active_layer_bbox()
         self.mouse_state = MouseDragState()
         self.mouse_state.init(event)
+        # only the active frame is edited while dragging, other frames follow when finished
+        layers = SelectedGPLayersRuntime.selected_layers() or [self.build_model.active_layer_index]
+        self.build_model.defer_other_frames(layers) \
+            .begin_proxy(layers, get_pref_snapshot().proxy_points)
+        if get_pref_snapshot().deferred_transform:
+            self.build_model.begin_transform(layers)
+            self.draw_handle = ViewDrawHandle()
+            self.draw_handle.add_to_node_editor(DrawViewModel.draw_pending_transforms, ())
 
     def _start_modal(self, context):
         context.window_manager.modal_handler_add(self)
@@ -44,6 +61,11 @@ class TransformModal(bpy.types.Operator):
         EST_OT_gp_view.hide()
 
     def _finish(self, context) -> set:
+        if self.move_handler:
+            self.move_handler.view_pan.stop()
+        if self.draw_handle:
+            self.draw_handle.remove_from_node_editor()
+        self.build_model.bake_transform().commit_proxy().commit_other_frames()
         EST_OT_gp_view.show()
         SelectedGPLayersRuntime.update_from_gp_data(self.build_model.gp_data,
                                                     mode="LOCAL")
@@ -56,29 +78,32 @@ class EST_OT_move_gp_modal(TransformModal):
     bl_label = "Move"
 
     def invoke(self, context, event):
-        self._init(context, event)
+        with MemoryAccounting.trace('transform'):
+            self._init(context, event)
 
-        self.move_handler = MoveHandler()
-        self.move_handler.build_model = self.build_model
-        self.move_handler.mouse_state = self.mouse_state
+            self.move_handler = MoveHandler()
+            self.move_handler.build_model = self.build_model
+            self.move_handler.mouse_state = self.mouse_state
 
-        self._start_modal(context)
+            self._start_modal(context)
 
-        return {'RUNNING_MODAL'}
+            return {'RUNNING_MODAL'}
 
     def modal(self, context, event):
-        if event.type in {'ESC', 'RIGHTMOUSE'}:
-            self._finish(context)
-            return {'CANCELLED'}
-        if event.type == 'MOUSEMOVE':
-            self.mouse_state.update_mouse_position(event)
-            self.move_handler.selected_layers = SelectedGPLayersRuntime.selected_layers()
-            self.move_handler.accept_event(event)
-        if event.type == 'LEFTMOUSE':
-            self._finish(context)
-            return {'FINISHED'}
-        context.area.tag_redraw()
-        return {'RUNNING_MODAL'}
+        with MemoryAccounting.trace('transform'):
+            EventRecorder.record(self.bl_idname, context, event)
+            if event.type in {'ESC', 'RIGHTMOUSE'}:
+                self._finish(context)
+                return {'CANCELLED'}
+            if event.type == 'MOUSEMOVE':
+                self.mouse_state.update_mouse_position(event)
+                self.move_handler.selected_layers = SelectedGPLayersRuntime.selected_layers()
+                self.move_handler.accept_event(event)
+            if event.type == 'LEFTMOUSE':
+                self._finish(context)
+                return {'FINISHED'}
+            context.area.tag_redraw()
+            return {'RUNNING_MODAL'}
 
 
 class EST_OT_rotate_gp_modal(TransformModal):
@@ -86,32 +111,35 @@ class EST_OT_rotate_gp_modal(TransformModal):
     bl_label = "Rotate"
 
     def invoke(self, context, event):
-        self._init(context, event)
+        with MemoryAccounting.trace('transform'):
+            self._init(context, event)
 
-        self.rotate_handler = RotateHandler()
+            self.rotate_handler = RotateHandler()
 
-        self.rotate_handler.build_model = self.build_model
-        self.rotate_handler.mouse_state = self.mouse_state
-        self.rotate_handler.bbox_model = self.bbox_model
+            self.rotate_handler.build_model = self.build_model
+            self.rotate_handler.mouse_state = self.mouse_state
+            self.rotate_handler.bbox_model = self.bbox_model
 
-        self._start_modal(context)
+            self._start_modal(context)
 
-        return {'RUNNING_MODAL'}
+            return {'RUNNING_MODAL'}
 
     def modal(self, context, event):
-        if event.type in {'ESC', 'RIGHTMOUSE'}:
-            self._finish(context)
-            return {'CANCELLED'}
-        if event.type == 'MOUSEMOVE':
-            self.mouse_state.update_mouse_position(event)
-            self.rotate_handler.selected_layers = SelectedGPLayersRuntime.selected_layers()
-            self.rotate_handler.accept_event(event)
-        if event.type == 'LEFTMOUSE':
-            self._finish(context)
-
-            return {'FINISHED'}
-        context.area.tag_redraw()
-        return {'RUNNING_MODAL'}
+        with MemoryAccounting.trace('transform'):
+            EventRecorder.record(self.bl_idname, context, event)
+            if event.type in {'ESC', 'RIGHTMOUSE'}:
+                self._finish(context)
+                return {'CANCELLED'}
+            if event.type == 'MOUSEMOVE':
+                self.mouse_state.update_mouse_position(event)
+                self.rotate_handler.selected_layers = SelectedGPLayersRuntime.selected_layers()
+                self.rotate_handler.accept_event(event)
+            if event.type == 'LEFTMOUSE':
+                self._finish(context)
+
+                return {'FINISHED'}
+            context.area.tag_redraw()
+            return {'RUNNING_MODAL'}
 
 
 class EST_OT_scale_gp_modal(TransformModal):
@@ -119,33 +147,36 @@ class EST_OT_scale_gp_modal(TransformModal):
     bl_label = "Scale"
 
     def invoke(self, context, event):
-        self._init(context, event)
+        with MemoryAccounting.trace('transform'):
+            self._init(context, event)
 
-        self.scale_handler = ScaleHandler()
+            self.scale_handler = ScaleHandler()
 
-        self.scale_handler.build_model = self.build_model
-        self.scale_handler.mouse_state = self.mouse_state
-        self.scale_handler.bbox_model = self.bbox_model
-        self.scale_handler.force_center_scale = True
+            self.scale_handler.build_model = self.build_model
+            self.scale_handler.mouse_state = self.mouse_state
+            self.scale_handler.bbox_model = self.bbox_model
+            self.scale_handler.force_center_scale = True
 
-        self._start_modal(context)
+            self._start_modal(context)
 
-        return {'RUNNING_MODAL'}
+            return {'RUNNING_MODAL'}
 
     def modal(self, context, event):
-        if event.type in {'ESC', 'RIGHTMOUSE'}:
-            self._finish(context)
-            return {'CANCELLED'}
-        if event.type == 'MOUSEMOVE':
-            self.mouse_state.update_mouse_position(event)
-            self.scale_handler.selected_layers = SelectedGPLayersRuntime.selected_layers()
-            self.scale_handler.accept_event(event)
-        if event.type == 'LEFTMOUSE':
-            self._finish(context)
-
-            return {'FINISHED'}
-        context.area.tag_redraw()
-        return {'RUNNING_MODAL'}
+        with MemoryAccounting.trace('transform'):
+            EventRecorder.record(self.bl_idname, context, event)
+            if event.type in {'ESC', 'RIGHTMOUSE'}:
+                self._finish(context)
+                return {'CANCELLED'}
+            if event.type == 'MOUSEMOVE':
+                self.mouse_state.update_mouse_position(event)
+                self.scale_handler.selected_layers = SelectedGPLayersRuntime.selected_layers()
+                self.scale_handler.accept_event(event)
+            if event.type == 'LEFTMOUSE':
+                self._finish(context)
+
+                return {'FINISHED'}
+            context.area.tag_redraw()
+            return {'RUNNING_MODAL'}
 
 
 # noinspection PyPep8Naming
@@ -164,22 +195,24 @@ class EST_OT_add_gp_modal(bpy.types.Operator):
         return cls.bl_description % property.add_type.title()
 
     def invoke(self, context, event):
-        self.add_type = context.scene.est_gp_add_type
-        context.window_manager.modal_handler_add(self)
-        context.window.cursor_set('PICK_AREA')
-        return {'RUNNING_MODAL'}
+        with MemoryAccounting.trace('add'):
+            self.add_type = context.scene.est_gp_add_type
+            context.window_manager.modal_handler_add(self)
+            context.window.cursor_set('PICK_AREA')
+            return {'RUNNING_MODAL'}
 
     def modal(self, context, event):
-        if event.type in {'ESC', 'RIGHTMOUSE'}:
-            return {'CANCELLED'}
-        if event.type == 'LEFTMOUSE':
-            v2d_loc = VecTool.r2d_2_v2d(Vector((event.mouse_region_x, event.mouse_region_y)))
-            res = self._add(self, context, v2d_loc)
-            if res:
-                SelectedGPLayersRuntime.clear()  # clear the selected layers
-                SelectedGPLayersRuntime.set_active(get_edit_tree_gp_data(context).layers.active.info)
-            return {'FINISHED'}
-        return {'RUNNING_MODAL'}
+        with MemoryAccounting.trace('add'):
+            if event.type in {'ESC', 'RIGHTMOUSE'}:
+                return {'CANCELLED'}
+            if event.type == 'LEFTMOUSE':
+                v2d_loc = VecTool.r2d_2_v2d(Vector((event.mouse_region_x, event.mouse_region_y)))
+                res = self._add(self, context, v2d_loc)
+                if res:
+                    SelectedGPLayersRuntime.clear()  # clear the selected layers
+                    SelectedGPLayersRuntime.set_active(get_edit_tree_gp_data(context).layers.active)
+                return {'FINISHED'}
+            return {'RUNNING_MODAL'}
 
     @staticmethod
     def _add(self, context, location) -> bool:
@@ -238,150 +271,167 @@ class EST_OT_drag_add_gp_modal(bpy.types.Operator):
         return cls.bl_description % property.add_type.title()
 
     def invoke(self, context, event):
-        self.drag_add_type = context.scene.est_gp_drag_add_type
-        self.add_type = context.scene.est_gp_add_type
+        with MemoryAccounting.trace('add'):
+            self.drag_add_type = context.scene.est_gp_drag_add_type
+            self.add_type = context.scene.est_gp_add_type
 
-        self.mouse_state = MouseDragState()
-        self.mouse_state.init(event)
-        self.gp_data = get_edit_tree_gp_data(context)
-        ori_obj = context.object
-        if self.gp_data is None:
-            self.gp_data = CreateGreasePencilData.empty()
-            context.space_data.edit_tree.grease_pencil = self.gp_data
-
-        if self.drag_add_type == 'SQUARE':
-            new_gp_data = CreateGreasePencilData.square(p1=VecTool.r2d_2_loc3d(self.mouse_state.start_pos),
-                                                        p2=VecTool.r2d_2_loc3d(
-                                                            self.mouse_state.end_pos + Vector((5, 5))))
-        elif self.drag_add_type == 'CIRCLE':
-            new_gp_data = CreateGreasePencilData.circle(center=VecTool.r2d_2_loc3d(self.mouse_state.start_pos),
-                                                        radius=5)
-        else:
-            v2d_loc = VecTool.r2d_2_v2d(Vector((event.mouse_region_x, event.mouse_region_y)))
-            EST_OT_add_gp_modal._add(self, context, v2d_loc)
-
-        if self.drag_add_type in {'SQUARE', 'CIRCLE'}:
-            with (BuildGreasePencilData(self.gp_data) as build_model):
-                build_model.join(new_gp_data) \
-                    .set_active_layer(-1) \
-                    .move_active(VecTool.r2d_2_v2d(self.mouse_state.start_pos), space='v2d') \
-                    .color_active(color=context.scene.est_palette_color) \
-                    .opacity_active(context.scene.est_gp_opacity) \
-                    .thickness_active(context.scene.est_gp_thickness)
-        else:
+            self.mouse_state = MouseDragState()
+            self.mouse_state.init(event)
             self.gp_data = get_edit_tree_gp_data(context)
+            ori_obj = context.object
+            if self.gp_data is None:
+                self.gp_data = CreateGreasePencilData.empty()
+                context.space_data.edit_tree.grease_pencil = self.gp_data
+
+            if self.drag_add_type == 'SQUARE':
+                new_gp_data = CreateGreasePencilData.square(p1=VecTool.r2d_2_loc3d(self.mouse_state.start_pos),
+                                                            p2=VecTool.r2d_2_loc3d(
+                                                                self.mouse_state.end_pos + Vector((5, 5))))
+            elif self.drag_add_type == 'CIRCLE':
+                new_gp_data = CreateGreasePencilData.circle(center=VecTool.r2d_2_loc3d(self.mouse_state.start_pos),
+                                                            radius=5)
+            else:
+                v2d_loc = VecTool.r2d_2_v2d(Vector((event.mouse_region_x, event.mouse_region_y)))
+                EST_OT_add_gp_modal._add(self, context, v2d_loc)
+
+            if self.drag_add_type in {'SQUARE', 'CIRCLE'}:
+                with (BuildGreasePencilData(self.gp_data) as build_model):
+                    build_model.join(new_gp_data) \
+                        .set_active_layer(-1) \
+                        .move_active(VecTool.r2d_2_v2d(self.mouse_state.start_pos), space='v2d') \
+                        .color_active(color=context.scene.est_palette_color) \
+                        .opacity_active(context.scene.est_gp_opacity) \
+                        .thickness_active(context.scene.est_gp_thickness)
+            else:
+                self.gp_data = get_edit_tree_gp_data(context)
 
-            build_model = BuildGreasePencilData(self.gp_data)
-        self.build_model = build_model
-        self.bbox_model = GPencilLayerBBox(gp_data=self.build_model.gp_data, mode="LOCAL")
-        context.view_layer.objects.active = ori_obj # restore the active object, if there is no gp data at first
-        context.window_manager.modal_handler_add(self)
-        context.window.cursor_set('PICK_AREA')
-        return {'RUNNING_MODAL'}
+                build_model = BuildGreasePencilData(self.gp_data)
+            self.build_model = build_model
+            self.bbox_model = GPencilLayerBBox(gp_data=self.build_model.gp_data, mode="LOCAL")
+            context.view_layer.objects.active = ori_obj # restore the active object, if there is no gp data at first
+            context.window_manager.modal_handler_add(self)
+            context.window.cursor_set('PICK_AREA')
+            return {'RUNNING_MODAL'}
 
     def modal(self, context, event):
-        self.drag_center = event.alt
-
-        if event.type in {'ESC', 'RIGHTMOUSE'}:
-            return {'CANCELLED'}
-        if event.type == 'MOUSEMOVE':
-            self.mouse_state.update_mouse_position(event)
-            pos1 = VecTool.r2d_2_loc3d(self.mouse_state.start_pos)
-            pos2 = VecTool.r2d_2_loc3d(self.mouse_state.end_pos)
-
-            if self.drag_center:
-                size_3d = (pos2 - pos1) * 2
-            else:
-                size_3d = pos2 - pos1
-            # avoid the size is too small
-            for i in range(2):
-                if abs(size_3d[i]) < 0.01:
-                    size_3d[i] = 0.01
-            if event.shift:
-                size_3d = Vector((size_3d[0], size_3d[1], 1))
-
-            self.build_model.fit_size(size_3d, fit_type='max' if event.shift else 'none',
-                                      pivot_pos='center')
-            if not self.drag_center and not event.shift:
-                self.bbox_model.calc_active_layer_bbox()
-                center = self.bbox_model.center_v2d
-                drag_start_v2d = VecTool.r2d_2_v2d(self.mouse_state.start_pos)
-                drag_end_v2d = VecTool.r2d_2_v2d(self.mouse_state.end_pos)
-                drag_center = (drag_start_v2d + drag_end_v2d) / 2
-                delta_v2d = drag_center.to_2d() - center.to_2d()
-                self.build_model.move_active(delta_v2d, space='v2d')
-
-            if self.gp_data_init is False:
-                self.build_model.to_2d()
-                self.gp_data_init = True
-
-        if event.type == 'LEFTMOUSE':
-            return {'FINISHED'}
-        context.area.tag_redraw()
-        return {'RUNNING_MODAL'}
+        with MemoryAccounting.trace('add'):
+            self.drag_center = event.alt
+
+            if event.type in {'ESC', 'RIGHTMOUSE'}:
+                return {'CANCELLED'}
+            if event.type == 'MOUSEMOVE':
+                self.mouse_state.update_mouse_position(event)
+                pos1 = VecTool.r2d_2_loc3d(self.mouse_state.start_pos)
+                pos2 = VecTool.r2d_2_loc3d(self.mouse_state.end_pos)
+
+                if self.drag_center:
+                    size_3d = (pos2 - pos1) * 2
+                else:
+                    size_3d = pos2 - pos1
+                # avoid the size is too small
+                for i in range(2):
+                    if abs(size_3d[i]) < 0.01:
+                        size_3d[i] = 0.01
+                if event.shift:
+                    size_3d = Vector((size_3d[0], size_3d[1], 1))
+
+                self.build_model.fit_size(size_3d, fit_type='max' if event.shift else 'none',
+                                          pivot_pos='center')
+                if not self.drag_center and not event.shift:
+                    self.bbox_model.calc_active_layer_bbox()
+                    center = self.bbox_model.center_v2d
+                    drag_start_v2d = VecTool.r2d_2_v2d(self.mouse_state.start_pos)
+                    drag_end_v2d = VecTool.r2d_2_v2d(self.mouse_state.end_pos)
+                    drag_center = (drag_start_v2d + drag_end_v2d) / 2
+                    delta_v2d = drag_center.to_2d() - center.to_2d()
+                    self.build_model.move_active(delta_v2d, space='v2d')
+
+                if self.gp_data_init is False:
+                    self.build_model.to_2d()
+                    self.gp_data_init = True
+
+            if event.type == 'LEFTMOUSE':
+                if self.drag_add_type in {'SQUARE', 'CIRCLE'}:  # simplify at the final size
+                    self.build_model.simplify_active(get_pref_snapshot().simplify_tolerance_px)
+                return {'FINISHED'}
+            context.area.tag_redraw()
+            return {'RUNNING_MODAL'}
 
 
 class EST_OT_gp_view(bpy.types.Operator):
     bl_idname = "est.gp_view"
     bl_label = "View"
 
-    draw_handle: ClassVar[ViewDrawHandle] = None
-    drag_vm: ClassVar[DragGreasePencilViewModal] = None
-    view_hover: ClassVar[ViewHover] = None
+    # the hover view of every editor is in its session, see EditorSessions
+    drag_vm: DragGreasePencilViewModal = None
+    view_hover: ViewHover = None
+    draw_handle: ViewDrawHandle = None
+    session: EditorSession = None
     # call stop
     stop: bool = False
 
     @classmethod
     def poll(cls, context):
-        return has_edit_tree(context) and is_valid_workspace_tool(context) and get_edit_tree_gp_data(
-            context) and (cls.draw_handle is None or cls.draw_handle.is_empty())
+        if not (has_edit_tree(context) and is_valid_workspace_tool(context) and get_edit_tree_gp_data(context)):
+            return False
+        session = EditorSessions.peek(context)
+        return session is None or session.hover is None or session.hover[2].is_empty()
 
     @classmethod
     def hide(cls):
-        if cls.view_hover:
-            cls.view_hover.hide()
+        if hover := EditorSessions.get().hover:
+            hover[1].hide()
 
     @classmethod
     def show(cls):
-        if cls.view_hover:
-            cls.view_hover.show()
-        if cls.drag_vm:
-            cls.drag_vm._update_active_bbox(bpy.context)
+        if hover := EditorSessions.get().hover:
+            hover[1].show()
+            hover[0]._update_active_bbox(bpy.context)
 
     def invoke(self, context, event):
-        self.stop = False
-        if self.draw_handle:
-            self.draw_handle.remove_from_node_editor()
-
-        gp_data = get_edit_tree_gp_data(context)
-        if not gp_data.layers.active:
-            return {'CANCELLED'}
-        drag_vm = DragGreasePencilViewModal(gp_data=gp_data)
-
-        drag_vm.clear_selected_layers_points()
-        drag_vm.bbox_model.calc_active_layer_bbox()
-        self.__class__.drag_vm = drag_vm
-        self.__class__.view_hover = ViewHover(self.drag_vm)
-        self.__class__.draw_handle = ViewDrawHandle()
-
-        self.draw_handle.add_to_node_editor(self.view_hover, (self, context))
-        context.window_manager.modal_handler_add(self)
-        context.area.tag_redraw()
-        self.drag_vm.set_bbox_mode("LOCAL")
-        return {'RUNNING_MODAL'}
+        with MemoryAccounting.trace('hover'):
+            self.stop = False
+            self.session = EditorSessions.activate(context)
+            if self.session.hover:
+                self.session.hover[2].remove_from_node_editor()
+
+            gp_data = get_edit_tree_gp_data(context)
+            if not gp_data.layers.active:
+                return {'CANCELLED'}
+            drag_vm = DragGreasePencilViewModal(gp_data=gp_data)
+
+            drag_vm.clear_selected_layers_points()
+            drag_vm.bbox_model.calc_active_layer_bbox()
+            self.drag_vm = drag_vm
+            self.view_hover = ViewHover(self.drag_vm)
+            self.draw_handle = ViewDrawHandle()
+            self.session.hover = (self.drag_vm, self.view_hover, self.draw_handle)
 
-    def modal(self, context, event):
-        if self.stop or not context.area or not is_valid_workspace_tool(
-                context) or not self.drag_vm or not self.drag_vm.has_active_layer():
-            return self._finish()
-
-        if event.type in {'MOUSEMOVE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE', 'MIDDLEMOUSE'}:
-            self.update_drag_vm(context, event)
-            if "LOCAL" != self.drag_vm.bbox_model.mode:
-                self.drag_vm.set_bbox_mode("LOCAL")
+            self.draw_handle.add_to_node_editor(self.view_hover, (self, context))
+            context.window_manager.modal_handler_add(self)
             context.area.tag_redraw()
+            self.drag_vm.set_bbox_mode("LOCAL")
+            return {'RUNNING_MODAL'}
 
-        return {'PASS_THROUGH'}
+    def modal(self, context, event):
+        with MemoryAccounting.trace('hover'):
+            if self.stop or not context.area or not is_valid_workspace_tool(
+                    context) or not self.drag_vm or not self.drag_vm.has_active_layer() or \
+                    self.session.hover is None or self.session.hover[2] is not self.draw_handle:
+                return self._finish()
+
+            if event.type in {'MOUSEMOVE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE', 'MIDDLEMOUSE'}:
+                # the other editors of the window have their own view
+                if not (0 <= event.mouse_region_x < context.region.width and
+                        0 <= event.mouse_region_y < context.region.height):
+                    return {'PASS_THROUGH'}
+                EventRecorder.record(self.bl_idname, context, event)
+                self.update_drag_vm(context, event)
+                if "LOCAL" != self.drag_vm.bbox_model.mode:
+                    self.drag_vm.set_bbox_mode("LOCAL")
+                context.area.tag_redraw()
+
+            return {'PASS_THROUGH'}
 
     def update_drag_vm(self, context, event):
         try:
@@ -395,8 +445,10 @@ class EST_OT_gp_view(bpy.types.Operator):
     def _finish(self) -> set:
         self.draw_handle.remove_from_node_editor()
         self.stop = False
-        self.__class__.drag_vm = None
-        self.__class__.view_hover = None
+        if self.session.hover and self.session.hover[2] is self.draw_handle:
+            self.session.hover = None
+        self.drag_vm = None
+        self.view_hover = None
         return {'FINISHED'}
 
 
@@ -417,11 +469,11 @@ class EST_OT_gp_set_active_layer(bpy.types.Operator):
                                                local=True)) is None:
             return {'FINISHED'}
 
-        drag_vm = DragGreasePencilViewModal(gp_data=gp_data)
+        drag_vm = DragGreasePencilViewModal.from_session(gp_data)
         layer = gp_data.layers[layer_index]
 
         if event.ctrl:  # subtraction select
-            SelectedGPLayersRuntime.remove(layer.info)
+            SelectedGPLayersRuntime.remove(layer)
         else:  # add select
             if not event.shift:  # single select active layer
                 SelectedGPLayersRuntime.clear()
@@ -431,7 +483,7 @@ class EST_OT_gp_set_active_layer(bpy.types.Operator):
             drag_vm.bbox_model.calc_active_layer_bbox()
             points = list(drag_vm.bbox_model.bbox_points_v2d)
             points[2], points[3] = points[3], points[2]
-            SelectedGPLayersRuntime.update(layer.info, points)
+            SelectedGPLayersRuntime.update(layer, points)
             # SelectedGPLayersRuntime.set_active(gp_data.layers.active.info)
 
         context.area.tag_redraw()
@@ -459,59 +511,100 @@ class EST_OT_gp_drag_modal(bpy.types.Operator):
         return has_edit_tree(context) and is_valid_workspace_tool(context) and get_edit_tree_gp_data(context)
 
     def invoke(self, context, event):
-        nt: bpy.types.NodeTree = context.space_data.edit_tree
-        gp_data: bpy.types.GreasePencil = nt.grease_pencil
-
-        self.drag_vm = DragGreasePencilViewModal(gp_data=gp_data)
-        self.view_drag = ViewDrag(self.drag_vm)
-
-        self.drag_vm.drag_handles = {
-            'SCALE': ScaleHandler(
-                call_after=lambda h: setattr(self.view_drag.draw_data, 'delta_scale', h.delta_scale)
-            ),
-            'ROTATE': RotateHandler(
-                call_after=lambda h: setattr(self.view_drag.draw_data, 'delta_degree', h.delta_degree)
-            ),
-            'MOVE': MoveHandler(
-                call_after=lambda h: setattr(self.view_drag.draw_data, 'delta_move', h.delta_move)
-            )
-        }
-
-        self.draw_handle = ViewDrawHandle()
-        self.draw_handle.add_to_node_editor(self.view_drag, (self, context))
-        context.window_manager.modal_handler_add(self)
-        self.drag_vm.set_bbox_mode("LOCAL")
-        self.drag_vm.update_mouse_pos(context, event)
-        return {'RUNNING_MODAL'}
+        with MemoryAccounting.trace('drag'):
+            EventRecorder.record(self.bl_idname, context, event, invoke=True)
+            nt: bpy.types.NodeTree = context.space_data.edit_tree
+            gp_data: bpy.types.GreasePencil = nt.grease_pencil
+
+            self.drag_vm = DragGreasePencilViewModal.from_session(gp_data)
+            self.view_drag = ViewDrag(self.drag_vm)
+            # only the active frame is edited while dragging, other frames follow when finished
+            layers = SelectedGPLayersRuntime.selected_layers() or [self.drag_vm.build_model.active_layer_index]
+            # copy mode duplicates the layer, the copy needs the full resolution and all its frames edited
+            if not event.alt:
+                self.drag_vm.build_model.defer_other_frames(layers)
+                self.drag_vm.build_model.begin_proxy(layers, get_pref_snapshot().proxy_points)
+                if get_pref_snapshot().deferred_transform:
+                    self.drag_vm.build_model.begin_transform(layers)
+
+            self.drag_vm.drag_handles = {
+                'SCALE': ScaleHandler(
+                    call_after=lambda h: setattr(self.view_drag.draw_data, 'delta_scale', h.delta_scale)
+                ),
+                'ROTATE': RotateHandler(
+                    call_after=lambda h: setattr(self.view_drag.draw_data, 'delta_degree', h.delta_degree)
+                ),
+                'MOVE': MoveHandler(
+                    call_after=lambda h: setattr(self.view_drag.draw_data, 'delta_move', h.delta_move)
+                )
+            }
+
+            self.draw_handle = ViewDrawHandle()
+            self.draw_handle.add_to_node_editor(self.view_drag, (self, context))
+            context.window_manager.modal_handler_add(self)
+            self.drag_vm.set_bbox_mode("LOCAL")
+            self.drag_vm.update_mouse_pos(context, event)
+            return {'RUNNING_MODAL'}
 
     def modal(self, context, event):
-        if event.type == 'MOUSEMOVE':
-            EST_OT_gp_view.hide()
-            self.drag_vm.update_mouse_pos(context, event)
-            if not self.drag_init:
-                self.drag_vm.mouse_init(event)
-                self.drag_vm.update_near_widgets()
-                self.drag_init = True
-            self.drag_vm.handle_drag(context, event)
-        # if event.type == 'B' and event.value == 'PRESS':
-        #     self.drag_vm.toggle_bbox_mode()
-        if True in (
-                event.type in {'ESC', 'RIGHTMOUSE'},
-                event.type == 'LEFTMOUSE' and event.value == 'RELEASE',
-                not is_valid_workspace_tool(context)
-        ):
-            return self._finish(context)
-        context.area.tag_redraw()
-        return {'RUNNING_MODAL'}
+        with MemoryAccounting.trace('drag'):
+            EventRecorder.record(self.bl_idname, context, event)
+            if event.type == 'MOUSEMOVE':
+                EST_OT_gp_view.hide()
+                self.drag_vm.update_mouse_pos(context, event)
+                if not self.drag_init:
+                    self.drag_vm.mouse_init(event)
+                    self.drag_vm.update_near_widgets()
+                    self.drag_init = True
+                self.drag_vm.handle_drag(context, event)
+            # if event.type == 'B' and event.value == 'PRESS':
+            #     self.drag_vm.toggle_bbox_mode()
+            if True in (
+                    event.type in {'ESC', 'RIGHTMOUSE'},
+                    event.type == 'LEFTMOUSE' and event.value == 'RELEASE',
+                    not is_valid_workspace_tool(context)
+            ):
+                return self._finish(context)
+            context.area.tag_redraw()
+            return {'RUNNING_MODAL'}
 
     def _finish(self, context) -> set:
+        if move_handler := self.drag_vm.drag_handles.get('MOVE'):
+            move_handler.view_pan.stop()
         self.draw_handle.remove_from_node_editor()
+        self.drag_vm.build_model.bake_transform().commit_proxy().commit_other_frames()
         EST_OT_gp_view.show()
         SelectedGPLayersRuntime.update_from_gp_data(self.drag_vm.gp_data, mode="LOCAL")
         context.area.tag_redraw()
         return {'FINISHED'}
 
 
+# noinspection PyPep8Naming
+class EST_OT_record_events(bpy.types.Operator):
+    bl_idname = "est.record_events"
+    bl_label = "Record Events"
+    bl_description = "Record the events of the transform tools for the replay benchmark, run again to save the record"
+
+    filepath: StringProperty(subtype='FILE_PATH', options={'SKIP_SAVE'})
+    filter_glob: StringProperty(default='*.json', options={'HIDDEN'})
+
+    def invoke(self, context, event):
+        if not EventRecorder.recording:
+            EventRecorder.start()
+            return {'FINISHED'}
+        self.filepath = 'est_events.json'
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        count = EventRecorder.stop(self.filepath or None)
+        self.report({'INFO'}, f'{count} events')
+        return {'FINISHED'}
+
+    def cancel(self, context):
+        EventRecorder.stop()
+
+
 def register():
     from bpy.utils import register_class
 
@@ -523,11 +616,14 @@ def register():
     register_class(EST_OT_gp_set_active_layer)
     register_class(EST_OT_gp_drag_modal)
     register_class(EST_OT_drag_add_gp_modal)
+    register_class(EST_OT_record_events)
 
 
 def unregister():
     from bpy.utils import unregister_class
     EST_OT_gp_view.stop = True
+    GPencilLayerTransform.clear()
+    EditorSessions.clear()
 
     unregister_class(EST_OT_move_gp_modal)
     unregister_class(EST_OT_rotate_gp_modal)
@@ -537,3 +633,5 @@ def unregister():
     unregister_class(EST_OT_gp_set_active_layer)
     unregister_class(EST_OT_gp_drag_modal)
     unregister_class(EST_OT_drag_add_gp_modal)
+    unregister_class(EST_OT_record_events)
+    EventRecorder.stop()
@@ -0,0 +1,129 @@
+import bpy
+from bpy.props import StringProperty, FloatProperty
+
+from ..model.model_gp import CreateGreasePencilData, BuildGreasePencilData
+from ..model.model_gp_template import GPencilTemplateLibrary
+from .functions import has_edit_tree, get_edit_tree_gp_data, is_valid_workspace_tool
+from ..public_path import lazy_import
+from ..model.model_memory import MemoryAccounting
+
+np = lazy_import('numpy')
+
+
+def view_center_loc3d(context: bpy.types.Context) -> 'np.ndarray':
+    """Return the center of the node editor main region in 3d space, also work when called from the sidebar."""
+    region = next((r for r in context.area.regions if r.type == 'WINDOW'), context.region)
+    # 3d space is view 2d * ui scale, which is what region_to_view returns
+    return np.array(region.view2d.region_to_view(region.width / 2, region.height / 2), dtype='f')
+
+
+# noinspection PyPep8Naming
+class EST_OT_add_gp_template(bpy.types.Operator):
+    bl_idname = "est.add_gp_template"
+    bl_label = "Save as Template"
+    bl_description = "Save the active note to the template library of this file"
+    bl_options = {'UNDO'}
+
+    name: StringProperty(name='Name')
+
+    @classmethod
+    def poll(cls, context):
+        return has_edit_tree(context) and (gp_data := get_edit_tree_gp_data(context)) and gp_data.layers.active
+
+    def invoke(self, context, event):
+        self.name = get_edit_tree_gp_data(context).layers.active.info
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        with MemoryAccounting.trace('template'):
+            gp_data = get_edit_tree_gp_data(context)
+            try:
+                name = GPencilTemplateLibrary.add(gp_data, gp_data.layers.active, self.name)
+            except ValueError as e:
+                self.report({'ERROR'}, str(e))
+                return {'CANCELLED'}
+            self.report({'INFO'}, name)
+            return {'FINISHED'}
+
+
+# noinspection PyPep8Naming
+class EST_OT_remove_gp_template(bpy.types.Operator):
+    bl_idname = "est.remove_gp_template"
+    bl_label = "Remove Template"
+    bl_options = {'UNDO'}
+
+    name: StringProperty(name='Name')
+
+    def execute(self, context):
+        GPencilTemplateLibrary.remove(self.name)
+        return {'FINISHED'}
+
+
+# noinspection PyPep8Naming
+class EST_OT_place_gp_template(bpy.types.Operator):
+    bl_idname = "est.place_gp_template"
+    bl_label = "Place Template"
+    bl_description = "Add a copy of the template at the center of the view"
+    bl_options = {'UNDO'}
+
+    name: StringProperty(name='Name')
+    scale: FloatProperty(name='Scale', default=1.0, min=0.01)
+
+    @classmethod
+    def poll(cls, context):
+        return has_edit_tree(context)
+
+    def execute(self, context):
+        with MemoryAccounting.trace('template'):
+            gp_data = get_edit_tree_gp_data(context)
+            with BuildGreasePencilData(gp_data or CreateGreasePencilData.empty()) as gp_data_builder:
+                if not gp_data:
+                    gp_data_builder.link(context)
+                layer = GPencilTemplateLibrary.place(self.name, gp_data_builder.gp_data, view_center_loc3d(context),
+                                                     self.scale)
+                if not layer:
+                    return {'CANCELLED'}
+                gp_data_builder.set_active_layer(layer.info)
+            context.area.tag_redraw()
+            return {'FINISHED'}
+
+
+class EST_PT_gp_templates(bpy.types.Panel):
+    bl_idname = "EST_PT_gp_templates"
+    bl_label = "Templates"
+    bl_space_type = 'NODE_EDITOR'
+    bl_region_type = 'UI'
+    bl_category = "Tool"
+    bl_options = {'DEFAULT_CLOSED'}
+    bl_order = 2
+
+    @classmethod
+    def poll(cls, context):
+        return has_edit_tree(context) and is_valid_workspace_tool(context)
+
+    def draw(self, context):
+        layout = self.layout
+        layout.operator(EST_OT_add_gp_template.bl_idname, icon='ADD')
+
+        grid = layout.grid_flow(row_major=True, columns=3, even_columns=True, align=True)
+        for name in GPencilTemplateLibrary.names():
+            col = grid.column(align=True)
+            col.template_icon(icon_value=GPencilTemplateLibrary.get_icon_id(name), scale=3.0)
+            row = col.row(align=True)
+            row.operator(EST_OT_place_gp_template.bl_idname, text=name).name = name
+            row.operator(EST_OT_remove_gp_template.bl_idname, text='', icon='X').name = name
+
+
+def register():
+    bpy.utils.register_class(EST_OT_add_gp_template)
+    bpy.utils.register_class(EST_OT_remove_gp_template)
+    bpy.utils.register_class(EST_OT_place_gp_template)
+    bpy.utils.register_class(EST_PT_gp_templates)
+
+
+def unregister():
+    bpy.utils.unregister_class(EST_OT_add_gp_template)
+    bpy.utils.unregister_class(EST_OT_remove_gp_template)
+    bpy.utils.unregister_class(EST_OT_place_gp_template)
+    bpy.utils.unregister_class(EST_PT_gp_templates)
+    GPencilTemplateLibrary.unregister_icon()
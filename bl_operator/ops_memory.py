@@ -0,0 +1,125 @@
+import bpy
+
+from .ops_gp_align import AlignIcon
+from ..model.model_cache_bus import CacheBus
+from ..model.model_color import ColorPaletteModel
+from ..model.model_gp import GreasePencilCache
+from ..model.model_gp_anchor import GPencilNodeAnchor
+from ..model.model_gp_bbox import CalcBBox
+from ..model.model_gp_cost import GPencilLayerCost
+from ..model.model_gp_hull import GPencilLayerHitTest
+from ..model.model_gp_layer_id import GPencilLayerID
+from ..model.model_gp_simplify import GPencilLayerLOD
+from ..model.model_gp_template import GPencilTemplateLibrary
+from ..model.model_gp_transform import GPencilLayerTransform
+from ..model.model_memory import MemoryAccounting, preview_bytes, format_bytes
+from ..model.model_note_index import NoteIndex
+from ..view_model.view_model_record import EventRecorder
+from ..view_model.view_model_session import EditorSessions
+from ..public_path import get_pref_snapshot
+
+
+def register_memory_sources():
+    MemoryAccounting.register('bbox', lambda: CalcBBox.frame_cache)
+    MemoryAccounting.register('hit_test', lambda: GPencilLayerHitTest.cache)
+    MemoryAccounting.register('lod', lambda: GPencilLayerLOD.mask_cache)
+    MemoryAccounting.register('cost', lambda: (GPencilLayerCost.cache, GPencilLayerCost.extents_cache))
+    MemoryAccounting.register('anchor', lambda: GPencilNodeAnchor.cache)
+    MemoryAccounting.register('layer_id', lambda: GPencilLayerID.cache)
+    MemoryAccounting.register('template', lambda: GPencilTemplateLibrary.cache)
+    MemoryAccounting.register('transform', lambda: GPencilLayerTransform.pending)
+    MemoryAccounting.register('note_index',
+                              lambda: (NoteIndex.texts, NoteIndex.postings, NoteIndex.vocabulary, NoteIndex.frames))
+    # the view models of the editors, with the points stored by store_active / the proxies
+    MemoryAccounting.register('session', lambda: (EditorSessions.sessions, EditorSessions.fallback))
+    MemoryAccounting.register('fingerprint', lambda: CacheBus.fingerprints)
+    MemoryAccounting.register('event_record', lambda: EventRecorder.events)
+    # temp objects / data waiting to be removed
+    MemoryAccounting.register('temp_data', lambda: GreasePencilCache._refs)
+    MemoryAccounting.register('preview', lambda: [pcoll for cls in (GPencilTemplateLibrary, ColorPaletteModel, AlignIcon)
+                                                  for pcoll in cls.pv_coll.values()], sizer=preview_bytes)
+
+
+# noinspection PyPep8Naming
+class EST_OT_memory_report(bpy.types.Operator):
+    bl_idname = "est.memory_report"
+    bl_label = "Memory Report"
+    bl_description = "Count the points of the notes and the memory held by the add-on, printed to the console"
+
+    def execute(self, context):
+        report = MemoryAccounting.report()
+        print('\n'.join(report.lines()))
+        self.report({'INFO'}, f'{sum(stats.points for stats in report.data)} points, '
+                              f'{format_bytes(sum(report.sources.values()))}')
+        return {'FINISHED'}
+
+
+# noinspection PyPep8Naming
+class EST_OT_trace_memory(bpy.types.Operator):
+    bl_idname = "est.trace_memory"
+    bl_label = "Trace Memory"
+    bl_description = "Measure what the operators allocate and keep with tracemalloc, slows down python while on"
+
+    def execute(self, context):
+        if MemoryAccounting.is_tracing():
+            MemoryAccounting.report()  # the alive allocations are read before the traces are dropped
+            MemoryAccounting.stop_tracing()
+        else:
+            MemoryAccounting.start_tracing()
+        return {'FINISHED'}
+
+
+class EST_PT_memory(bpy.types.Panel):
+    bl_idname = "EST_PT_memory"
+    bl_label = "Memory"
+    bl_space_type = 'NODE_EDITOR'
+    bl_region_type = 'UI'
+    bl_category = "Tool"
+    bl_options = {'DEFAULT_CLOSED'}
+    bl_order = 10
+
+    @classmethod
+    def poll(cls, context):
+        return get_pref_snapshot().debug
+
+    def draw(self, context):
+        layout = self.layout
+        row = layout.row(align=True)
+        row.operator(EST_OT_memory_report.bl_idname, icon='FILE_REFRESH')
+        tracing = MemoryAccounting.is_tracing()
+        row.operator(EST_OT_trace_memory.bl_idname, text='', icon='REC', depress=tracing)
+
+        if not (report := MemoryAccounting.last_report):
+            return
+        col = layout.column(align=True)
+        for stats in sorted(report.data, key=lambda s: s.points, reverse=True)[:8]:
+            col.label(text=f'{stats.name}: {len(stats.layers)} / {stats.strokes} / {stats.points}',
+                      icon='OUTLINER_DATA_GREASEPENCIL')
+        col = layout.column(align=True)
+        for name, size in sorted(report.sources.items(), key=lambda item: item[1], reverse=True):
+            row = col.row()
+            row.label(text=name)
+            row.label(text=format_bytes(size))
+        if report.traced:
+            col = layout.column(align=True)
+            for name, (calls, retained, peak) in sorted(report.traced.items(), key=lambda item: -item[1][1]):
+                row = col.row()
+                row.label(text=f'{name} ({calls})')
+                row.label(text=f'{format_bytes(retained)} / {format_bytes(peak)}')
+
+
+def register():
+    register_memory_sources()
+    bpy.utils.register_class(EST_OT_memory_report)
+    bpy.utils.register_class(EST_OT_trace_memory)
+    bpy.utils.register_class(EST_PT_memory)
+
+
+def unregister():
+    bpy.utils.unregister_class(EST_OT_memory_report)
+    bpy.utils.unregister_class(EST_OT_trace_memory)
+    bpy.utils.unregister_class(EST_PT_memory)
+    if MemoryAccounting.is_tracing():
+        MemoryAccounting.stop_tracing()
+    MemoryAccounting.sources.clear()
+    MemoryAccounting.last_report = None
@@ -1,10 +1,36 @@
 import bpy
-from typing import Optional
-from ..public_path import get_pref
+from typing import ClassVar, Optional
+from mathutils import Vector
+from ..model.model_note_index import NoteIndex, is_note
+from ..model.model_note_layout import NoteLayout, node_rects
+from ..public_path import get_pref, lazy_import
 from .functions import has_edit_tree, has_active_node
+from ..model.model_memory import MemoryAccounting
 
 NOTE_DATA_NAME: str = '.NodeNote'  # use . to hide the text data
 
+np = lazy_import('numpy')
+
+
+def ancestors(node: bpy.types.Node) -> list[bpy.types.Node]:
+    """The frames the node is in, the nearest first."""
+    parents = []
+    parent = node.parent
+    while parent:
+        parents.append(parent)
+        parent = parent.parent
+    return parents
+
+
+def set_absolute_location(node: bpy.types.Node, left: float, top: float):
+    """The location of a node in a frame is relative to the frame."""
+    location = Vector((left, top))
+    parent = node.parent
+    while parent:
+        location -= parent.location
+        parent = parent.parent
+    node.location = location
+
 
 # noinspection PyPep8Naming
 class EST_OT_add_note(bpy.types.Operator):
@@ -18,23 +44,43 @@ class EST_OT_add_note(bpy.types.Operator):
         return has_edit_tree(context)
 
     def execute(self, context):
-        title: str = get_pref().note.title
-        width: int = get_pref().note.width
-        height: int = get_pref().note.height
-        label_size: int = get_pref().note.label_size
-        node_tree: bpy.types.NodeTree = context.space_data.edit_tree
-        frame_node: bpy.types.Node = node_tree.nodes.new('NodeFrame')
-
-        frame_node.label = title
-        frame_node.label_size = label_size
-        frame_node.location = context.space_data.cursor_location
-        frame_node.width = width
-        frame_node.height = height
-        frame_node.shrink = False
-        text_data = bpy.data.texts.new(name=NOTE_DATA_NAME)
-        frame_node.text = text_data
-        self.move_node(frame_node)
-        return {'FINISHED'}
+        with MemoryAccounting.trace('notes'):
+            title: str = get_pref().note.title
+            width: int = get_pref().note.width
+            height: int = get_pref().note.height
+            label_size: int = get_pref().note.label_size
+            node_tree: bpy.types.NodeTree = context.space_data.edit_tree
+            frame_node: bpy.types.Node = node_tree.nodes.new('NodeFrame')
+
+            frame_node.label = title
+            frame_node.label_size = label_size
+            frame_node.location = context.space_data.cursor_location
+            frame_node.width = width
+            frame_node.height = height
+            frame_node.shrink = False
+            text_data = bpy.data.texts.new(name=NOTE_DATA_NAME)
+            frame_node.text = text_data
+            active_node = node_tree.nodes.active
+            if get_pref().note.auto_place and active_node and active_node != frame_node:
+                self.auto_place(node_tree, frame_node, active_node)
+            else:
+                self.move_node(frame_node)
+            return {'FINISHED'}
+
+    @staticmethod
+    def auto_place(node_tree: bpy.types.NodeTree, frame_node: bpy.types.Node, active_node: bpy.types.Node):
+        """Place the note next to the active node, in the free space nearest to it."""
+        nodes = node_tree.nodes
+        rects = node_rects(nodes)
+        index = {node.as_pointer(): i for i, node in enumerate(nodes)}
+        others = np.ones(len(nodes), dtype=bool)
+        others[index[frame_node.as_pointer()]] = False
+        # the frames of the active node contain it, the note would never be free of them
+        for parent in ancestors(active_node):
+            others[index[parent.as_pointer()]] = False
+        layout = NoteLayout(rects[others])
+        left, top = layout.place((frame_node.width, frame_node.height), rects[index[active_node.as_pointer()]])
+        frame_node.location = left, top
 
     @staticmethod
     def move_node(node: bpy.types.Node):
@@ -77,9 +123,109 @@ class EST_OT_edit_note(bpy.types.Operator):
         return {'FINISHED'}
 
 
+# noinspection PyPep8Naming
+class EST_OT_relayout_notes(bpy.types.Operator):
+    bl_idname = "est.relayout_notes"
+    bl_label = "Re-layout Notes"
+    bl_description = "Move the notes that cover the nodes or each other to the nearest free space"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    margin: bpy.props.IntProperty(name='Margin', default=20, min=0)
+
+    @classmethod
+    def poll(cls, context):
+        return has_edit_tree(context) and any(is_note(node) for node in context.space_data.edit_tree.nodes)
+
+    def execute(self, context):
+        with MemoryAccounting.trace('notes'):
+            nodes = context.space_data.edit_tree.nodes
+            rects = node_rects(nodes)
+            notes = np.array([is_note(node) for node in nodes], dtype=bool)
+            # the nodes inside a note move with it, they are not obstacles
+            in_note = np.array([bool(node.parent) and is_note(node.parent) for node in nodes], dtype=bool)
+
+            obstacles = ~notes & ~in_note
+            # index of a node in the obstacles of the layout
+            obstacle_index = {node.as_pointer(): i for i, node in
+                              enumerate(node for node, obstacle in zip(nodes, obstacles) if obstacle)}
+
+            layout = NoteLayout(rects[obstacles], margin=self.margin)
+            note_nodes = [node for node, note in zip(nodes, notes) if note]
+            # a frame that contains a note always overlaps it, and grows back over it if it shrinks to its children
+            ignore = [np.array([obstacle_index[parent.as_pointer()] for parent in ancestors(node)
+                                if parent.as_pointer() in obstacle_index], dtype=int) for node in note_nodes]
+            locations = layout.relayout(rects[notes], ignore)
+            moved = 0
+            for node, rect, (left, top) in zip(note_nodes, rects[notes], locations):
+                if (left, top) != (rect[0], rect[3]):
+                    set_absolute_location(node, left, top)
+                    moved += 1
+            self.report({'INFO'}, f'{moved}/{len(note_nodes)}')
+            return {'FINISHED'}
+
+
+# noinspection PyPep8Naming
+class EST_OT_search_notes(bpy.types.Operator):
+    bl_idname = "est.search_notes"
+    bl_label = "Search Notes"
+    bl_description = "Find the notes of all node trees by their text, search again to go to the next one"
+    bl_options = {'REGISTER'}
+
+    query: bpy.props.StringProperty(name='Search', options={'SKIP_SAVE'})
+
+    # (query, index) of the last hit, to cycle through the hits
+    last_hit: ClassVar[tuple[str, int]] = ('', -1)
+
+    @classmethod
+    def poll(cls, context):
+        return has_edit_tree(context)
+
+    def invoke(self, context, event):
+        NoteIndex.refresh()
+        self.query = self.last_hit[0]
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        with MemoryAccounting.trace('notes'):
+            hits = NoteIndex.search(self.query)
+            if not hits:
+                self.report({'WARNING'}, f'No note: {self.query}')
+                return {'CANCELLED'}
+
+            query, index = self.last_hit
+            index = (index + 1) % len(hits) if query == self.query else 0
+            EST_OT_search_notes.last_hit = (self.query, index)
+            node_tree, frame_name = hits[index]
+            if not self.view_note(context, node_tree, frame_name):
+                self.report({'WARNING'},
+                            f'{index + 1}/{len(hits)}: {node_tree.name} > {frame_name}, not in this editor')
+                return {'CANCELLED'}
+            self.report({'INFO'}, f'{index + 1}/{len(hits)}: {node_tree.name} > {frame_name}')
+            return {'FINISHED'}
+
+    @staticmethod
+    def view_note(context, node_tree: bpy.types.NodeTree, frame_name: str) -> bool:
+        """Open the node tree if needed, select the frame and frame the view on it."""
+        space = context.space_data
+        if node_tree != space.edit_tree:
+            # an embedded tree is opened from its material / world..., not from the editor
+            if node_tree.is_embedded_data or node_tree.bl_idname != space.tree_type:
+                return False
+            space.path.start(node_tree)
+        frame = node_tree.nodes[frame_name]
+        for node in node_tree.nodes:
+            node.select = False
+        frame.select = True
+        node_tree.nodes.active = frame
+        bpy.ops.node.view_selected()
+        return True
+
+
 def header_menu(self, context):
     layout = self.layout
     layout.operator(EST_OT_add_note.bl_idname, icon='TEXT')
+    layout.operator(EST_OT_relayout_notes.bl_idname, text='', icon='ALIGN_FLUSH')
+    layout.operator(EST_OT_search_notes.bl_idname, text='', icon='VIEWZOOM')
     # layout.operator(EST_OT_edit_note.bl_idname, icon='CURRENT_FILE')
 
 
@@ -88,6 +234,8 @@ def register():
 
     register_class(EST_OT_add_note)
     register_class(EST_OT_edit_note)
+    register_class(EST_OT_relayout_notes)
+    register_class(EST_OT_search_notes)
 
     bpy.types.NODE_HT_header.append(header_menu)
 
@@ -98,3 +246,6 @@ def unregister():
 
     unregister_class(EST_OT_add_note)
     unregister_class(EST_OT_edit_note)
+    unregister_class(EST_OT_relayout_notes)
+    unregister_class(EST_OT_search_notes)
+    NoteIndex.clear()
@@ -1,6 +1,8 @@
 import bpy
 from .functions import get_edit_tree_gp_data, has_edit_tree, is_workspace_tool_edit
-from .op_palette_viewer import EST_PT_palette_viewer_active
+from .op_palette_viewer import EST_PT_palette_viewer_active, EST_OT_recolor_gp
+from ..model.model_color_space import ColorSpace
+from ..model.model_gp_anchor import GPencilNodeAnchor
 from bpy.app.translations import pgettext_iface as _p
 
 
@@ -37,6 +39,17 @@ class EST_PT_active_layer(bpy.types.Panel):
         row.popover(panel=EST_PT_palette_viewer_active.bl_idname, text="Preset", icon='COLOR')
         col.prop(layer, "thickness", text="Thickness")
         col.prop(layer, "annotation_opacity", text="Opacity", slider=True)
+        # recolor all the notes with the active color to the palette color
+        op = layout.operator(EST_OT_recolor_gp.bl_idname, icon='BRUSHES_ALL')
+        op.src_hex = ColorSpace.rgb_2_hex(layer.color)
+        op.hex = ColorSpace.rgb_2_hex(context.scene.est_palette_color)
+        # node anchor
+        row = layout.row(align=True)
+        if node_name := GPencilNodeAnchor.anchored_node(gp_data, layer):
+            row.label(text=_p('Attached to') + ' : ' + node_name, icon='PINNED')
+            row.operator('est.detach_gp_from_node', text='', icon='X')
+        else:
+            row.operator('est.attach_gp_to_node', icon='PINNED')
 
 
 def register():
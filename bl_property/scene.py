@@ -16,9 +16,10 @@ def poll_gp_data(context) -> bpy.types.GreasePencil | None:
 def update_selected_layers_color(self, context):
     if not (gp_data := poll_gp_data(context)): return
 
+    layers = [layer for layer in SelectedGPLayersRuntime.selected_layers() if layer in gp_data.layers]
+    if not layers: return
     with BuildGreasePencilData(gp_data) as gp_data_builder:
-        for layer_name in SelectedGPLayersRuntime.selected_layers():
-            gp_data_builder.color(layer_name, self.est_palette_color)
+        gp_data_builder.color_layers(layers, self.est_palette_color)
 
 
 def update_selected_layers_thickness(self, context):
@@ -37,8 +38,7 @@ def update_selected_layers_opacity(self, context):
 
 
 def register():
-    ColorPaletteModel.register_color_icon()
-
+    # the palette previews are loaded on the first draw, see ColorPaletteModel.get_color_icon_id
     bpy.types.Scene.est_palette_color = FloatVectorProperty(name="Color", size=3, subtype='COLOR_GAMMA', min=0.0,
                                                             max=1.0,
                                                             default=(0.8, 0.8, 0.8),
@@ -1,6 +1,13 @@
 import bpy
 from bpy.types import WindowManager as wm
-from bpy.props import IntProperty, FloatVectorProperty,IntVectorProperty,StringProperty
+from bpy.props import IntProperty, FloatVectorProperty,IntVectorProperty,StringProperty, BoolProperty, EnumProperty
+
+from ..model.data_enums import InspectMetric
+
+
+def redraw_area(self, context):
+    if context.area:
+        context.area.tag_redraw()
 
 
 
@@ -9,10 +16,15 @@ def register():
     wm.est_gp_scale = FloatVectorProperty(name='Scale Vector', size=2, default=(1.1, 1.1))
     wm.est_gp_rotate_angle = IntProperty(name='Rotate Angle', default=30)
     wm.est_gp_icon_filter = StringProperty(name="Icon", default="")
+    wm.est_gp_inspect = BoolProperty(name='Inspector', default=False, update=redraw_area,
+                                     description='Tint the notes by their cost, to find the ones that slow down the editor')
+    wm.est_gp_inspect_metric = EnumProperty(name='Metric', items=InspectMetric.enum_items(), update=redraw_area)
 
 def unregister():
     del wm.est_gp_move_vector
     del wm.est_gp_scale
     del wm.est_gp_rotate_angle
     del wm.est_gp_icon_filter
+    del wm.est_gp_inspect
+    del wm.est_gp_inspect_metric
 
@@ -32,7 +32,8 @@ class TranslationHelper():
             pass
 
 
-def register():
+def register_translations():
+    """Import the language files and register them, run once after the add-on is loaded."""
     languages_dir = Path(__file__).parent
 
     for filename in os.listdir(languages_dir):
@@ -53,7 +54,15 @@ def register():
         h.register()
 
 
+def register():
+    # defer the language files out of the startup, the timer runs once the event loop starts
+    # (never in background mode, where the ui is not translated anyway)
+    bpy.app.timers.register(register_translations, first_interval=0, persistent=True)
+
+
 def unregister():
+    if bpy.app.timers.is_registered(register_translations):
+        bpy.app.timers.unregister(register_translations)
     for h in helpers:
         h.unregister()
     helpers.clear()
@@ -36,4 +36,43 @@ data = {
     'Horizontal Flip': '水平翻转',
     'Vertical Flip': '垂直翻转',
     'Drag Select: Only all selected layers are considered selected': '拖动选择：只有选定所有角落图层才被视为选定',
+    'Simplify Tolerance': '简化容差',
+    'Drag Proxy Above Points': '拖动代理点数阈值',
+    'Recolor Notes': '重新着色注释',
+    'Batch Edit All Notes': '批量编辑所有注释',
+    'Grease Pencil Data Processed': '蜡笔数据已处理',
+    'Export Notes': '导出注释',
+    'Import Notes': '导入注释',
+    'Selected Only': '仅选中项',
+    'Templates': '模板',
+    'Save as Template': '保存为模板',
+    'Remove Template': '移除模板',
+    'Place Template': '放置模板',
+    'Pick Shape': '拾取形状',
+    'Bounding Box': '边界框',
+    'Convex Hull': '凸包',
+    'Tight Fit': '紧密贴合',
+    'Snap When Moving / Scaling': '移动 / 缩放时吸附',
+    'Snap Distance': '吸附距离',
+    'Snap Grid Size': '吸附网格大小',
+    'Attach to Active Node': '附着到活动节点',
+    'Detach from Node': '从节点分离',
+    'Attached to': '附着于',
+    'Auto Place': '自动放置',
+    'Re-layout Notes': '重新排布注释',
+    'Search Notes': '搜索注释',
+    'Transform Without Editing Points': '变换时不编辑点',
+    'Record Events': '录制事件',
+    'Save Event Record': '保存事件录制',
+    'Memory Report': '内存报告',
+    'Trace Memory': '追踪内存',
+    'Memory': '内存',
+    'Inspector': '检查器',
+    'Metric': '指标',
+    'Points': '点',
+    'Strokes': '笔画',
+    'Frames': '帧',
+    'Select Heavy Notes': '选择繁重注释',
+    'Simplify Heaviest Notes': '简化最繁重注释',
+    'Draw Budget (ms)': '绘制预算 (毫秒)',
 }
@@ -131,6 +131,14 @@ class EST_MT_tool_context_menu(bpy.types.Menu):
         EST_MT_distribution_menu.draw_layout(self, context, layout)
         layout.separator()
 
+        layout.operator('est.attach_gp_to_node', icon='PINNED')
+        layout.operator('est.detach_gp_from_node', icon='UNPINNED')
+        layout.separator()
+
+        layout.operator('est.import_gp', icon='IMPORT')
+        layout.operator('est.export_gp', icon='EXPORT')
+        layout.operator('est.batch_gp', icon='FILE_BLEND')
+
 
 class EST_PT_gp_op_menu(bpy.types.Menu):
     bl_idname = "EST_PT_gp_op_menu"
@@ -221,6 +229,14 @@ class EST_TL_gp_edit(bpy.types.WorkSpaceTool):
         col.prop(scene, "est_gp_opacity", slider=True)
         col.prop(scene, "est_gp_thickness", slider=True)
 
+        wm = bpy.context.window_manager
+        box = layout.box()
+        box.prop(wm, 'est_gp_inspect', icon='VIEWZOOM')
+        if wm.est_gp_inspect:
+            box.row().prop(wm, 'est_gp_inspect_metric', expand=True)
+            col = box.column(align=True)
+            col.operator('est.select_heavy_gp', icon='RESTRICT_SELECT_OFF')
+            col.operator('est.simplify_heavy_gp', icon='MOD_DECIM')
 
 
 def reigster():
@@ -56,6 +56,13 @@ class DistributionMode(BL_Enum):
     VERTICAL: str = 'Vertical'
 
 
+class InspectMetric(BL_Enum):
+    """The cost of a layer shown by the inspector, see GPencilLayerCost"""
+    POINTS: str = 'Points'
+    STROKES: str = 'Strokes'
+    FRAMES: str = 'Frames'
+
+
 class SocketColor(Enum):
     GREY: Final[str] = '#A1A1A1'  # float color
     ORANGE: Final[str] = '#ED9E5C'  # object color
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Callable, ClassVar, Literal, Optional
+
+import bpy
+
+from .model_gp_property import frame_storage
+
+CacheScope = Literal['DATA', 'FILE']
+# layer fingerprint: frames count, points count, checksum of the sampled points
+LayerFingerprint = tuple[int, int, int]
+
+
+@dataclass(frozen=True, slots=True)
+class RegisteredCache:
+    """A cache of the add-on, see CacheBus.register
+    clear: drop every entry
+    invalidate_layer: drop the entries of one layer, the cache is then revalidated by the layer fingerprints,
+    None if the cache does not depend on the points (it is cleared on undo instead)
+    scope: DATA caches point to the blend data and are checked on undo, FILE caches only on loading a file
+    """
+    clear: Callable[[], None]
+    invalidate_layer: Optional[Callable[[bpy.types.GPencilLayer], None]] = None
+    scope: CacheScope = 'DATA'
+
+
+class CacheBus:
+    """One place to invalidate the caches keyed by the pointers of the blend data.
+    An undo / redo may free the grease pencil data or read it again at another address,
+    so the caches would keep pointers to freed data. The handlers call:
+    load_post: clear every cache
+    undo_pre / redo_pre: take the fingerprints of the state the caches were built on
+    undo_post / redo_post: clear the small caches, revalidate the caches of the points by the layer fingerprints
+    depsgraph_update_post: mark the grease pencil data that changed (edits of the other tools), a timer revalidates
+    them once the updates stop, the modal operators of the add-on send one update per step and invalidate
+    their layers themselves
+    A layer whose fingerprint did not change keeps its entries. When the layers or the data themselves changed,
+    the old pointers can't be mapped to the layers anymore and the caches of the points are cleared.
+    usage:
+    >>> CacheBus.register('bbox', CalcBBox.clear_cache, invalidate_layer=CalcBBox.invalidate)
+    >>> CacheBus.before_undo()
+    >>> CacheBus.on_undo()
+    """
+    # strokes sampled per frame for the checksum, the first and last point of each
+    sample_strokes: ClassVar[int] = 64
+    caches: ClassVar[dict[str, RegisteredCache]] = {}
+    # grease pencil pointer: {layer pointer: fingerprint}
+    fingerprints: ClassVar[dict[int, dict[int, LayerFingerprint]]] = {}
+    # names of the grease pencil data updated since the last revalidation, the time of the last update
+    marked: ClassVar[set[str]] = set()
+    marked_time: ClassVar[float] = 0
+
+    @classmethod
+    def register(cls, name: str, clear: Callable[[], None],
+                 invalidate_layer: Optional[Callable[[bpy.types.GPencilLayer], None]] = None,
+                 scope: CacheScope = 'DATA') -> None:
+        cls.caches[name] = RegisteredCache(clear, invalidate_layer, scope)
+
+    @classmethod
+    def unregister(cls, name: str) -> None:
+        cls.caches.pop(name, None)
+
+    @classmethod
+    def layer_fingerprint(cls, layer: bpy.types.GPencilLayer) -> LayerFingerprint:
+        """Cheap content fingerprint, a move of the sampled strokes or a change of the points count changes it."""
+        count, checksum = 0, 0
+        for frame in layer.frames:
+            storage = frame_storage(frame)
+            count += storage.point_count(frame)
+            checksum = zlib.crc32(storage.sample(frame, cls.sample_strokes).tobytes(), checksum)
+        return len(layer.frames), count, checksum
+
+    @classmethod
+    def data_fingerprint(cls, gp_data: bpy.types.GreasePencil) -> dict[int, LayerFingerprint]:
+        return {layer.as_pointer(): cls.layer_fingerprint(layer) for layer in gp_data.layers}
+
+    @classmethod
+    def clear(cls, scopes: tuple[CacheScope, ...] = ('DATA', 'FILE'), points: Optional[bool] = None) -> None:
+        """:param points: True for the caches of the points only, False for the other ones, None for all"""
+        for cache in cls.caches.values():
+            if cache.scope in scopes and (points is None or points == bool(cache.invalidate_layer)):
+                cache.clear()
+
+    @classmethod
+    def invalidate_layer(cls, layer: bpy.types.GPencilLayer) -> None:
+        for cache in cls.caches.values():
+            if cache.invalidate_layer:
+                cache.invalidate_layer(layer)
+
+    @classmethod
+    def revalidate(cls, gp_data: bpy.types.GreasePencil) -> int:
+        """Invalidate the layers of the data whose fingerprint changed.
+        :return: the number of layers invalidated, -1 if the caches of the points are cleared"""
+        layers = {layer.as_pointer(): layer for layer in gp_data.layers}
+        fingerprints = {key: cls.layer_fingerprint(layer) for key, layer in layers.items()}
+        known = cls.fingerprints.get(gp_data.as_pointer())
+        cls.fingerprints[gp_data.as_pointer()] = fingerprints
+        if known is None:
+            return 0
+        if known.keys() != fingerprints.keys():
+            cls.clear(scopes=('DATA',), points=True)
+            return -1
+        changed = [key for key, fingerprint in fingerprints.items() if known[key] != fingerprint]
+        for key in changed:
+            cls.invalidate_layer(layers[key])
+        return len(changed)
+
+    @classmethod
+    def mark(cls, gp_data: bpy.types.GreasePencil) -> None:
+        cls.marked.add(gp_data.name)
+        cls.marked_time = time.perf_counter()
+
+    @classmethod
+    def revalidate_marked(cls, delay: float = 0) -> Optional[float]:
+        """Revalidate the marked data once no update came for the delay.
+        :return: the time left to wait, None when revalidated (a timer function)"""
+        if (wait := cls.marked_time + delay - time.perf_counter()) > 0:
+            return wait
+        for name in cls.marked:
+            if gp_data := bpy.data.grease_pencils.get(name):
+                cls.revalidate(gp_data)
+        cls.marked.clear()
+        return None
+
+    @classmethod
+    def watch_all(cls) -> None:
+        """Take the fingerprints of every grease pencil data, the state the next undo is compared to."""
+        cls.fingerprints = {gp_data.as_pointer(): cls.data_fingerprint(gp_data) for gp_data in bpy.data.grease_pencils}
+
+    @classmethod
+    def before_undo(cls) -> None:
+        """The edits since the last fingerprints (operators, other tools) are compared against the state
+        just before the undo, not the one of the last undo / load."""
+        cls.revalidate_marked()
+        cls.watch_all()
+
+    @classmethod
+    def on_undo(cls) -> None:
+        cls.clear(scopes=('DATA',), points=False)
+        current = {gp_data.as_pointer(): gp_data for gp_data in bpy.data.grease_pencils}
+        if current.keys() != cls.fingerprints.keys():
+            # data added / removed / read again at another address
+            cls.clear(scopes=('DATA',), points=True)
+            cls.watch_all()
+            return
+        for gp_data in current.values():
+            cls.revalidate(gp_data)
+
+    @classmethod
+    def on_load(cls) -> None:
+        cls.marked.clear()
+        cls.clear()
+        cls.watch_all()
@@ -4,8 +4,9 @@ from dataclasses import dataclass, field
 
 from .data_enums import SocketColor, custom_colors
 from .utils import ColorTool
+from .model_color_space import ColorLUT
 from pathlib import Path
-from ..public_path import get_color_palettes_directory
+from ..public_path import get_color_palettes_directory, get_color_palettes
 
 
 @dataclass
@@ -16,6 +17,17 @@ class ColorPaletteModel:
     paths: ClassVar[list[Path]] = []
     pv_coll: ClassVar[dict] = {}
     icon_id: ClassVar[dict[str, int]] = {}
+    _lut: ClassVar[ColorLUT | None] = None
+
+    @classmethod
+    def lut(cls) -> ColorLUT:
+        """Lookup table of all the palette hex values, built once."""
+        if cls._lut is None:
+            hex_colors = [color.value for color in SocketColor] + custom_colors
+            for color_list in get_color_palettes().values():
+                hex_colors.extend(color_list)
+            cls._lut = ColorLUT(hex_colors)
+        return cls._lut
 
     @classmethod
     def ensure_palette_images(cls, create: bool = False):
@@ -57,12 +69,15 @@ class ColorPaletteModel:
 
     @classmethod
     def get_color_icon_id(cls, color: str) -> int:
+        """Return the icon id of the color, the previews are loaded on the first call."""
+        if not cls.pv_coll:
+            cls.register_color_icon()
         icon_id = cls.icon_id.get(color)
         return icon_id if icon_id else cls.icon_id.get(SocketColor.GREY.value)
 
     @classmethod
     def register_color_icon(cls):
-        if bpy.app.background: return
+        if bpy.app.background or cls.pv_coll: return
 
         cls.ensure_palette_images()
 
@@ -86,3 +101,4 @@ class ColorPaletteModel:
         for pcoll in cls.pv_coll.values():
             previews.remove(pcoll)
         cls.pv_coll.clear()
+        cls.icon_id.clear()
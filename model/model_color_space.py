@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Sequence, Iterable
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
+
+
+class ColorSpace:
+    """Vectorized color conversion, every function accepts a scalar or an array of any shape."""
+
+    @staticmethod
+    def srgb_2_linear(c: float | Sequence | np.ndarray, gamma: float = 2.4) -> np.ndarray:
+        c = np.clip(np.asarray(c, dtype=np.float64), 0, None)
+        return np.where(c < 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** gamma)
+
+    @staticmethod
+    def linear_2_srgb(c: float | Sequence | np.ndarray, gamma: float = 2.4) -> np.ndarray:
+        c = np.clip(np.asarray(c, dtype=np.float64), 0, None)
+        return np.where(c < 0.0031308, c * 12.92, 1.055 * c ** (1.0 / gamma) - 0.055)
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def hex_2_rgb(hex_color: str) -> tuple[float, float, float]:
+        """Convert hex color to rgb color, memoized since the palette hex values are parsed on every click."""
+        hex_str = hex_color[1:] if hex_color.startswith('#') else hex_color
+        return tuple(int(hex_str[i:i + 2], 16) / 255 for i in (0, 2, 4))
+
+    @staticmethod
+    def hex_2_rgb_array(hex_colors: Iterable[str]) -> np.ndarray:
+        """Convert hex colors to a Nx3 rgb array."""
+        return np.array([ColorSpace.hex_2_rgb(h) for h in hex_colors], dtype=np.float32).reshape(-1, 3)
+
+    @staticmethod
+    def rgb_2_hex(rgb: Sequence[float]) -> str:
+        return '#' + ''.join(f'{round(float(c) * 255):02X}' for c in np.clip(rgb[:3], 0, 1))
+
+    @staticmethod
+    def match(colors: np.ndarray, color: Sequence[float], tolerance: float = 1 / 255) -> np.ndarray:
+        """Return a bool mask of the colors (Nx3) that equal to the color within the tolerance per channel."""
+        return np.all(np.abs(colors - np.asarray(color[:3], dtype=colors.dtype)) <= tolerance, axis=1)
+
+
+class ColorLUT:
+    """Precomputed lookup table of hex colors: srgb and linear rgb rows in the same order."""
+
+    def __init__(self, hex_colors: Iterable[str]):
+        self.hex_colors: list[str] = list(dict.fromkeys(h.upper() for h in hex_colors))
+        self.index: dict[str, int] = {h: i for i, h in enumerate(self.hex_colors)}
+        self.srgb: np.ndarray = ColorSpace.hex_2_rgb_array(self.hex_colors)
+        self.linear: np.ndarray = ColorSpace.srgb_2_linear(self.srgb).astype(np.float32)
+
+    def __contains__(self, hex_color: str) -> bool:
+        return hex_color.upper() in self.index
+
+    def get_srgb(self, hex_color: str) -> np.ndarray:
+        if (i := self.index.get(hex_color.upper())) is not None:
+            return self.srgb[i]
+        return np.array(ColorSpace.hex_2_rgb(hex_color), dtype=np.float32)
+
+    def get_linear(self, hex_color: str) -> np.ndarray:
+        if (i := self.index.get(hex_color.upper())) is not None:
+            return self.linear[i]
+        return ColorSpace.srgb_2_linear(ColorSpace.hex_2_rgb(hex_color)).astype(np.float32)
+
+    def nearest(self, color: Sequence[float]) -> str:
+        """Return the hex of the nearest color in the table."""
+        dist = np.sum((self.srgb - np.asarray(color[:3], dtype=np.float32)) ** 2, axis=1)
+        return self.hex_colors[int(np.argmin(dist))]
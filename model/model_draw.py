@@ -1,13 +1,16 @@
+from __future__ import annotations
+
 from dataclasses import dataclass, field
 from mathutils import Vector, Color
 import bpy
 from typing import Optional, ClassVar, Literal, Sequence
 from pathlib import Path
 import bmesh
-import numpy as np
 
 from ..view_model.view_model_mouse import MouseDragState
-from ..public_path import get_pref
+from ..public_path import get_pref_snapshot, lazy_import
+
+np = lazy_import('numpy')
 
 
 @dataclass(slots=True)
@@ -20,6 +23,7 @@ class DrawPreference:
     debug: bool = field(init=False)
     drag: bool = field(init=False)
     drag_area: bool = field(init=False)
+    draw_budget_ms: float = field(init=False)
     # color
     color: Color = field(init=False)
     color_hover: Color = field(init=False)
@@ -42,15 +46,17 @@ class DrawPreference:
         self.lazy_update = False
 
         theme = bpy.context.preferences.themes['Default'].view_3d
-        self.line_width = get_pref().gp_draw.line_width
-        self.drag = get_pref().gp_draw.drag
-        self.drag_area = get_pref().gp_draw.drag_area
-        self.debug = get_pref().debug
+        pref = get_pref_snapshot()
+        self.line_width = pref.line_width
+        self.drag = pref.drag
+        self.drag_area = pref.drag_area
+        self.draw_budget_ms = pref.draw_budget_ms
+        self.debug = pref.debug
 
         scale_factor = 0.75  # scale factor for the points, make it smaller
-        self.corner_px = get_pref().gp_performance.detect_corner_px * scale_factor
-        self.edge_px = get_pref().gp_performance.detect_edge_px * scale_factor
-        self.rotate_px = get_pref().gp_performance.detect_rotate_px * scale_factor
+        self.corner_px = pref.detect_corner_px * scale_factor
+        self.edge_px = pref.detect_edge_px * scale_factor
+        self.rotate_px = pref.detect_rotate_px * scale_factor
 
         self.color = self.color_alpha(theme.lastsel_point, 0.3)
         self.color_highlight = self.color_alpha(theme.lastsel_point, 0.8)
@@ -71,6 +77,8 @@ class DrawData:
     delta_degree: Optional[float] = None
     delta_scale: Optional[Vector] = None
     delta_move: Optional[Vector] = None
+    # snap guides x / y, v2d
+    snap_guides: tuple[Optional[float], Optional[float]] = (None, None)
 
     @property
     def coords(self) -> list[Vector]:
@@ -1,38 +1,140 @@
+from __future__ import annotations
+
+from math import radians
+
 import bpy
-import numpy as np
 from mathutils import Vector, Euler, Color
-from typing import Literal, Optional, Union, ClassVar
+from typing import Literal, Optional, Union, ClassVar, Callable
 from dataclasses import dataclass, field
 from .utils import VecTool
 from .data_enums import ShootAngles
 from .model_gp_edit import EditGreasePencilLayer
-from .model_gp_property import GreasePencilProperty, GPencilStroke
+from .model_gp_property import GreasePencilProperty, GPencilStroke, GPencilFrameScope, FrameScopeMode
 from .model_gp_bbox import GPencilLayerBBox
+from .model_gp_simplify import SimplifyGreasePencilStroke, GPencilLayerLOD
+from .model_gp_transform import GPencilLayerTransform, affine_translation, affine_rotation, affine_scale
+from .model_color_space import ColorSpace
+from ..public_path import get_pref_snapshot, lazy_import
+
+np = lazy_import('numpy')
 
 
 class GreasePencilCache:
-    """Grease Pencil Cache, cache the grease pencil objects."""
-    # cache the grease pencil objects
+    """Grease Pencil Cache, a scoped and reference counted manager for the temporary data-blocks.
+    Every `with` statement of a builder opens a scope, the data-blocks registered by `del_later` inside the scope
+    are released when the scope exits. A data-block registered by several scopes is only removed when the last
+    scope releases it, and everything releasable is removed in one `bpy.data.batch_remove` call.
+    Data-blocks registered outside any scope go to the root scope, which is released when the outermost scope exits.
+    """
+    # scope stack, the first one is the root scope, it holds the pointers of the registered data-blocks
     # this is a class variable, so it will be shared among all instances / subclasses instances
-    tmp_objs: ClassVar[list[bpy.types.Object]] = []
+    _scopes: ClassVar[list[list[int]]] = [[]]
+    # pointer: [data-block, reference count, remove the data only if it is orphan]
+    _refs: ClassVar[dict[int, list]] = {}
+
+    @classmethod
+    def open_scope(cls):
+        """Open a nested scope, the data-blocks registered from now on belong to it."""
+        cls._scopes.append([])
+
+    @classmethod
+    def close_scope(cls):
+        """Close the innermost scope and release its data-blocks.
+        If it is the outermost scope, the root scope will be released too."""
+        if len(cls._scopes) > 1:
+            pointers = cls._scopes.pop()
+        else:
+            pointers = []
+        if len(cls._scopes) == 1:
+            pointers += cls._scopes[0]
+            cls._scopes[0] = []
+        cls._release(pointers)
 
     @classmethod
     def cleanup(cls):
-        """Remove the cache."""
-        for obj in cls.tmp_objs:
-            try:
-                bpy.data.objects.remove(obj)
-            except (ReferenceError, RuntimeError):
-                pass
-        cls.tmp_objs.clear()
+        """Release the data-blocks of the innermost scope, the scope itself stays open."""
+        pointers = cls._scopes[-1]
+        cls._scopes[-1] = []
+        cls._release(pointers)
+
+    @classmethod
+    def del_later(cls, obj: Optional[bpy.types.Object] = None, obj_list: Optional[list[bpy.types.Object]] = None,
+                  data: Optional[bpy.types.ID] = None, data_list: Optional[list[bpy.types.ID]] = None):
+        """Delete the grease pencil object later.
+        :param obj: object to remove
+        :param obj_list: objects to remove
+        :param data: mesh / curve / grease pencil data created along the way, it is only removed if it becomes orphan
+        :param data_list: same as data"""
+        for o in ([obj] if obj else []) + (obj_list or []):
+            cls._retain(o, orphan_only=False)
+        for d in ([data] if data else []) + (data_list or []):
+            cls._retain(d, orphan_only=True)
+
+    @classmethod
+    def pending_count(cls) -> int:
+        """Return the number of data-blocks waiting to be removed."""
+        return len(cls._refs)
+
+    @classmethod
+    def _retain(cls, id_data: bpy.types.ID, orphan_only: bool):
+        try:
+            pointer = id_data.as_pointer()
+        except ReferenceError:
+            return
+        if pointer in cls._refs:
+            cls._refs[pointer][1] += 1
+        else:
+            cls._refs[pointer] = [id_data, 1, orphan_only]
+        cls._scopes[-1].append(pointer)
 
     @classmethod
-    def del_later(cls, obj: Optional[bpy.types.Object] = None, obj_list: Optional[list[bpy.types.Object]] = None):
-        """Delete the grease pencil object later."""
-        if obj:
-            cls.tmp_objs.append(obj)
-        if obj_list:
-            cls.tmp_objs.extend(obj_list)
+    def _release(cls, pointers: list[int]):
+        to_free: list[bpy.types.ID] = []
+        data_free: list[tuple[bpy.types.ID, bool]] = []
+        for pointer in pointers:
+            if not (ref := cls._refs.get(pointer)):
+                continue
+            ref[1] -= 1
+            if ref[1] > 0:  # still needed by another scope
+                continue
+            cls._refs.pop(pointer)
+            if cls._is_valid(ref[0]):
+                data_free.append((ref[0], ref[2]))
+
+        objs = [id_data for id_data, orphan_only in data_free if not orphan_only]
+        to_free.extend(objs)
+        for id_data, orphan_only in data_free:
+            if not orphan_only:
+                continue
+            # the objects removed in the same batch do not count as users
+            users = id_data.users - sum(1 for obj in objs if obj.data == id_data)
+            if users <= 0 and not id_data.use_fake_user:
+                to_free.append(id_data)
+
+        if not to_free:
+            return
+        try:
+            bpy.data.batch_remove(to_free)
+        except (ReferenceError, RuntimeError):
+            for id_data in to_free:
+                try:
+                    bpy.data.batch_remove([id_data])
+                except (ReferenceError, RuntimeError):
+                    pass
+
+        if get_pref_snapshot().debug:
+            # released by the cache but still valid: used elsewhere, or the remove failed
+            kept = sum(1 for id_data, _ in data_free if cls._is_valid(id_data))
+            print(f'GreasePencilCache: freed {len(to_free)} data-blocks, {kept} kept, '
+                  f'{cls.pending_count()} pending')
+
+    @staticmethod
+    def _is_valid(id_data: bpy.types.ID) -> bool:
+        try:
+            _ = id_data.name
+            return True
+        except ReferenceError:
+            return False
 
 
 class CreateGreasePencilData(GreasePencilCache):
@@ -90,7 +192,7 @@ class CreateGreasePencilData(GreasePencilCache):
         obj.data.vertices[1].co = Vector((p2[0], p1[1], 0))
         obj.data.vertices[2].co = Vector((p1[0], p2[1], 0))
         obj.data.vertices[3].co = p2.to_3d()
-        CreateGreasePencilData.del_later(obj)
+        CreateGreasePencilData.del_later(obj, data=obj.data)
         return CreateGreasePencilData.from_mesh_obj(obj)
 
     @staticmethod
@@ -102,7 +204,7 @@ class CreateGreasePencilData(GreasePencilCache):
                                           scale=(1, 1, 1))
         obj = bpy.context.object
         obj.name = 'Circle'
-        CreateGreasePencilData.del_later(obj)
+        CreateGreasePencilData.del_later(obj, data=obj.data)
         return CreateGreasePencilData.from_mesh_obj(obj)
 
     # @staticmethod
@@ -129,6 +231,7 @@ class CreateGreasePencilData(GreasePencilCache):
         text_data.body = text
         text_data.size = size
         text_data.font = bpy.data.fonts[font]
+        CreateGreasePencilData.del_later(data=text_data)  # the curve is orphan after converting
 
         bpy.ops.object.select_all(action='DESELECT')
         obj.select_set(True)
@@ -165,6 +268,7 @@ class CreateGreasePencilData(GreasePencilCache):
         """
         new_obj = obj.copy()
         new_obj.data = obj.data.copy()
+        CreateGreasePencilData.del_later(data=new_obj.data)  # the mesh copy is orphan after converting
         bpy.context.collection.objects.link(new_obj)
         new_obj.scale = (size, size, size)
         bpy.context.view_layer.objects.active = new_obj
@@ -211,7 +315,7 @@ class CreateGreasePencilData(GreasePencilCache):
 @dataclass
 class BuildGreasePencilData(GreasePencilCache, GreasePencilProperty):
     """Grease Pencil Data Builder, easy to manipulate grease pencil data.
-    using with statement will automatically clean up the cache.else you need to call cleanup() manually.
+    using with statement will automatically clean up the cache of its scope.else you need to call cleanup() manually.
     usage:
     with GreasePencilDataBuilder(gp_data) as gp_builder:
         gp_builder.color('Layer', '#FF0000') \
@@ -220,15 +324,20 @@ class BuildGreasePencilData(GreasePencilCache, GreasePencilProperty):
         .rotate('Layer', 90, Vector((0, 0, 0)))
 
     """
-    edit_layer: EditGreasePencilLayer = EditGreasePencilLayer()
+    edit_layer: EditGreasePencilLayer = field(default_factory=EditGreasePencilLayer)
+    # layer name: (frame number, points), the active frame points before the deferred edit
+    deferred_points: dict[str, tuple[int, np.ndarray]] = field(default_factory=dict)
+    # coarse proxy of dense layers for interactive edits
+    lod: GPencilLayerLOD = field(default_factory=GPencilLayerLOD)
 
     def __enter__(self):
-        """allow to use with statement"""
+        """allow to use with statement, open a cache scope"""
+        self.open_scope()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """allow to use with statement"""
-        self.cleanup()  # remove cache
+        self.close_scope()  # remove cache of this scope
 
     def is_2d(self):
         return self.edit_layer.is_in_2d(self.active_layer)
@@ -245,6 +354,104 @@ class BuildGreasePencilData(GreasePencilCache, GreasePencilProperty):
             self.edit_layer.display_in_3d(layer)
         return self
 
+    def set_frame_scope(self, mode: FrameScopeMode, frame_range: tuple[int, int] = (0, 0)) -> 'BuildGreasePencilData':
+        """Set the frames that the edit will apply to: active frame only, all frames, or a range of frame numbers."""
+        self.edit_layer.frame_scope = GPencilFrameScope(mode, frame_range)
+        return self
+
+    def defer_other_frames(self, layers: list[str | int]) -> 'BuildGreasePencilData':
+        """Only edit the active frame of the layers from now on, the other frames follow in commit_other_frames.
+        So that an interactive edit of animated annotations doesn't pay for every frame on each event.
+        The transforms of the layers are recorded, the other frames get the same matrix."""
+        self.deferred_points.clear()
+        self.edit_layer.recorded.clear()
+        for layer_name_or_index in layers:
+            try:
+                layer = self._get_layer(layer_name_or_index)
+            except (ValueError, IndexError):
+                continue
+            if len(layer.frames) < 2: continue
+            frame = layer.active_frame or layer.frames[0]
+            self.deferred_points[layer.info] = (frame.frame_number, self.edit_layer.get_frame_points(frame))
+            self.edit_layer.start_recording(layer)
+        if self.deferred_points:
+            self.set_frame_scope('ACTIVE')
+        return self
+
+    def commit_other_frames(self) -> 'BuildGreasePencilData':
+        """Apply the transform of the deferred active frames to the other frames, in one pass per frame.
+        The recorded matrix of the layer is used, the transform is fitted on the points of the active frame
+        only if the points were set directly."""
+        recorded, self.edit_layer.recorded = self.edit_layer.recorded, {}
+        for layer_name, (frame_number, src_points) in self.deferred_points.items():
+            if not (layer := self.gp_data.layers.get(layer_name)): continue
+            frame = next((f for f in layer.frames if f.frame_number == frame_number), None)
+            if frame is None: continue
+            if (matrix := recorded.get(layer_name)) is None:
+                dst_points = self.edit_layer.get_frame_points(frame)
+                if len(dst_points) != len(src_points): continue  # strokes changed, can not match the points
+                matrix = self.edit_layer.fit_affine(src_points, dst_points)
+            self.edit_layer.affine_layer(layer, matrix, frames=[f for f in layer.frames if f != frame])
+        if self.deferred_points:
+            self.deferred_points.clear()
+            self.set_frame_scope('ALL')
+        return self
+
+    def simplify(self, layer_name_or_index: str | int, tolerance_px: float) -> 'BuildGreasePencilData':
+        """Simplify the strokes of the layer with Ramer–Douglas–Peucker.
+        :param tolerance_px: max deviation in pixels of the node editor view, 0 to skip"""
+        if tolerance_px <= 0: return self
+        layer = self._get_layer(layer_name_or_index)
+        epsilon = VecTool.v2d_2_loc3d(tolerance_px)
+        for frame in self.edit_layer.frame_scope.frames(layer):
+            for stroke in list(frame.strokes):  # the simplified strokes are rebuilt at the end of the frame
+                SimplifyGreasePencilStroke.simplify_stroke(frame, stroke, epsilon)
+        return self
+
+    def simplify_active(self, tolerance_px: float) -> 'BuildGreasePencilData':
+        """Simplify the active grease pencil layer."""
+        return self.simplify(self.active_layer_index, tolerance_px)
+
+    def begin_proxy(self, layers: list[str | int], max_points: int,
+                    tolerance_px: float = 1.0) -> 'BuildGreasePencilData':
+        """Replace the dense layers with a coarse copy, so interactive transforms only handle a few points.
+        Call commit_proxy to get the full resolution back with the same transform.
+        :param layers: the layers to transform
+        :param max_points: layers with more points than this get a proxy, 0 to skip
+        :param tolerance_px: tolerance of the finest level, the coarser levels are 4x / 16x"""
+        if max_points <= 0: return self
+        epsilon = VecTool.v2d_2_loc3d(tolerance_px)
+        self.lod.levels = (epsilon, epsilon * 4, epsilon * 16)
+        for layer_name_or_index in layers:
+            try:
+                layer = self._get_layer(layer_name_or_index)
+            except (ValueError, IndexError):
+                continue
+            self.lod.begin_proxy(self.edit_layer.frame_scope.frames(layer), max_points)
+        return self
+
+    def commit_proxy(self) -> 'BuildGreasePencilData':
+        """Write the full resolution of the proxy layers back."""
+        if self.lod.has_proxy():
+            self.lod.commit_proxy(self.edit_layer.fit_affine)
+        return self
+
+    def begin_transform(self, layers: list[str | int]) -> 'BuildGreasePencilData':
+        """Only compose a matrix for the move / rotate / scale of the layers from now on, see GPencilLayerTransform.
+        Call bake_transform to write it to the points."""
+        for layer_name_or_index in layers:
+            try:
+                layer = self._get_layer(layer_name_or_index)
+            except (ValueError, IndexError):
+                continue
+            GPencilLayerTransform.begin(layer, self.edit_layer.frame_scope.frames(layer))
+        return self
+
+    def bake_transform(self) -> 'BuildGreasePencilData':
+        """Write the pending transform of the layers to the points."""
+        GPencilLayerTransform.bake_all(self.gp_data, self.edit_layer.affine_layer)
+        return self
+
     def set_active_layer(self, layer_name_or_index: str | int) -> 'BuildGreasePencilData':
         """Set the active grease pencil annotation layer."""
         if isinstance(layer_name_or_index, int):
@@ -304,6 +511,48 @@ class BuildGreasePencilData(GreasePencilCache, GreasePencilProperty):
         layer.color = color
         return self
 
+    def color_layers(self, layers: list[str | int], color: Color) -> 'BuildGreasePencilData':
+        """Set the color of many layers in one pass."""
+        selected = {self._get_layer(layer).as_pointer() for layer in layers}
+        mask = np.fromiter((layer.as_pointer() in selected for layer in self.gp_data.layers), dtype=bool,
+                           count=len(self.gp_data.layers))
+        return self._set_layers_values('color', lambda _: mask, tuple(color)[:3])
+
+    def recolor(self, src_color: Color, dst_color: Color, tolerance: float = 1 / 255) -> 'BuildGreasePencilData':
+        """Set the color of all the layers of src_color to dst_color, in one pass over the layers.
+        :param tolerance: max difference per channel to consider the color equal"""
+        return self._set_layers_values('color', lambda colors: ColorSpace.match(colors, src_color, tolerance),
+                                       tuple(dst_color)[:3])
+
+    def color_all(self, color: Color) -> 'BuildGreasePencilData':
+        """Set the color of all the layers in one pass."""
+        return self._set_layers_values('color', None, tuple(color)[:3])
+
+    def opacity_all(self, opacity: float) -> 'BuildGreasePencilData':
+        """Set the opacity of all the layers in one pass."""
+        return self._set_layers_values('annotation_opacity', None, opacity)
+
+    def thickness_all(self, thickness: int) -> 'BuildGreasePencilData':
+        """Set the thickness of all the layers in one pass."""
+        return self._set_layers_values('thickness', None, thickness)
+
+    def _set_layers_values(self, attr: str, get_mask: Optional[Callable[[np.ndarray], np.ndarray]],
+                           value: float | int | tuple) -> 'BuildGreasePencilData':
+        """Set an attribute of the layers with one foreach_get / foreach_set.
+        :param get_mask: function(current values) -> bool mask of the layers to set, None for all the layers"""
+        layers = self.gp_data.layers
+        if not layers: return self
+        size = len(value) if isinstance(value, tuple) else 1
+        dtype = 'i' if isinstance(value, int) else 'f'
+        values = np.empty(len(layers) * size, dtype=dtype)
+        layers.foreach_get(attr, values)
+        values = values.reshape(-1, size)
+        mask = get_mask(values) if get_mask else np.ones(len(layers), dtype=bool)
+        if mask.any():
+            values[mask] = value
+            layers.foreach_set(attr, values.ravel())
+        return self
+
     def thickness(self, layer_name_or_index: str | int, thickness: int) -> 'BuildGreasePencilData':
         """Set the thickness of the grease pencil annotation layer."""
         if not (layer := self._get_layer(layer_name_or_index)): return self
@@ -315,25 +564,23 @@ class BuildGreasePencilData(GreasePencilCache, GreasePencilProperty):
         if not (layer := self._get_layer(self.active_layer_index)):
             return self
 
-        stroke_remove = None
-        frame = layer.frames[0]
         bbox = GPencilLayerBBox(self.gp_data)
-        bbox.calc_active_layer_bbox()
-
-        for i, stroke in enumerate(frame.strokes):
-            points = GPencilStroke.get_stroke_points(stroke)
-            min_x = np.min(points[:, 0])
-            max_x = np.max(points[:, 0])
-            min_y = np.min(points[:, 1])
-            max_y = np.max(points[:, 1])
-
-            if len(stroke.points) == 37:  # blender svg bound points num
-                if min_x == bbox.min_x and max_x == bbox.max_x and min_y == bbox.min_y and max_y == bbox.max_y:
+        for frame in self.edit_layer.frame_scope.frames(layer):
+            if (extents := bbox.calc_frame_extents(frame)) is None: continue
+            (min_x, min_y), (max_x, max_y) = extents[0], extents[1]
+            stroke_remove = None
+
+            for i, stroke in enumerate(frame.strokes):
+                if len(stroke.points) != 37: continue  # blender svg bound points num
+                points = GPencilStroke.get_stroke_points(stroke)
+                if (np.min(points[:, 0]) == min_x and np.max(points[:, 0]) == max_x and
+                        np.min(points[:, 1]) == min_y and np.max(points[:, 1]) == max_y):
                     stroke_remove = stroke
                     break
 
-        if stroke_remove:
-            frame.strokes.remove(stroke_remove)
+            if stroke_remove:
+                frame.strokes.remove(stroke_remove)
+                GPencilLayerBBox.invalidate(layer)
 
         return self
 
@@ -360,7 +607,7 @@ class BuildGreasePencilData(GreasePencilCache, GreasePencilProperty):
         tmp_obj.select_set(True)
         bpy.ops.object.join()
         self.gp_data = self_obj.data
-        self.del_later(obj_list=[self_obj, tmp_obj])
+        self.del_later(obj_list=[self_obj, tmp_obj], data=other_gp_data)  # other data is orphan after join
         return self
 
     def copy_active(self) -> 'BuildGreasePencilData':
@@ -443,7 +690,10 @@ class BuildGreasePencilData(GreasePencilCache, GreasePencilProperty):
 
         layer = self._get_layer(layer_name_or_index)
         vec = Vector(v) if space == '3d' else VecTool.v2d_2_loc3d(Vector(v))
-        self.edit_layer.move_layer(layer, vec)
+        if GPencilLayerTransform.has(layer):
+            GPencilLayerTransform.apply(layer, affine_translation(vec))
+        else:
+            self.edit_layer.move_layer(layer, vec)
         return self
 
     def scale(self, layer_name_or_index: str | int, scale: Vector, pivot: Vector,
@@ -458,7 +708,11 @@ class BuildGreasePencilData(GreasePencilCache, GreasePencilProperty):
         :return: instance"""
         layer = self._get_layer(layer_name_or_index)
         vec_pivot = pivot if space == '3d' else VecTool.v2d_2_loc3d(pivot)
-        self.edit_layer.scale_layer(layer, scale, vec_pivot, local)
+        if GPencilLayerTransform.has(layer):
+            angle = -layer.rotation[2] if local else 0
+            GPencilLayerTransform.apply(layer, affine_scale(scale, vec_pivot, angle))
+        else:
+            self.edit_layer.scale_layer(layer, scale, vec_pivot, local)
         return self
 
     def rotate(self, layer_name_or_index: str | int, degree: int | float, pivot: Vector,
@@ -472,5 +726,9 @@ class BuildGreasePencilData(GreasePencilCache, GreasePencilProperty):
         :return: instance"""
         layer = self._get_layer(layer_name_or_index)
         vec_pivot = pivot if space == '3d' else VecTool.v2d_2_loc3d(pivot)
-        self.edit_layer.rotate_layer(layer, degree, vec_pivot)
+        if GPencilLayerTransform.has(layer):
+            GPencilLayerTransform.apply(layer, affine_rotation(radians(degree), vec_pivot))
+            layer.rotation[2] += radians(degree)  # same as rotate_layer
+        else:
+            self.edit_layer.rotate_layer(layer, degree, vec_pivot)
         return self
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from typing import ClassVar, Optional
+
+import bpy
+from mathutils import Vector
+
+from .model_gp_edit import EditGreasePencilLayer
+from .model_gp_layer_id import GPencilLayerID
+from .utils import VecTool
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
+
+# id property of the grease pencil data: layer id: {'node': node name, 'location': node location (x, y)}
+# the layer id is the stable id of GPencilLayerID as a string, so the anchor follows a rename of the note
+# the location is the node location the note was last moved with, so the offset of the note to the node is kept
+# and an undo restores the notes and the locations together
+ANCHOR_KEY = 'est_anchors'
+
+
+def node_absolute_location(node: bpy.types.Node) -> tuple[float, float]:
+    """The location of a node in a frame is relative to the frame."""
+    x, y = node.location
+    parent = node.parent
+    while parent:
+        x, y = x + parent.location[0], y + parent.location[1]
+        parent = parent.parent
+    return x, y
+
+
+class GPencilNodeAnchor:
+    """Notes attached to the nodes of the tree they are drawn on, they follow the nodes when the nodes move.
+    usage:
+    >>> GPencilNodeAnchor.attach(node_tree, layer, node)
+    >>> GPencilNodeAnchor.sync(node_tree)  # called by the depsgraph handler
+    """
+    # grease pencil pointer: (layer ids, node names, node locations Nx2), mirror of the id property
+    cache: ClassVar[dict[int, tuple[list[str], list[str], np.ndarray]]] = {}
+
+    @staticmethod
+    def anchors(gp_data: bpy.types.GreasePencil) -> dict[str, dict]:
+        anchors = gp_data.get(ANCHOR_KEY)
+        return anchors.to_dict() if anchors else {}
+
+    @classmethod
+    def anchored_node(cls, gp_data: bpy.types.GreasePencil, layer: bpy.types.GPencilLayer) -> Optional[str]:
+        anchors = gp_data.get(ANCHOR_KEY)
+        key = str(layer.pass_index)  # read only, called when drawing the panel
+        return anchors[key]['node'] if anchors and key in anchors else None
+
+    @classmethod
+    def attach(cls, node_tree: bpy.types.NodeTree, layer: bpy.types.GPencilLayer, node: bpy.types.Node) -> None:
+        gp_data = node_tree.grease_pencil
+        if ANCHOR_KEY not in gp_data:
+            gp_data[ANCHOR_KEY] = {}
+        gp_data[ANCHOR_KEY][str(GPencilLayerID.layer_id(layer))] = {'node': node.name,
+                                                                   'location': node_absolute_location(node)}
+        cls.invalidate(gp_data)
+
+    @classmethod
+    def detach(cls, gp_data: bpy.types.GreasePencil, layer: bpy.types.GPencilLayer) -> None:
+        key = str(GPencilLayerID.layer_id(layer))
+        if (anchors := gp_data.get(ANCHOR_KEY)) and key in anchors:
+            del anchors[key]
+            cls.invalidate(gp_data)
+
+    @classmethod
+    def prune(cls, gp_data: bpy.types.GreasePencil) -> int:
+        """Drop the anchors of the layers that don't exist anymore, an undo brings them back with the layer.
+        :return: the number of anchors dropped"""
+        if not (anchors := gp_data.get(ANCHOR_KEY)):
+            return 0
+        ids = set(map(str, GPencilLayerID.ids(gp_data).tolist()))
+        stale = [key for key in anchors.keys() if key not in ids]
+        for key in stale:
+            del anchors[key]
+        if stale:
+            cls.invalidate(gp_data)
+        return len(stale)
+
+    @classmethod
+    def invalidate(cls, gp_data: Optional[bpy.types.GreasePencil] = None) -> None:
+        """Read the id property again, call it after an undo / loading a file. None to clear all."""
+        if gp_data is None:
+            cls.cache.clear()
+        else:
+            cls.cache.pop(gp_data.as_pointer(), None)
+
+    @classmethod
+    def _cached(cls, gp_data: bpy.types.GreasePencil) -> tuple[list[str], list[str], np.ndarray]:
+        key = gp_data.as_pointer()
+        if (cached := cls.cache.get(key)) is None:
+            anchors = cls.anchors(gp_data)
+            layers = list(anchors.keys())
+            nodes = [anchors[layer]['node'] for layer in layers]
+            locations = np.array([anchors[layer]['location'] for layer in layers], dtype=np.float64).reshape(-1, 2)
+            cached = cls.cache[key] = (layers, nodes, locations)
+        return cached
+
+    @classmethod
+    def sync(cls, node_tree: bpy.types.NodeTree) -> int:
+        """Move the notes whose node moved since the last sync, one pass over the anchored nodes.
+        :return: the number of moved notes"""
+        gp_data = node_tree.grease_pencil
+        if not gp_data or ANCHOR_KEY not in gp_data:
+            return 0
+        layers, node_names, locations = cls._cached(gp_data)
+        if not layers:
+            return 0
+
+        nodes = node_tree.nodes
+        current = locations.copy()  # a removed node keeps its last location, the note stays
+        for i, name in enumerate(node_names):
+            if node := nodes.get(name):
+                current[i] = node_absolute_location(node)
+        moved = np.flatnonzero(np.any(np.abs(current - locations) > 1e-4, axis=1))
+        if not len(moved):
+            return 0
+
+        edit_layer = EditGreasePencilLayer()
+        anchors = gp_data[ANCHOR_KEY]
+        count, removed = 0, False
+        for i in moved:
+            layer = GPencilLayerID.layer_of(gp_data, int(layers[i]))
+            if layer:
+                delta = current[i] - locations[i]
+                edit_layer.move_layer(layer, VecTool.v2d_2_loc3d(Vector((delta[0], delta[1]))))
+                count += 1
+            else:
+                removed = True
+            anchors[layers[i]]['location'] = tuple(current[i])
+        locations[moved] = current[moved]
+        if removed:
+            cls.prune(gp_data)
+        return count
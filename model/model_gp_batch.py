@@ -0,0 +1,90 @@
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Literal, Iterator
+
+import bpy
+from mathutils import Vector, Color
+
+from .model_gp import BuildGreasePencilData
+
+# id collections that may own an embedded node tree
+EMBEDDED_TREE_OWNERS: tuple[str, ...] = ('materials', 'worlds', 'scenes', 'lights', 'textures', 'linestyles')
+
+
+def iter_node_trees() -> Iterator[bpy.types.NodeTree]:
+    """Yield every node tree in the file, node groups and the embedded node trees."""
+    yield from bpy.data.node_groups
+    for attr in EMBEDDED_TREE_OWNERS:
+        for owner in getattr(bpy.data, attr, ()):
+            if node_tree := getattr(owner, 'node_tree', None):
+                yield node_tree
+
+
+def collect_gp_data() -> list[bpy.types.GreasePencil]:
+    """Return the grease pencil data of every node tree, the data shared by several trees is only returned once."""
+    res: dict[int, bpy.types.GreasePencil] = {}
+    for node_tree in iter_node_trees():
+        if gp_data := node_tree.grease_pencil:
+            res.setdefault(gp_data.as_pointer(), gp_data)
+    return list(res.values())
+
+
+@dataclass
+class GreasePencilBatch:
+    """Apply a builder pipeline to the grease pencil data of every node tree, work without UI.
+    usage:
+    GreasePencilBatch().thickness(2).opacity(0.8).scale(1.25).run()
+    """
+    steps: list[Callable[[BuildGreasePencilData], None]] = field(default_factory=list)
+    # function(done, total, name), called after every grease pencil data
+    on_progress: Optional[Callable[[int, int, str], None]] = None
+
+    def color(self, color: Color) -> 'GreasePencilBatch':
+        self.steps.append(lambda builder: builder.color_all(color))
+        return self
+
+    def recolor(self, src_color: Color, dst_color: Color, tolerance: float = 1 / 255) -> 'GreasePencilBatch':
+        self.steps.append(lambda builder: builder.recolor(src_color, dst_color, tolerance))
+        return self
+
+    def thickness(self, thickness: int) -> 'GreasePencilBatch':
+        self.steps.append(lambda builder: builder.thickness_all(thickness))
+        return self
+
+    def opacity(self, opacity: float) -> 'GreasePencilBatch':
+        self.steps.append(lambda builder: builder.opacity_all(opacity))
+        return self
+
+    def move(self, v: Vector, space: Literal['v2d', '3d'] = 'v2d') -> 'GreasePencilBatch':
+        self.steps.append(lambda builder: [builder.move(i, v, space) for i in range(len(builder.gp_data.layers))])
+        return self
+
+    def scale(self, factor: float, pivot: Optional[Vector] = None) -> 'GreasePencilBatch':
+        """Scale all the layers around the pivot (3d space, the origin if None),
+        e.g. new_ui_scale / old_ui_scale after ui scale changed."""
+        scale = Vector((factor, factor, 1))
+        pivot = Vector((0, 0, 0)) if pivot is None else pivot
+        self.steps.append(lambda builder: [builder.scale(i, scale, pivot) for i in range(len(builder.gp_data.layers))])
+        return self
+
+    def display(self, mode: Literal['2D', '3D']) -> 'GreasePencilBatch':
+        self.steps.append(lambda builder: builder.to_2d() if mode == '2D' else builder.to_3d())
+        return self
+
+    def simplify(self, tolerance_px: float) -> 'GreasePencilBatch':
+        self.steps.append(
+            lambda builder: [builder.simplify(i, tolerance_px) for i in range(len(builder.gp_data.layers))])
+        return self
+
+    def run(self, gp_data_list: Optional[list[bpy.types.GreasePencil]] = None) -> int:
+        """Run the pipeline.
+        :param gp_data_list: default to the grease pencil data of every node tree
+        :return: the number of processed grease pencil data"""
+        gp_data_list = collect_gp_data() if gp_data_list is None else gp_data_list
+        total = len(gp_data_list)
+        for i, gp_data in enumerate(gp_data_list):
+            with BuildGreasePencilData(gp_data) as builder:
+                for step in self.steps:
+                    step(builder)
+            if self.on_progress:
+                self.on_progress(i + 1, total, gp_data.name)
+        return total
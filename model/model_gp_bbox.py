@@ -1,14 +1,22 @@
+from __future__ import annotations
+
 from dataclasses import dataclass, field
-from typing import Literal
+from typing import Literal, ClassVar, Optional
 
 import bpy
-import numpy as np
 from mathutils import Vector
 
 from .data_enums import AlignMode, DistributionMode
-from .model_gp_property import GPencilStroke
+from .model_gp_cost import GPencilLayerCost
+from .model_gp_property import GPencilFrameScope, frame_storage
+from .model_gp_hull import GPencilLayerHitTest
+from .model_gp_transform import GPencilLayerTransform
+from .model_obb import OrientedBBox, rotation_matrix
 from .model_points import PointsArea, AreaPoint
 from .utils import VecTool
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
 
 
 @dataclass
@@ -16,14 +24,22 @@ class CalcBBox:
     """Properties for the bounding box to use
     v2d: view 2d space e.g. in node editor, `node.location` is in v2d space
     r2d: region 2d space e.g. in the region, event.mouse_region_x is in r2d space
+    frame_scope: the frames to calculate, default to the frame that is drawn
     """
 
     gp_data: bpy.types.GreasePencil
     area: PointsArea = field(init=False)
+    # the same box as the area, but keeps the rotation of the layer in local mode
+    obb: OrientedBBox = field(init=False)
     last_layer_index: int = 0
+    frame_scope: GPencilFrameScope = field(default_factory=lambda: GPencilFrameScope('ACTIVE'))
+    # cache the extents of every frame, frame pointer: (points count, angle, extents)
+    # this is a class variable, so it will be shared among all instances / subclasses instances
+    frame_cache: ClassVar[dict[int, tuple[int, float, Optional[np.ndarray]]]] = {}
 
     def __post_init__(self):
         self.area = PointsArea()
+        self.obb = OrientedBBox(np.zeros(2), np.zeros(2))
 
     def __getattr__(self, item: str):
         """Get the attribute from the area if it exists, otherwise from self."""
@@ -96,43 +112,31 @@ class CalcBBox:
             raise ValueError(f'Layer {layer_name_or_index} not found.')
         self.layer = layer
 
-        try:
-            frame = layer.frames[0]
-        except IndexError:  # no frame
-            self.max_x = self.min_x = self.max_y = self.min_y = 0
-            return
-
-        points = self._getLayer_frame_points(frame)
-        # Ensure all points are 3D by padding 2D points with a zero z-coordinate
-        if points.shape[1] == 2:  # Check if points are 2D
-            points = np.hstack([points, np.zeros((points.shape[0], 1))])  # Convert to 3D
+        angle = -layer.rotation[2] if local else 0
+        extents = [e for frame in self.frame_scope.frames(layer) if (e := self.calc_frame_extents(frame, angle)) is not None]
+        if not extents:  # no frame / no stroke
+            extents = [np.zeros((4, 2))]
+        extents = np.array(extents)  # frames, (min, max, rotated min, rotated max), xy
 
+        min_xy = extents[:, 0].min(axis=0)
+        max_xy = extents[:, 1].max(axis=0)
+        center = (min_xy + max_xy) / 2
 
-        min_x = np.min(points[:, 0])
-        max_x = np.max(points[:, 0])
-        min_y = np.min(points[:, 1])
-        max_y = np.max(points[:, 1])
-        center = np.array([(max_x + min_x) / 2, (max_y + min_y) / 2, 0])
+        if angle:
+            # the frames are rotated around the origin, move them back so that they are rotated around the center
+            shift = center - center @ rotation_matrix(-angle)
+            min_xy = extents[:, 2].min(axis=0) + shift
+            max_xy = extents[:, 3].max(axis=0) + shift
 
-        if local:
-            # Adjust the points array for rotation
-            if angle := -layer.rotation[2]:  # if angle is not 0
-                rotation_matrix = np.array([[np.cos(angle), -np.sin(angle), 0],
-                                            [np.sin(angle), np.cos(angle), 0],
-                                            [0, 0, 1]])
-                points = ((points - center) @ rotation_matrix) + center
-
-        max_xyz_id = np.argmax(points, axis=0)
-        min_xyz_id = np.argmin(points, axis=0)
-
-        self.max_x = float(points[max_xyz_id[0], 0])
-        self.max_y = float(points[max_xyz_id[1], 1])
-        self.min_x = float(points[min_xyz_id[0], 0])
-        self.min_y = float(points[min_xyz_id[1], 1])
+        self.min_x, self.min_y = float(min_xy[0]), float(min_xy[1])
+        self.max_x, self.max_y = float(max_xy[0]), float(max_xy[1])
+        center = np.array([center[0], center[1], 0])
 
         self.last_layer_index = [i for i, l in enumerate(self.gp_data.layers) if l == layer][0]
         self.area.center = Vector(center)
         self.area.setup(top=self.max_y, bottom=self.min_y, left=self.min_x, right=self.max_x)
+        # the extents are measured in the frame rotated back around the center, turn them into the world box
+        self.obb = OrientedBBox.from_extents(min_xy, max_xy, angle, pivot=center)
         # cross point for the area
         # self.area.center = Vector(pivot)
 
@@ -152,19 +156,54 @@ class CalcBBox:
             raise ValueError(f'Layer {layer_name_or_index} not found.')
         return layer
 
+    def calc_frame_extents(self, frame: bpy.types.GPencilFrame, angle: float = 0) -> np.ndarray | None:
+        """Return the extents of the frame: min, max, and min, max after rotated around the origin by the angle.
+        The result is cached per frame, the points are only read again if the points count or the angle changed,
+        or the frame is invalidated by the edit.
+        :return: 4x2 array, None if the frame has no points"""
+        if (points := GPencilLayerTransform.frame_hull(frame)) is not None:
+            # the pending transform changes on every event of a drag, its hull is transformed instead of the points
+            if not len(points): return None
+            rotated = points @ rotation_matrix(-angle) if angle else points
+            return np.array([points.min(axis=0), points.max(axis=0), rotated.min(axis=0), rotated.max(axis=0)])
+
+        key = frame.as_pointer()
+        count = frame_storage(frame).point_count(frame)
+        if (cached := self.frame_cache.get(key)) and cached[0] == count and cached[1] == angle:
+            return cached[2]
+
+        if count == 0:
+            extents = None
+        else:
+            points = self._getLayer_frame_points(frame)[:, :2]
+            rotated = points @ rotation_matrix(-angle) if angle else points
+            extents = np.array([points.min(axis=0), points.max(axis=0), rotated.min(axis=0), rotated.max(axis=0)])
+        self.frame_cache[key] = (count, angle, extents)
+        return extents
+
+    @classmethod
+    def invalidate(cls, layer: bpy.types.GPencilLayer) -> None:
+        """Remove the cached extents of the layer frames, call it after the points are changed."""
+        for frame in layer.frames:
+            cls.frame_cache.pop(frame.as_pointer(), None)
+        GPencilLayerHitTest.invalidate(layer)
+        GPencilLayerCost.invalidate_extents(layer)
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        cls.frame_cache.clear()
+        GPencilLayerHitTest.clear_cache()
+
     def _getLayer_frame_points(self, frame: bpy.types.GPencilFrame) -> np.ndarray:
         """
         Return the points of all the strokes in one numpy array.
         """
 
-        all_points = []
-        for stroke in frame.strokes:
-            with GPencilStroke.stroke_points(stroke) as points:
-                all_points.append(points)
+        points, _ = frame_storage(frame).read(frame)
         # if empty
-        if not all_points:
+        if not len(points):
             return np.array([[0, 0, 0]])
-        return np.concatenate(all_points, axis=0)
+        return points
 
 
 @dataclass
@@ -201,13 +240,10 @@ class GPencilLayerBBox(CalcBBox):
     @property
     def bbox_points_3d(self) -> list[AreaPoint]:
         """Return the bounding box points in 3d space.
-        if the mode is local, the origin  bounding box points is correct by the inverse rotation of the layer.
-        so it will apply the rotation of the layer to the bounding box points."""
+        if the mode is local, the points are the corners of the oriented box, which keeps the rotation of the layer."""
         points = super().bbox_points_3d
         if self.is_local:
-            angle = self.layer_rotate_2d()
-            pivot_3d = self.center.to_3d()
-            return [p.rotate_by_angle(angle, pivot_3d) for p in points]
+            return [AreaPoint(co).set_position_type(p.position_type) for co, p in zip(self.obb.corners(), points)]
         else:
             return list(points)
 
@@ -216,9 +252,7 @@ class GPencilLayerBBox(CalcBBox):
         """Return the edge center points of the bounding box in 3d space."""
         points = super().edge_center_points_3d
         if self.is_local:
-            angle = self.layer_rotate_2d()
-            pivot_3d = self.center.to_3d()
-            return [p.rotate_by_angle(angle, pivot_3d) for p in points]
+            return [AreaPoint(co).set_position_type(p.position_type) for co, p in zip(self.obb.edge_centers(), points)]
         else:
             return list(points)
 
@@ -237,26 +271,22 @@ class GPencilLayersBBox(CalcBBox):
         Calculate the bounding box that encompasses multiple layers.
         :param layers: A list of layer names or indices.
         """
-        all_points = []
+        extents = []
         for layer in layers:
             _layer = self._get_layer(layer)
             if not _layer: continue
-            points = self._getLayer_frame_points(_layer.frames[0])
-            all_points.append(points)
+            extents.extend(e for frame in self.frame_scope.frames(_layer) if (e := self.calc_frame_extents(frame)) is not None)
 
-        if not all_points:
+        if not extents:
             self.max_x = self.min_x = self.max_y = self.min_y = 0
             return
 
-        points = np.concatenate(all_points, axis=0)
-        max_xyz_id = np.argmax(points, axis=0)
-        min_xyz_id = np.argmin(points, axis=0)
-        self.max_x = float(points[max_xyz_id[0], 0])
-        self.max_y = float(points[max_xyz_id[1], 1])
-        self.min_x = float(points[min_xyz_id[0], 0])
-        self.min_y = float(points[min_xyz_id[1], 1])
+        extents = np.array(extents)
+        self.min_x, self.min_y = (float(v) for v in extents[:, 0].min(axis=0))
+        self.max_x, self.max_y = (float(v) for v in extents[:, 1].max(axis=0))
         self.area.center = Vector(((self.max_x + self.min_x) / 2, (self.max_y + self.min_y) / 2, 0))
         self.area.setup(top=self.max_y, bottom=self.min_y, left=self.min_x, right=self.max_x)
+        self.obb = OrientedBBox.from_extents((self.min_x, self.min_y), (self.max_x, self.max_y))
 
     def calc_layers_edge_difference(self, layers: list[str], mode: AlignMode) -> dict[str, Vector]:
         """Calculate the every layer's edge to the whole layers' edge difference.
@@ -265,7 +295,7 @@ class GPencilLayersBBox(CalcBBox):
         :return: A dictionary of the layer name and the difference."""
 
         self.calc_multiple_layers_bbox(layers)
-        bbox = GPencilLayerBBox(self.gp_data)
+        bbox = GPencilLayerBBox(self.gp_data, frame_scope=self.frame_scope)
 
         res: dict[str, Vector] = {}
         for layer in layers:
@@ -293,7 +323,7 @@ class GPencilLayersBBox(CalcBBox):
         :return: A dictionary of the layer name and the difference."""
 
         self.calc_multiple_layers_bbox(layers)
-        bbox = GPencilLayerBBox(self.gp_data)
+        bbox = GPencilLayerBBox(self.gp_data, frame_scope=self.frame_scope)
 
         # first, calculate the center of the layers, size of the layers, and the edge center points of the layers
         size: dict[str, Vector] = {}
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from functools import cache
+from typing import ClassVar, Literal
+
+import bpy
+
+from .model_gp_layer_id import GPencilLayerID
+from .model_gp_property import GPencilFrameScope, frame_storage
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
+
+CostMetric = Literal['POINTS', 'STROKES', 'FRAMES']
+
+
+@cache
+def cost_dtype() -> np.dtype:
+    return np.dtype([('id', 'i4'), ('frames', 'i4'), ('strokes', 'i4'), ('points', 'i4')])
+
+
+class GPencilLayerCost:
+    """How heavy the layers of a grease pencil data are, to find the notes that slow down the editor.
+    The counts of every layer (all the frames) are read once into a table, one row per layer in the order of
+    the layers, and kept until a layer is invalidated (CacheBus) or the ids of the layers changed (added, removed,
+    reordered).
+    heat: the metric on a log scale, 0 for the lightest layer, 1 for the heaviest one
+    extents: the box of the drawn frame of every layer, kept beside the table for the inspector
+    usage:
+    >>> table = GPencilLayerCost.table(gp_data)
+    >>> table['points'][GPencilLayerCost.heaviest(gp_data, 5)]
+    """
+    # grease pencil pointer: table
+    cache: ClassVar[dict[int, np.ndarray]] = {}
+    # grease pencil pointer: (scene frame, layer ids, Nx2x2 min / max xy of the layers, nan for an empty layer)
+    extents_cache: ClassVar[dict[int, tuple[int, np.ndarray, np.ndarray]]] = {}
+
+    @classmethod
+    def table(cls, gp_data: bpy.types.GreasePencil) -> np.ndarray:
+        key = gp_data.as_pointer()
+        ids = GPencilLayerID.ids(gp_data)
+        if (table := cls.cache.get(key)) is not None and np.array_equal(table['id'], ids):
+            return table
+        table = np.zeros(len(ids), dtype=cost_dtype())
+        table['id'] = ids
+        for i, layer in enumerate(gp_data.layers):
+            for frame in layer.frames:
+                storage = frame_storage(frame)
+                table['strokes'][i] += storage.stroke_count(frame)
+                table['points'][i] += storage.point_count(frame)
+            table['frames'][i] = len(layer.frames)
+        cls.cache[key] = table
+        return table
+
+    @classmethod
+    def extents(cls, gp_data: bpy.types.GreasePencil) -> np.ndarray:
+        """The min / max of the points of the drawn frame of every layer,
+        read again when the scene frame or the ids of the layers changed.
+        :return: Nx2x2, nan for a layer without points"""
+        key, frame_current = gp_data.as_pointer(), bpy.context.scene.frame_current
+        ids = GPencilLayerID.ids(gp_data)
+        if (cached := cls.extents_cache.get(key)) is not None and cached[0] == frame_current \
+                and np.array_equal(cached[1], ids):
+            return cached[2]
+        extents = np.full((len(gp_data.layers), 2, 2), np.nan)
+        scope = GPencilFrameScope('ACTIVE')
+        for i, layer in enumerate(gp_data.layers):
+            points = [frame_storage(frame).read(frame)[0][:, :2] for frame in scope.frames(layer)]
+            if points and len(points := np.concatenate(points)):
+                extents[i] = points.min(axis=0), points.max(axis=0)
+        cls.extents_cache[key] = (frame_current, ids, extents)
+        return extents
+
+    @classmethod
+    def values(cls, gp_data: bpy.types.GreasePencil, metric: CostMetric = 'POINTS') -> np.ndarray:
+        return cls.table(gp_data)[metric.lower()]
+
+    @classmethod
+    def heat(cls, gp_data: bpy.types.GreasePencil, metric: CostMetric = 'POINTS') -> np.ndarray:
+        """The metric on a log scale in 0-1, a note with 10x the points of another one is one step hotter."""
+        values = np.log1p(cls.values(gp_data, metric).astype(np.float64))
+        if not len(values):
+            return values
+        low, high = values.min(), values.max()
+        return (values - low) / (high - low) if high > low else np.zeros(len(values))
+
+    @classmethod
+    def heaviest(cls, gp_data: bpy.types.GreasePencil, count: int, metric: CostMetric = 'POINTS') -> np.ndarray:
+        """Indices of the heaviest layers, the heaviest first, the empty layers are left out."""
+        values = cls.values(gp_data, metric)
+        order = np.argsort(-values, kind='stable')[:count]
+        return order[values[order] > 0]
+
+    @classmethod
+    def heavy_mask(cls, gp_data: bpy.types.GreasePencil, threshold: float, metric: CostMetric = 'POINTS') -> np.ndarray:
+        """Bool mask over the layer indices, the layers whose heat is at least the threshold."""
+        values = cls.values(gp_data, metric)
+        return (cls.heat(gp_data, metric) >= threshold) & (values > 0)
+
+    @classmethod
+    def invalidate(cls, layer: bpy.types.GPencilLayer) -> None:
+        """Drop the table of the data of the layer, call it after the points or the frames are changed."""
+        cls.cache.pop(layer.id_data.as_pointer(), None)
+        cls.invalidate_extents(layer)
+
+    @classmethod
+    def invalidate_extents(cls, layer: bpy.types.GPencilLayer) -> None:
+        """Drop the extents only, the counts don't change when the points are transformed."""
+        cls.extents_cache.pop(layer.id_data.as_pointer(), None)
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        cls.cache.clear()
+        cls.extents_cache.clear()
@@ -1,11 +1,16 @@
+from __future__ import annotations
+
 from math import radians, degrees
 import bpy
-import numpy as np
 from mathutils import Vector, Matrix
-from typing import Literal
+from typing import Literal, Optional
 
 from .model_gp_bbox import GPencilLayerBBox
-from .model_gp_property import GPencilStroke
+from .model_gp_property import GPencilStroke, GPencilFrameScope, frame_storage
+from .model_gp_transform import affine_translation, affine_rotation, affine_scale, affine_compose
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
 
 
 # below Edit Class is all in 3d space
@@ -13,67 +18,106 @@ from .model_gp_property import GPencilStroke
 class EditGreasePencilStroke(GPencilStroke):
     """Grease Pencil Stroke, easy to manipulate Stroke data."""
 
-    def _move_stroke(self, stroke: bpy.types.GPencilStroke, v: Vector):
-        """Move the grease pencil data."""
-        with self.stroke_points(stroke) as points:
-            points += v
-            stroke.points.foreach_set('co', points.ravel())
-
-    def _scale_stroke(self, stroke: bpy.types.GPencilStroke, scale: Vector, pivot: Vector):
-        """Scale the grease pencil data."""
-        with self.stroke_points(stroke) as points:
-            points = (points - pivot) * scale + pivot
-            stroke.points.foreach_set('co', points.ravel())
-
-    def _rotate_stroke(self, stroke: bpy.types.GPencilStroke, angle: int, pivot: Vector):
-        """Rotate the grease pencil data around the pivot point."""
-        with self.stroke_points(stroke) as points:
-            # use numpy to calculate the rotation
-            points = ((points - pivot) @ np.array([[np.cos(angle), -np.sin(angle), 0],
-                                                   [np.sin(angle), np.cos(angle), 0],
-                                                   [0, 0, 1]]) + pivot)
-
-            stroke.points.foreach_set('co', points.ravel())
-
-    def _scale_stroke_local(self, strokes: bpy.types.GPencilStroke, scale: Vector, angle: float, pivot: Vector):
-        """rotate around the pivot point. before scale, then rotate back"""
-        with self.stroke_points(strokes) as points:
-            points = ((points - pivot) @ np.array([[np.cos(angle), -np.sin(angle), 0],
-                                                   [np.sin(angle), np.cos(angle), 0],
-                                                   [0, 0, 1]]) + pivot)
-            points = (points - pivot) * scale + pivot
-            points = ((points - pivot) @ np.array([[np.cos(-angle), -np.sin(-angle), 0],
-                                                   [np.sin(-angle), np.cos(-angle), 0],
-                                                   [0, 0, 1]]) + pivot)
-            strokes.points.foreach_set('co', points.ravel())
+    @staticmethod
+    def _affine_frame(frame: bpy.types.GPencilFrame, matrix: np.ndarray):
+        """Apply a 2d affine matrix (3x2, row vector convention) to the xy of all the points of the frame,
+        one read and one write of the frame with its storage."""
+        storage = frame_storage(frame)
+        points, _ = storage.read(frame)
+        if not len(points): return
+        points[:, :2] = points[:, :2] @ matrix[:2] + matrix[2]
+        storage.write(frame, points)
 
 
 class EditGreasePencilLayer(EditGreasePencilStroke):
-    """Grease Pencil Layer, easy to manipulate Layer data."""
+    """Grease Pencil Layer, easy to manipulate Layer data.
+    Only the frames in the frame scope are edited, default to all frames so that the animation stays consistent.
+    The transforms of the layers in recorded are composed into their matrix, see start_recording."""
+
+    def __init__(self, frame_scope: Optional[GPencilFrameScope] = None):
+        self.frame_scope = frame_scope if frame_scope else GPencilFrameScope()
+        # layer name: composed matrix of the transforms since start_recording, None if the points were set directly
+        self.recorded: dict[str, Optional[np.ndarray]] = {}
+
+    def _frames(self, layer: bpy.types.GPencilLayer) -> list[bpy.types.GPencilFrame]:
+        GPencilLayerBBox.invalidate(layer)  # the points will be changed
+        return self.frame_scope.frames(layer)
+
+    def start_recording(self, layer: bpy.types.GPencilLayer) -> None:
+        self.recorded[layer.info] = affine_translation((0, 0))
+
+    def _record(self, layer: bpy.types.GPencilLayer, matrix: np.ndarray) -> None:
+        if (recorded := self.recorded.get(layer.info)) is not None:
+            self.recorded[layer.info] = affine_compose(recorded, matrix)
 
     def get_layer_points(self, layer: bpy.types.GPencilLayer) -> dict[bpy.types.GPencilStroke, np.ndarray]:
         """Return all the points in the layer."""
 
-        return {stroke: self.get_stroke_points(stroke) for frame in layer.frames for stroke in frame.strokes}
+        return {stroke: self.get_stroke_points(stroke) for frame in self.frame_scope.frames(layer)
+                for stroke in frame.strokes}
+
+    def get_frame_points(self, frame: bpy.types.GPencilFrame) -> np.ndarray:
+        """Return the points of all the strokes of the frame in one array."""
+        return frame_storage(frame).read(frame)[0]
 
     def set_layer_points(self, layer: bpy.types.GPencilLayer, points: dict[bpy.types.GPencilStroke, np.ndarray]):
         """Set all the points in the layer."""
-        for frame in layer.frames:
+        if layer.info in self.recorded:  # not a transform anymore, the other frames are fitted
+            self.recorded[layer.info] = None
+        for frame in self._frames(layer):
             for stroke in frame.strokes:
-                stroke.points.foreach_set('co', points[stroke].ravel())
+                if stroke in points:
+                    stroke.points.foreach_set('co', points[stroke].ravel())
 
     def move_layer(self, layer: bpy.types.GPencilLayer, v: Vector):
-        v_3d = v.to_3d()
-        for frame in layer.frames:
-            for stroke in frame.strokes:
-                self._move_stroke(stroke, v_3d)
+        matrix = affine_translation(v)
+        self._record(layer, matrix)
+        for frame in self._frames(layer):
+            self._affine_frame(frame, matrix)
+
+    def affine_layer(self, layer: bpy.types.GPencilLayer, matrix: np.ndarray,
+                     frames: Optional[list[bpy.types.GPencilFrame]] = None):
+        """Apply a 2d affine matrix to the layer, see fit_affine.
+        :param frames: the frames to edit, default to the frames in the frame scope"""
+        frames = self.frame_scope.frames(layer) if frames is None else frames
+        self._record(layer, matrix)
+        GPencilLayerBBox.invalidate(layer)
+        for frame in frames:
+            self._affine_frame(frame, matrix)
+
+    @staticmethod
+    def fit_affine(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        """Find the 2d affine matrix that maps the src points to the dst points with least squares.
+        Fallback to a similarity (rotation, uniform scale, translation) if the points can not define
+        a full affine transform (collinear), and to a translation if they are a single point.
+        :return: 3x2 matrix, dst = src @ matrix[:2] + matrix[2]"""
+        src_2d = src[:, :2].astype(np.float64)
+        dst_2d = dst[:, :2].astype(np.float64)
+        homo = np.hstack([src_2d, np.ones((len(src_2d), 1))])
+        if len(src_2d) >= 3 and np.linalg.matrix_rank(homo) == 3:
+            matrix, *_ = np.linalg.lstsq(homo, dst_2d, rcond=None)
+            return matrix
+        matrix = np.zeros((3, 2))
+        matrix[:2] = np.eye(2)
+        if not len(src_2d):
+            return matrix
+        src_mean, dst_mean = src_2d.mean(axis=0), dst_2d.mean(axis=0)
+        src_c, dst_c = src_2d - src_mean, dst_2d - dst_mean
+        variance = (src_c ** 2).sum()
+        if variance > 1e-12:
+            # Procrustes / Umeyama, the rotation that best aligns the centered points, no reflection
+            u, s, vt = np.linalg.svd(src_c.T @ dst_c)
+            d = np.diag([1, np.sign(np.linalg.det(u @ vt)) or 1])
+            matrix[:2] = (s * np.diag(d)).sum() / variance * (u @ d @ vt)
+        matrix[2] = dst_mean - src_mean @ matrix[:2]
+        return matrix
 
     def rotate_layer(self, layer: bpy.types.GPencilLayer, degree: int, pivot: Vector):
         angle = radians(degree)
-        pivot_3d = pivot.to_3d()
-        for frame in layer.frames:
-            for stroke in frame.strokes:
-                self._rotate_stroke(stroke, angle, pivot_3d)
+        matrix = affine_rotation(angle, pivot)
+        self._record(layer, matrix)
+        for frame in self._frames(layer):
+            self._affine_frame(frame, matrix)
 
         # store rotation in layer.rotation, but inverse the rotation
         # because rotate from z up view in 3d clockwise, value is negative
@@ -82,17 +126,11 @@ class EditGreasePencilLayer(EditGreasePencilStroke):
 
     def scale_layer(self, layer: bpy.types.GPencilLayer, scale: Vector, pivot: Vector, local=False):
         """Scale the grease pencil data. Local scale will rotate the data first, then scale, then rotate back."""
-        pivot_3d = pivot.to_3d()
-        scale_3d = scale.to_3d()
-        if local:
-            angle = -layer.rotation[2]  # since the rotation is stored in the layer, we need to inverse it
-            for frame in layer.frames:
-                for stroke in frame.strokes:
-                    self._scale_stroke_local(stroke, scale_3d, angle, pivot_3d)
-        else:
-            for frame in layer.frames:
-                for stroke in frame.strokes:
-                    self._scale_stroke(stroke, scale_3d, pivot_3d)
+        angle = -layer.rotation[2] if local else 0  # since the rotation is stored in the layer, we need to inverse it
+        matrix = affine_scale(scale, pivot, angle)
+        self._record(layer, matrix)
+        for frame in self._frames(layer):
+            self._affine_frame(frame, matrix)
 
     def display_in_2d(self, layer: bpy.types.GPencilLayer):
         self._set_display_mode(layer, '2DSPACE')
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+from typing import Optional, BinaryIO
+
+import bpy
+
+from .model_gp_property import GPencilStroke, GPencilFrameScope
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
+
+# .estn: a flat little endian container of the notes, every section is aligned so it can be memory mapped
+# header | layer table | stroke offsets (stroke count + 1) | co (point count x 3) | pressure (point count)
+EXCHANGE_MAGIC = b'ESTN'
+EXCHANGE_VERSION = 1
+EXCHANGE_SUFFIX = '.estn'
+EXCHANGE_ALIGN = 16
+
+
+@cache
+def header_dtype() -> np.dtype:
+    return np.dtype([
+        ('magic', 'S4'),
+        ('version', '<u4'),
+        ('layer_count', '<u4'),
+        ('stroke_count', '<u4'),
+        ('point_count', '<u8'),
+        ('layer_offset', '<u8'),
+        ('stroke_offset', '<u8'),
+        ('co_offset', '<u8'),
+        ('pressure_offset', '<u8'),
+    ])
+
+
+@cache
+def layer_dtype() -> np.dtype:
+    return np.dtype([
+        ('name', 'S128'),  # utf-8
+        ('color', '<f4', 3),
+        ('thickness', '<i4'),
+        ('opacity', '<f4'),
+        ('rotation', '<f4', 3),
+        ('display_2d', 'u1'),
+        ('frame_number', '<i4'),
+        ('stroke_start', '<u4'),
+        ('stroke_count', '<u4'),
+    ])
+
+
+def _align(offset: int) -> int:
+    return (offset + EXCHANGE_ALIGN - 1) // EXCHANGE_ALIGN * EXCHANGE_ALIGN
+
+
+@dataclass
+class GreasePencilExchangeData:
+    """Arrays of an exchange file, the arrays are memory mapped when read from a file."""
+    layers: np.ndarray  # layer_dtype()
+    stroke_offsets: np.ndarray  # uint64, points of stroke i are co[stroke_offsets[i]:stroke_offsets[i + 1]]
+    co: np.ndarray  # float32, Nx3
+    pressure: np.ndarray  # float32, N
+
+    @property
+    def layer_names(self) -> list[str]:
+        return [name.decode('utf-8', errors='ignore') for name in self.layers['name']]
+
+    def header(self) -> np.ndarray:
+        header = np.zeros(1, dtype=header_dtype())
+        header['magic'] = EXCHANGE_MAGIC
+        header['version'] = EXCHANGE_VERSION
+        header['layer_count'] = len(self.layers)
+        header['stroke_count'] = len(self.stroke_offsets) - 1
+        header['point_count'] = len(self.co)
+        header['layer_offset'] = offset = _align(header_dtype().itemsize)
+        header['stroke_offset'] = offset = _align(offset + self.layers.nbytes)
+        header['co_offset'] = offset = _align(offset + len(self.stroke_offsets) * 8)
+        header['pressure_offset'] = _align(offset + len(self.co) * 12)
+        return header
+
+
+class GreasePencilExchange(GPencilStroke):
+    """Export / import annotation layers to a binary file, without parsing on import.
+    usage:
+    GreasePencilExchange.write(path, gp_data)
+    GreasePencilExchange.load(path, other_gp_data)
+    """
+
+    @staticmethod
+    def pack(gp_data: bpy.types.GreasePencil, layers: Optional[list[bpy.types.GPencilLayer]] = None,
+             frame_scope: GPencilFrameScope = GPencilFrameScope('ACTIVE')) -> GreasePencilExchangeData:
+        """Pack the layers to flat arrays, one frame per layer (the first frame in the scope).
+        :param layers: default to all the layers"""
+        layers = list(gp_data.layers) if layers is None else layers
+        layer_table = np.zeros(len(layers), dtype=layer_dtype())
+        co_list: list[np.ndarray] = []
+        pressure_list: list[np.ndarray] = []
+
+        for i, layer in enumerate(layers):
+            row = layer_table[i]
+            row['name'] = layer.info.encode('utf-8')[:layer_dtype()['name'].itemsize]
+            row['color'] = layer.color[:3]
+            row['thickness'] = layer.thickness
+            row['opacity'] = layer.annotation_opacity
+            row['rotation'] = layer.rotation[:3]
+            row['stroke_start'] = len(co_list)
+            frames = frame_scope.frames(layer)
+            if not frames:
+                continue
+            frame = frames[0]
+            row['frame_number'] = frame.frame_number
+            row['stroke_count'] = len(frame.strokes)
+            row['display_2d'] = bool(frame.strokes) and frame.strokes[0].display_mode == '2DSPACE'
+            for stroke in frame.strokes:
+                pressure = np.empty(len(stroke.points), dtype='f')
+                stroke.points.foreach_get('pressure', pressure)
+                co_list.append(GPencilStroke.get_stroke_points(stroke))
+                pressure_list.append(pressure)
+
+        counts = np.fromiter((len(co) for co in co_list), dtype=np.uint64, count=len(co_list))
+        stroke_offsets = np.zeros(len(co_list) + 1, dtype=np.uint64)
+        np.cumsum(counts, out=stroke_offsets[1:])
+        co = np.concatenate(co_list, axis=0) if co_list else np.empty((0, 3), dtype='f')
+        pressure = np.concatenate(pressure_list) if pressure_list else np.empty(0, dtype='f')
+        return GreasePencilExchangeData(layer_table, stroke_offsets, co, pressure)
+
+    @staticmethod
+    def dump(data: GreasePencilExchangeData, file: BinaryIO) -> int:
+        """Write the data to a binary file object.
+        :return: the number of written bytes"""
+        header = data.header()
+        sections = [
+            (0, header),
+            (int(header['layer_offset'][0]), data.layers),
+            (int(header['stroke_offset'][0]), data.stroke_offsets.astype('<u8', copy=False)),
+            (int(header['co_offset'][0]), data.co.astype('<f4', copy=False)),
+            (int(header['pressure_offset'][0]), data.pressure.astype('<f4', copy=False)),
+        ]
+        written = 0
+        for offset, array in sections:
+            file.write(b'\0' * (offset - written))
+            file.write(np.ascontiguousarray(array).tobytes())
+            written = offset + array.nbytes
+        return written
+
+    @staticmethod
+    def write(path: str | Path, gp_data: bpy.types.GreasePencil,
+              layers: Optional[list[bpy.types.GPencilLayer]] = None) -> int:
+        """Export the layers to the path.
+        :return: the size of the file"""
+        with open(path, 'wb') as f:
+            return GreasePencilExchange.dump(GreasePencilExchange.pack(gp_data, layers), f)
+
+    @staticmethod
+    def read(path: str | Path) -> GreasePencilExchangeData:
+        """Memory map the file, nothing is parsed or copied until the arrays are accessed.
+        :raise ValueError: the file is not an exchange file or the version is not supported"""
+        header = np.fromfile(path, dtype=header_dtype(), count=1)
+        if len(header) != 1 or header['magic'][0] != EXCHANGE_MAGIC:
+            raise ValueError(f'Not a note exchange file: {path}')
+        if header['version'][0] > EXCHANGE_VERSION:
+            raise ValueError(f'Unsupported note exchange version: {header["version"][0]}')
+        header = header[0]
+
+        def section(offset_key: str, dtype: np.dtype | str, shape: tuple[int, ...]) -> np.ndarray:
+            if 0 in shape:
+                return np.empty(shape, dtype=dtype)
+            return np.memmap(path, dtype=dtype, mode='r', offset=int(header[offset_key]), shape=shape)
+
+        stroke_count, point_count = int(header['stroke_count']), int(header['point_count'])
+        return GreasePencilExchangeData(
+            layers=section('layer_offset', layer_dtype(), (int(header['layer_count']),)),
+            stroke_offsets=section('stroke_offset', '<u8', (stroke_count + 1,)),
+            co=section('co_offset', '<f4', (point_count, 3)),
+            pressure=section('pressure_offset', '<f4', (point_count,)),
+        )
+
+    @staticmethod
+    def unpack(data: GreasePencilExchangeData, gp_data: bpy.types.GreasePencil,
+               matrix: Optional[np.ndarray] = None) -> list[bpy.types.GPencilLayer]:
+        """Add the layers of the data to the grease pencil data, the points are written with foreach_set.
+        :param matrix: 3x2 affine matrix applied to the xy of the points while copying (3d space),
+        see EditGreasePencilLayer.fit_affine
+        :return: the new layers"""
+        co = data.co
+        if matrix is not None:
+            co = np.array(co, dtype='f')
+            co[:, :2] = co[:, :2] @ matrix[:2] + matrix[2]
+        starts = data.stroke_offsets
+        new_layers: list[bpy.types.GPencilLayer] = []
+        for row, name in zip(data.layers, data.layer_names):
+            # the new layer is inserted after the active one, not at the end
+            layer = gp_data.layers.new(name, set_active=True)
+            layer.color = row['color']
+            layer.thickness = int(row['thickness'])
+            layer.annotation_opacity = float(row['opacity'])
+            layer.rotation = row['rotation']
+            frame = layer.frames.new(int(row['frame_number']))
+            display_mode = '2DSPACE' if row['display_2d'] else '3DSPACE'
+            first = int(row['stroke_start'])
+            for i in range(first, first + int(row['stroke_count'])):
+                a, b = int(starts[i]), int(starts[i + 1])
+                stroke = frame.strokes.new()
+                stroke.display_mode = display_mode
+                stroke.points.add(b - a)
+                stroke.points.foreach_set('co', co[a:b].ravel())
+                stroke.points.foreach_set('pressure', np.ascontiguousarray(data.pressure[a:b]))
+            new_layers.append(layer)
+        return new_layers
+
+    @staticmethod
+    def load(path: str | Path, gp_data: bpy.types.GreasePencil,
+             matrix: Optional[np.ndarray] = None) -> list[bpy.types.GPencilLayer]:
+        """Import the layers of the file to the grease pencil data.
+        :return: the new layers"""
+        return GreasePencilExchange.unpack(GreasePencilExchange.read(path), gp_data, matrix)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import ClassVar, Optional
+
+import bpy
+
+from .model_gp_property import GPencilFrameScope, frame_storage
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
+
+
+def convex_hull(points: np.ndarray) -> np.ndarray:
+    """Andrew's monotone chain on the xy of the points.
+    :return: Mx2 counterclockwise hull without the repeated first point, less than 3 points if degenerate"""
+    xy = np.unique(np.asarray(points, dtype=np.float64)[:, :2], axis=0)  # sorted by x, then y
+    if len(xy) < 3:
+        return xy
+
+    def half(chain: np.ndarray) -> list[np.ndarray]:
+        res: list[np.ndarray] = []
+        for p in chain:
+            while len(res) >= 2 and ((res[-1][0] - res[-2][0]) * (p[1] - res[-2][1]) -
+                                     (res[-1][1] - res[-2][1]) * (p[0] - res[-2][0])) <= 0:
+                res.pop()
+            res.append(p)
+        return res
+
+    lower, upper = half(xy), half(xy[::-1])
+    return np.array(lower[:-1] + upper[:-1])
+
+
+def distance_to_hull(points: np.ndarray, hull: np.ndarray) -> np.ndarray:
+    """Signed distance of the points (Nx2) to the edges of a counterclockwise hull, the max over the edges.
+    <= 0 inside, only exact at the edges, enough to test a feather. Degenerate hulls use the distance to the segment."""
+    points = np.atleast_2d(points)[:, :2]
+    if len(hull) == 0:
+        return np.full(len(points), np.inf)
+    if len(hull) < 3:
+        a, b = hull[0], hull[-1]
+        d = b - a
+        t = np.clip((points - a) @ d / max(float(d @ d), 1e-12), 0, 1)
+        return np.linalg.norm(points - (a + t[:, None] * d), axis=1)
+
+    edges = np.roll(hull, -1, axis=0) - hull
+    length = np.maximum(np.linalg.norm(edges, axis=1), 1e-12)
+    rel = points[:, None, :] - hull[None]  # N, M, 2
+    # right of the edge is outside for a counterclockwise hull
+    cross = edges[None, :, 0] * rel[..., 1] - edges[None, :, 1] * rel[..., 0]
+    return (-cross / length).max(axis=1)
+
+
+@dataclass(slots=True)
+class LayerHitShape:
+    """The shape of a layer used to pick it, in 3d space.
+    occupancy: cells x cells grid over the bbox, True where a stroke passes, dilated by one cell"""
+    min_xy: np.ndarray
+    max_xy: np.ndarray
+    hull: np.ndarray
+    occupancy: Optional[np.ndarray] = None
+
+    @property
+    def is_empty(self) -> bool:
+        return len(self.hull) == 0
+
+    def in_bbox(self, point: np.ndarray, feather: float = 0) -> bool:
+        return bool(np.all(point >= self.min_xy - feather) and np.all(point <= self.max_xy + feather))
+
+    def in_hull(self, point: np.ndarray, feather: float = 0) -> bool:
+        return bool(distance_to_hull(point, self.hull)[0] <= feather)
+
+    def in_occupancy(self, point: np.ndarray, feather: float = 0) -> bool:
+        """Check the cells around the point, the feather grows the window."""
+        if self.occupancy is None:
+            return True
+        cells = self.occupancy.shape[0]
+        cell_size = np.maximum((self.max_xy - self.min_xy) / cells, 1e-6)
+        lo = np.floor((point - feather - self.min_xy) / cell_size).astype(int).clip(0, cells - 1)
+        hi = np.floor((point + feather - self.min_xy) / cell_size).astype(int).clip(0, cells - 1)
+        return bool(self.occupancy[lo[1]:hi[1] + 1, lo[0]:hi[0] + 1].any())
+
+    def contains(self, point: np.ndarray, feather: float = 0, tight: bool = False) -> bool:
+        """bbox reject first, then the hull, then the occupancy if tight.
+        :param point: xy in 3d space
+        :param feather: grow the shape, 3d space unit"""
+        point = np.asarray(point[:2], dtype=np.float64)
+        if self.is_empty or not self.in_bbox(point, feather):
+            return False
+        if not self.in_hull(point, feather):
+            return False
+        return not tight or self.in_occupancy(point, feather)
+
+
+def occupancy_grid(strokes: list[np.ndarray], min_xy: np.ndarray, max_xy: np.ndarray, cells: int) -> np.ndarray:
+    """Mark the cells the strokes pass through, the segments are sampled about twice per cell."""
+    grid = np.zeros((cells, cells), dtype=bool)
+    cell_size = np.maximum((max_xy - min_xy) / cells, 1e-6)
+    for co in strokes:
+        p = (co[:, :2] - min_xy) / cell_size
+        if len(p) > 1:
+            a, b = p[:-1], p[1:]
+            counts = np.ceil(np.abs(b - a).max(axis=1) * 2).astype(np.int64) + 1
+            index = np.repeat(np.arange(len(a)), counts)
+            t = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)) / np.repeat(counts, counts)
+            p = np.concatenate([a[index] + (b - a)[index] * t[:, None], p], axis=0)
+        ij = np.clip(p.astype(np.int64), 0, cells - 1)
+        grid[ij[:, 1], ij[:, 0]] = True
+    # dilate one cell, the grid is coarse and the stroke has a width
+    dilated = grid.copy()
+    dilated[1:] |= grid[:-1]
+    dilated[:-1] |= grid[1:]
+    dilated[:, 1:] |= dilated[:, :-1].copy()
+    dilated[:, :-1] |= dilated[:, 1:].copy()
+    return dilated
+
+
+class GPencilLayerHitTest:
+    """Cached hit shapes of the layers, computed once when the layer changes.
+    usage:
+    >>> shape = GPencilLayerHitTest.shape(layer)
+    >>> shape.contains(pos_3d, feather, tight=True)
+    """
+    grid_cells: ClassVar[int] = 32
+    # layer pointer: ((frame pointer, points count) of the frames in scope, shape)
+    cache: ClassVar[dict[int, tuple[tuple, LayerHitShape]]] = {}
+
+    @classmethod
+    def shape(cls, layer: bpy.types.GPencilLayer, frame_scope: Optional[GPencilFrameScope] = None) -> LayerHitShape:
+        frames = (frame_scope or GPencilFrameScope('ACTIVE')).frames(layer)
+        key = tuple((frame.as_pointer(), frame_storage(frame).point_count(frame)) for frame in frames)
+        layer_key = layer.as_pointer()
+        if (cached := cls.cache.get(layer_key)) and cached[0] == key:
+            return cached[1]
+
+        strokes = []
+        for frame in frames:
+            points, offsets = frame_storage(frame).read(frame)
+            strokes.extend(stroke for stroke in np.split(points, offsets[1:-1]) if len(stroke))
+        if not strokes:
+            shape = LayerHitShape(np.zeros(2), np.zeros(2), np.empty((0, 2)))
+        else:
+            points = np.concatenate(strokes, axis=0)[:, :2].astype(np.float64)
+            min_xy, max_xy = points.min(axis=0), points.max(axis=0)
+            shape = LayerHitShape(min_xy, max_xy, convex_hull(points),
+                                  occupancy_grid(strokes, min_xy, max_xy, cls.grid_cells))
+        cls.cache[layer_key] = (key, shape)
+        return shape
+
+    @classmethod
+    def invalidate(cls, layer: bpy.types.GPencilLayer) -> None:
+        """Remove the cached shape of the layer, call it after the points are changed."""
+        cls.cache.pop(layer.as_pointer(), None)
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        cls.cache.clear()
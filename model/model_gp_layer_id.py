@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from typing import ClassVar, Iterable, Optional
+
+import bpy
+
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
+
+# id property of the grease pencil data: the highest id ever given, it never goes down so the id of a removed layer
+# (still the key of its anchor, see model_gp_anchor) is not given to a new one
+LAST_ID_KEY = 'est_last_layer_id'
+
+
+class GPencilLayerID:
+    """Stable ids of the layers, they survive renames and reorders.
+    The id is stored in layer.pass_index, which the annotations don't use, so it is saved with the file and undone
+    with the layer. The lookups only read, the ids are given by assign, once at the start of an operator, after that
+    layer_id only reads the pass index.
+    usage:
+    >>> GPencilLayerID.assign(gp_data)
+    >>> layer_id = GPencilLayerID.layer_id(layer)
+    >>> GPencilLayerID.layer_of(gp_data, layer_id)
+    """
+    # grease pencil pointer: (layer count, layer index by id), rebuilt when the count changes or a lookup misses
+    cache: ClassVar[dict[int, tuple[int, dict[int, int]]]] = {}
+
+    @staticmethod
+    def ids(gp_data: bpy.types.GreasePencil) -> np.ndarray:
+        """The ids of the layers by index in one foreach_get, read only so it can be called when drawing."""
+        ids = np.empty(len(gp_data.layers), dtype=np.int32)
+        gp_data.layers.foreach_get('pass_index', ids)
+        return ids
+
+    @classmethod
+    def assign(cls, gp_data: bpy.types.GreasePencil) -> np.ndarray:
+        """Give a new id to the layers without a unique one.
+        A new layer has no id, a copied layer has the id of its source, the first one keeps it."""
+        ids = cls.ids(gp_data)
+        if not len(ids):
+            return ids
+        last_id = max(int(ids.max()), int(gp_data.get(LAST_ID_KEY, 0)))
+        if ids.min() <= 0 or len(np.unique(ids)) != len(ids):
+            _, first = np.unique(ids, return_index=True)
+            missing = np.setdiff1d(np.arange(len(ids)), first[ids[first] > 0])
+            ids[missing] = np.arange(last_id + 1, last_id + 1 + len(missing), dtype=np.int32)
+            last_id += len(missing)
+            gp_data.layers.foreach_set('pass_index', ids)
+            cls.invalidate(gp_data)
+        if gp_data.get(LAST_ID_KEY) != last_id:
+            gp_data[LAST_ID_KEY] = last_id
+        return ids
+
+    @classmethod
+    def _index(cls, gp_data: bpy.types.GreasePencil, rebuild: bool = False) -> dict[int, int]:
+        key = gp_data.as_pointer()
+        if rebuild or (cached := cls.cache.get(key)) is None or cached[0] != len(gp_data.layers):
+            ids = cls.ids(gp_data)
+            cached = cls.cache[key] = (len(ids), {layer_id: i for i, layer_id in enumerate(ids.tolist())})
+        return cached[1]
+
+    @classmethod
+    def layer_id(cls, layer: bpy.types.GPencilLayer) -> int:
+        """The id of the layer, given if it has none, call it where the data can be edited (operators).
+        A copied layer shares the id of its source until assign runs, the operators call it once before."""
+        if layer.pass_index <= 0:
+            cls.assign(layer.id_data)
+        return layer.pass_index
+
+    @classmethod
+    def index_of(cls, gp_data: bpy.types.GreasePencil, layer_id: int) -> Optional[int]:
+        """The index of the layer with the id, the map is rebuilt if a reorder made it stale."""
+        i = cls._index(gp_data).get(layer_id)
+        if i is not None and gp_data.layers[i].pass_index == layer_id:
+            return i
+        return cls._index(gp_data, rebuild=True).get(layer_id)
+
+    @classmethod
+    def layer_of(cls, gp_data: bpy.types.GreasePencil, layer_id: int) -> Optional[bpy.types.GPencilLayer]:
+        i = cls.index_of(gp_data, layer_id)
+        return gp_data.layers[i] if i is not None else None
+
+    @classmethod
+    def mask(cls, gp_data: bpy.types.GreasePencil, layer_ids: Iterable[int]) -> np.ndarray:
+        """Bool mask over the layer indices of the layers with the ids."""
+        return np.isin(cls.ids(gp_data), np.fromiter(layer_ids, dtype=np.int32))
+
+    @classmethod
+    def invalidate(cls, gp_data: Optional[bpy.types.GreasePencil] = None) -> None:
+        """None to clear all, after an undo / loading a file."""
+        if gp_data is None:
+            cls.cache.clear()
+        else:
+            cls.cache.pop(gp_data.as_pointer(), None)
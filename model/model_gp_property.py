@@ -1,7 +1,37 @@
+from __future__ import annotations
+
 import bpy
-import numpy as np
+from abc import ABC, abstractmethod
 from contextlib import contextmanager
 from dataclasses import dataclass
+from typing import Literal
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
+
+FrameScopeMode = Literal['ACTIVE', 'ALL', 'RANGE']
+
+
+@dataclass(slots=True)
+class GPencilFrameScope:
+    """Which frames of a layer an operation looks at.
+    ACTIVE: the frame drawn at the current scene frame, fallback to the first frame
+    ALL: every frame of the layer
+    RANGE: the frames whose frame number is in frame_range (both ends included)
+    """
+    mode: FrameScopeMode = 'ALL'
+    frame_range: tuple[int, int] = (0, 0)
+
+    def frames(self, layer: bpy.types.GPencilLayer) -> list[bpy.types.GPencilFrame]:
+        """Return the frames of the layer in this scope."""
+        if not layer.frames:
+            return []
+        if self.mode == 'ACTIVE':
+            return [layer.active_frame or layer.frames[0]]
+        elif self.mode == 'RANGE':
+            start, end = self.frame_range
+            return [frame for frame in layer.frames if start <= frame.frame_number <= end]
+        return list(layer.frames)
 
 
 class GPencilStroke:
@@ -20,6 +50,140 @@ class GPencilStroke:
         return points.reshape((len(stroke.points), 3))
 
 
+class GPencilFrameStorage(ABC):
+    """Bulk access to the points of a frame, every point of the frame in one array.
+    The backend is picked by the frame, see frame_storage:
+    LegacyFrameStorage: annotations / legacy grease pencil, one foreach_get / foreach_set per stroke
+    AttributeFrameStorage: grease pencil v3 drawings, the position attribute in one call
+    The backends are used as classes, never instantiated, so a backend missing a method fails when it is defined.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        missing = sorted(name for base in cls.__bases__ for name in getattr(base, '__abstractmethods__', ())
+                         if getattr(getattr(cls, name, None), '__isabstractmethod__', False))
+        if missing:
+            raise TypeError(f'{cls.__name__} does not implement {", ".join(missing)}')
+
+    @staticmethod
+    @abstractmethod
+    def point_count(frame: bpy.types.GPencilFrame) -> int:
+        ...
+
+    @staticmethod
+    @abstractmethod
+    def stroke_count(frame: bpy.types.GPencilFrame) -> int:
+        ...
+
+    @staticmethod
+    @abstractmethod
+    def read(frame: bpy.types.GPencilFrame) -> tuple[np.ndarray, np.ndarray]:
+        """:return: points Nx3 float32, offsets of the strokes (strokes + 1),
+        the points of stroke i are points[offsets[i]:offsets[i + 1]]"""
+
+    @staticmethod
+    @abstractmethod
+    def write(frame: bpy.types.GPencilFrame, points: np.ndarray) -> None:
+        """Write all the points of the frame, same count and order as read."""
+
+    @staticmethod
+    @abstractmethod
+    def sample(frame: bpy.types.GPencilFrame, count: int) -> np.ndarray:
+        """A few points spread over the frame, cheaper than read, to tell if the points moved.
+        :return: points Mx3 float32, M <= count * 2"""
+
+
+class LegacyFrameStorage(GPencilFrameStorage):
+
+    @staticmethod
+    def point_count(frame: bpy.types.GPencilFrame) -> int:
+        return sum(len(stroke.points) for stroke in frame.strokes)
+
+    @staticmethod
+    def stroke_count(frame: bpy.types.GPencilFrame) -> int:
+        return len(frame.strokes)
+
+    @staticmethod
+    def offsets(frame: bpy.types.GPencilFrame) -> np.ndarray:
+        return np.concatenate([[0], np.cumsum([len(stroke.points) for stroke in frame.strokes], dtype=np.int64)])
+
+    @staticmethod
+    def read(frame: bpy.types.GPencilFrame) -> tuple[np.ndarray, np.ndarray]:
+        offsets = LegacyFrameStorage.offsets(frame)
+        co = np.empty(int(offsets[-1]) * 3, dtype=np.float32)
+        for stroke, start, end in zip(frame.strokes, offsets[:-1], offsets[1:]):
+            stroke.points.foreach_get('co', co[start * 3:end * 3])
+        return co.reshape(-1, 3), offsets
+
+    @staticmethod
+    def write(frame: bpy.types.GPencilFrame, points: np.ndarray) -> None:
+        co = np.ascontiguousarray(points, dtype=np.float32).ravel()
+        offsets = LegacyFrameStorage.offsets(frame)
+        for stroke, start, end in zip(frame.strokes, offsets[:-1], offsets[1:]):
+            stroke.points.foreach_set('co', co[start * 3:end * 3])
+
+    @staticmethod
+    def sample(frame: bpy.types.GPencilFrame, count: int) -> np.ndarray:
+        """The first and last point of up to count strokes, one foreach_get per sampled stroke."""
+        strokes = frame.strokes
+        if not len(strokes):
+            return np.empty((0, 3), dtype=np.float32)
+        indices = np.unique(np.linspace(0, len(strokes) - 1, min(count, len(strokes))).astype(np.int64))
+        co = []
+        for i in indices.tolist():
+            if not (points := strokes[i].points): continue
+            stroke_co = np.empty(len(points) * 3, dtype=np.float32)
+            points.foreach_get('co', stroke_co)
+            co.append(stroke_co.reshape(-1, 3)[[0, -1]])
+        return np.concatenate(co) if co else np.empty((0, 3), dtype=np.float32)
+
+
+class AttributeFrameStorage(GPencilFrameStorage):
+
+    @staticmethod
+    def point_count(frame: bpy.types.GPencilFrame) -> int:
+        position = frame.drawing.attributes.get('position')
+        return len(position.data) if position else 0
+
+    @staticmethod
+    def stroke_count(frame: bpy.types.GPencilFrame) -> int:
+        return max(len(frame.drawing.curve_offsets) - 1, 0)
+
+    @staticmethod
+    def read(frame: bpy.types.GPencilFrame) -> tuple[np.ndarray, np.ndarray]:
+        drawing = frame.drawing
+        count = AttributeFrameStorage.point_count(frame)
+        co = np.empty(count * 3, dtype=np.float32)
+        if count:
+            drawing.attributes['position'].data.foreach_get('vector', co)
+        offsets = np.empty(len(drawing.curve_offsets), dtype=np.int32)
+        drawing.curve_offsets.foreach_get('value', offsets)
+        return co.reshape(-1, 3), offsets.astype(np.int64) if len(offsets) else np.zeros(1, dtype=np.int64)
+
+    @staticmethod
+    def write(frame: bpy.types.GPencilFrame, points: np.ndarray) -> None:
+        drawing = frame.drawing
+        if not len(points): return
+        co = np.ascontiguousarray(points, dtype=np.float32).ravel()
+        drawing.attributes['position'].data.foreach_set('vector', co)
+        drawing.tag_positions_changed()
+
+    @staticmethod
+    def sample(frame: bpy.types.GPencilFrame, count: int) -> np.ndarray:
+        """count * 2 points evenly spaced in the position attribute, read in one foreach_get."""
+        if not (total := AttributeFrameStorage.point_count(frame)):
+            return np.empty((0, 3), dtype=np.float32)
+        co = np.empty(total * 3, dtype=np.float32)
+        frame.drawing.attributes['position'].data.foreach_get('vector', co)
+        indices = np.unique(np.linspace(0, total - 1, min(count * 2, total)).astype(np.int64))
+        return co.reshape(-1, 3)[indices]
+
+
+def frame_storage(frame: bpy.types.GPencilFrame) -> type[GPencilFrameStorage]:
+    """Grease pencil v3 frames have a drawing with attributes, annotations still have strokes."""
+    return AttributeFrameStorage if hasattr(frame, 'drawing') else LegacyFrameStorage
+
+
 @dataclass
 class GreasePencilProperty:
     """Grease Pencil Property, a base class for grease pencil data get/set"""
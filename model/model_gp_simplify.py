@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import ClassVar, Callable
+
+import bpy
+
+from .model_gp_property import GPencilStroke
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
+
+
+def rdp_mask(points: np.ndarray, epsilon: float) -> np.ndarray:
+    """Ramer–Douglas–Peucker simplification on the xy of the points.
+    :param points: Nx2 or Nx3 array
+    :param epsilon: max distance between the removed points and the simplified line
+    :return: bool mask of the points to keep, the first and the last point are always kept"""
+    n = len(points)
+    mask = np.ones(n, dtype=bool)
+    if n < 3 or epsilon <= 0:
+        return mask
+
+    xy = points[:, :2].astype(np.float64)
+    mask[1:-1] = False
+    stack: list[tuple[int, int]] = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a = xy[start]
+        d = xy[end] - a
+        seg = xy[start + 1:end] - a
+        length = np.hypot(d[0], d[1])
+        if length == 0:  # closed stroke, first point is the last point
+            dist = np.hypot(seg[:, 0], seg[:, 1])
+        else:
+            dist = np.abs(d[0] * seg[:, 1] - d[1] * seg[:, 0]) / length
+        i = int(np.argmax(dist))
+        if dist[i] > epsilon:
+            index = start + 1 + i
+            mask[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    return mask
+
+
+@dataclass(slots=True)
+class StrokeData:
+    """Full resolution data of a stroke."""
+    co: np.ndarray
+    pressure: np.ndarray
+    strength: np.ndarray
+
+    def __len__(self):
+        return len(self.co)
+
+
+class SimplifyGreasePencilStroke(GPencilStroke):
+    """Reduce / restore the points of the strokes, keep the pressure and strength of the kept points."""
+    # copied to the rebuilt stroke, the points are written from the data
+    stroke_properties: ClassVar[tuple[str, ...]] = ('display_mode', 'line_width', 'use_cyclic', 'material_index',
+                                                     'start_cap_mode', 'end_cap_mode', 'hardness', 'select')
+
+    @staticmethod
+    def read_stroke(stroke: bpy.types.GPencilStroke) -> StrokeData:
+        count = len(stroke.points)
+        pressure = np.empty(count, dtype='f')
+        strength = np.empty(count, dtype='f')
+        stroke.points.foreach_get('pressure', pressure)
+        stroke.points.foreach_get('strength', strength)
+        return StrokeData(GPencilStroke.get_stroke_points(stroke), pressure, strength)
+
+    @classmethod
+    def write_stroke(cls, frame: bpy.types.GPencilFrame, stroke: bpy.types.GPencilStroke,
+                     data: StrokeData) -> bpy.types.GPencilStroke:
+        """Write the data to the stroke, the points count of the stroke is changed to fit the data.
+        The points of a stroke can only be removed one by one, so a stroke with too many points is rebuilt:
+        a new stroke with the exact count replaces it, at the end of the frame.
+        :return: the stroke holding the data, the given one or the new one"""
+        count = len(stroke.points)
+        if count > len(data):
+            new_stroke = frame.strokes.new()
+            for name in cls.stroke_properties:
+                if hasattr(stroke, name):
+                    setattr(new_stroke, name, getattr(stroke, name))
+            new_stroke.points.add(len(data))
+            frame.strokes.remove(stroke)
+            stroke = new_stroke
+        elif count < len(data):
+            stroke.points.add(len(data) - count)
+        stroke.points.foreach_set('co', data.co.ravel())
+        stroke.points.foreach_set('pressure', data.pressure)
+        stroke.points.foreach_set('strength', data.strength)
+        return stroke
+
+    @classmethod
+    def simplify_stroke(cls, frame: bpy.types.GPencilFrame, stroke: bpy.types.GPencilStroke, epsilon: float) -> int:
+        """Simplify the stroke, a simplified stroke is rebuilt at the end of the frame, see write_stroke.
+        :return: the number of removed points"""
+        data = cls.read_stroke(stroke)
+        mask = rdp_mask(data.co, epsilon)
+        if mask.all():
+            return 0
+        cls.write_stroke(frame, stroke, StrokeData(data.co[mask], data.pressure[mask], data.strength[mask]))
+        return len(mask) - int(mask.sum())
+
+
+@dataclass
+class GPencilLayerLOD(SimplifyGreasePencilStroke):
+    """Multi resolution copies of dense strokes.
+    The masks of every level are cached per stroke, so a dense note is only simplified once.
+    Use begin_proxy to write a coarse copy to the strokes of a layer for interactive edits,
+    then commit_proxy to write the full resolution back with the transform that was applied to the proxy.
+    """
+    # tolerance of every level, in 3d space, the last one is the coarsest
+    levels: tuple[float, ...] = (1.0, 4.0, 16.0)
+    # one group per layer: [(frame, stroke, full resolution data, mask of the proxy)]
+    groups: list[list[tuple[bpy.types.GPencilFrame, bpy.types.GPencilStroke, StrokeData, np.ndarray]]] = field(default_factory=list)
+    # stroke pointer: (points count, masks of every level)
+    mask_cache: ClassVar[dict[int, tuple[int, list[np.ndarray]]]] = {}
+
+    def level_masks(self, stroke: bpy.types.GPencilStroke, co: np.ndarray) -> list[np.ndarray]:
+        key = stroke.as_pointer()
+        if (cached := self.mask_cache.get(key)) and cached[0] == len(co):
+            return cached[1]
+        masks = [rdp_mask(co, epsilon) for epsilon in self.levels]
+        self.mask_cache[key] = (len(co), masks)
+        return masks
+
+    @classmethod
+    def invalidate(cls, layer: bpy.types.GPencilLayer) -> None:
+        """Remove the cached masks of the strokes of the layer, call it after the points are changed."""
+        for frame in layer.frames:
+            for stroke in getattr(frame, 'strokes', ()):
+                cls.mask_cache.pop(stroke.as_pointer(), None)
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        cls.mask_cache.clear()
+
+    def begin_proxy(self, frames: list[bpy.types.GPencilFrame], max_points: int) -> bool:
+        """Write the finest level that fits in max_points to the strokes of the frames (of one layer).
+        :return: True if a proxy is written"""
+        strokes = [(frame, stroke) for frame in frames for stroke in frame.strokes]
+        if sum(len(stroke.points) for _, stroke in strokes) <= max_points:
+            return False
+
+        data = [self.read_stroke(stroke) for _, stroke in strokes]
+        masks = [self.level_masks(stroke, d.co) for (_, stroke), d in zip(strokes, data)]
+        level = len(self.levels) - 1
+        for i in range(len(self.levels)):
+            if sum(int(m[i].sum()) for m in masks) <= max_points:
+                level = i
+                break
+
+        group = []
+        for (frame, stroke), d, stroke_masks in zip(strokes, data, masks):
+            mask = stroke_masks[level]
+            if not mask.all():
+                key = stroke.as_pointer()
+                stroke = self.write_stroke(frame, stroke, StrokeData(d.co[mask], d.pressure[mask], d.strength[mask]))
+                # the rebuilt stroke gets the full resolution back on commit, its masks are still valid
+                self.mask_cache[stroke.as_pointer()] = self.mask_cache.pop(key)
+            group.append((frame, stroke, d, mask))
+        self.groups.append(group)
+        return True
+
+    def has_proxy(self) -> bool:
+        return bool(self.groups)
+
+    def commit_proxy(self, fit_affine: Callable[[np.ndarray, np.ndarray], np.ndarray]) -> None:
+        """Write the full resolution back to the strokes.
+        The transform is fitted on all the proxy points of a layer, then applied to the full resolution points.
+        :param fit_affine: function(src, dst) -> 3x2 matrix, see EditGreasePencilLayer.fit_affine"""
+        for group in self.groups:
+            try:
+                proxy_co = [self.get_stroke_points(stroke) for _, stroke, _, _ in group]
+            except ReferenceError:  # strokes removed, e.g. undo
+                continue
+            if any(len(co) != int(mask.sum()) for co, (_, _, _, mask) in zip(proxy_co, group)):
+                continue
+            src = np.concatenate([data.co[mask] for _, _, data, mask in group], axis=0)
+            matrix = fit_affine(src, np.concatenate(proxy_co, axis=0))
+            for co_proxy, (frame, stroke, data, mask) in zip(proxy_co, group):
+                if mask.all():
+                    continue
+                co = data.co.copy()
+                co[:, :2] = co[:, :2] @ matrix[:2] + matrix[2]
+                co[mask] = co_proxy  # keep the exact position of the proxy points
+                self.write_stroke(frame, stroke, StrokeData(co, data.pressure, data.strength))
+        self.groups.clear()
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import ClassVar, Optional
+
+import bpy
+
+from .model_gp_exchange import GreasePencilExchange, GreasePencilExchangeData
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
+
+# hidden data-block that holds one layer per template, saved with the file
+TEMPLATE_LIBRARY_NAME = '.EST_Templates'
+# id property of the library: template name: {'size': (width, height), 'points': count}
+TEMPLATE_INDEX_KEY = 'est_templates'
+
+
+def rasterize_strokes(data: GreasePencilExchangeData, size: int) -> np.ndarray:
+    """Draw the strokes of the data to a size x size RGBA image, fit and centered.
+    :return: flat float32 pixels, bottom to top as blender images"""
+    pixels = np.zeros((size, size, 4), dtype=np.float32)
+    xy = np.asarray(data.co[:, :2], dtype=np.float64)
+    if not len(xy):
+        return pixels.ravel()
+
+    lo, hi = xy.min(axis=0), xy.max(axis=0)
+    scale = (size - 3) / max(float((hi - lo).max()), 1e-6)
+    p = (xy - lo) * scale + 1 + ((size - 3) - (hi - lo) * scale) / 2
+
+    # sample every segment with about one sample per pixel, no segment between two strokes
+    a, b = p[:-1], p[1:]
+    valid = np.ones(len(a), dtype=bool)
+    ends = data.stroke_offsets[1:-1].astype(np.int64) - 1
+    valid[ends[(ends >= 0) & (ends < len(a))]] = False
+    a, b = a[valid], b[valid]
+    counts = np.ceil(np.linalg.norm(b - a, axis=1)).astype(np.int64) + 1
+    index = np.repeat(np.arange(len(a)), counts)
+    t = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)) / np.repeat(counts, counts)
+    samples = np.concatenate([a[index] + (b - a)[index] * t[:, None], p], axis=0)
+
+    ij = np.clip(samples.astype(np.int64), 0, size - 1)
+    color = data.layers['color'][0] if len(data.layers) else (1, 1, 1)
+    pixels[ij[:, 1], ij[:, 0]] = (*color, 1.0)
+    return pixels.ravel()
+
+
+@dataclass(slots=True)
+class GPencilTemplate:
+    """A decoded template, the points are centered on the origin (3d space)."""
+    name: str
+    data: GreasePencilExchangeData
+    # pointer of the library layer when decoded, used to detect a stale cache after loading another file
+    key: tuple[int, int]
+
+
+class GPencilTemplateLibrary:
+    """Reusable notes stored in a hidden grease pencil data, placed by copying the cached stroke arrays.
+    usage:
+    GPencilTemplateLibrary.add(gp_data, gp_data.layers.active, 'Arrow')
+    GPencilTemplateLibrary.place('Arrow', other_gp_data, location, scale=2)
+    """
+    max_cached: ClassVar[int] = 32
+    thumbnail_size: ClassVar[int] = 64
+    # template name: decoded template, least recently used first
+    cache: ClassVar[OrderedDict[str, GPencilTemplate]] = OrderedDict()
+    pv_coll: ClassVar[dict] = {}
+    # template name: key of the template when the thumbnail is drawn
+    thumbnail_keys: ClassVar[dict[str, tuple[int, int]]] = {}
+
+    @staticmethod
+    def library(create: bool = False) -> Optional[bpy.types.GreasePencil]:
+        library = bpy.data.grease_pencils.get(TEMPLATE_LIBRARY_NAME)
+        if library is None and create:
+            library = bpy.data.grease_pencils.new(TEMPLATE_LIBRARY_NAME)
+            library.use_fake_user = True
+            library[TEMPLATE_INDEX_KEY] = {}
+        return library
+
+    @classmethod
+    def index(cls) -> dict[str, dict]:
+        if not (library := cls.library()):
+            return {}
+        index = library.get(TEMPLATE_INDEX_KEY)
+        return index.to_dict() if index else {}
+
+    @classmethod
+    def names(cls) -> list[str]:
+        return list(cls.index().keys())
+
+    @classmethod
+    def add(cls, gp_data: bpy.types.GreasePencil, layer: bpy.types.GPencilLayer, name: str) -> str:
+        """Store a copy of the layer as a template, the points are moved to be centered on the origin.
+        :return: the name of the template, the name is changed if it exists"""
+        data = GreasePencilExchange.pack(gp_data, [layer])
+        if not len(data.co):
+            raise ValueError('The layer is empty')
+        lo, hi = data.co[:, :2].min(axis=0), data.co[:, :2].max(axis=0)
+        matrix = np.array([[1, 0], [0, 1], -(lo + hi) / 2], dtype='f')
+        data.layers['name'] = name.encode('utf-8')[:data.layers.dtype['name'].itemsize]
+
+        library = cls.library(create=True)
+        new_layer = GreasePencilExchange.unpack(data, library, matrix)[0]
+        index = library[TEMPLATE_INDEX_KEY]
+        index[new_layer.info] = {'size': (hi - lo).tolist(), 'points': len(data.co)}
+        cls.cache.pop(new_layer.info, None)
+        return new_layer.info
+
+    @classmethod
+    def remove(cls, name: str):
+        if not (library := cls.library()):
+            return
+        if layer := library.layers.get(name):
+            library.layers.remove(layer)
+        if name in library[TEMPLATE_INDEX_KEY]:
+            del library[TEMPLATE_INDEX_KEY][name]
+        cls.cache.pop(name, None)
+
+    @classmethod
+    def _key(cls, name: str) -> Optional[tuple[int, int]]:
+        if not (library := cls.library()) or not (layer := library.layers.get(name)):
+            return None
+        return library.as_pointer(), layer.as_pointer()
+
+    @classmethod
+    def get(cls, name: str) -> Optional[GPencilTemplate]:
+        """Return the decoded template, decode it if not in the cache."""
+        if (key := cls._key(name)) is None:
+            cls.cache.pop(name, None)
+            return None
+        if (template := cls.cache.get(name)) and template.key == key:
+            cls.cache.move_to_end(name)
+            return template
+
+        library = cls.library()
+        template = GPencilTemplate(name, GreasePencilExchange.pack(library, [library.layers[name]]), key)
+        cls.cache[name] = template
+        while len(cls.cache) > cls.max_cached:
+            cls.cache.popitem(last=False)
+        return template
+
+    @classmethod
+    def place(cls, name: str, gp_data: bpy.types.GreasePencil, location: np.ndarray,
+              scale: float = 1.0) -> Optional[bpy.types.GPencilLayer]:
+        """Copy the template to a new layer of the grease pencil data.
+        :param location: center of the new layer (3d space)
+        :param scale: uniform scale of the template
+        :return: the new layer"""
+        if not (template := cls.get(name)):
+            return None
+        matrix = np.array([[scale, 0], [0, scale], location[:2]], dtype='f')
+        return GreasePencilExchange.unpack(template.data, gp_data, matrix)[0]
+
+    @classmethod
+    def get_icon_id(cls, name: str) -> int:
+        """Return the icon id of the thumbnail of the template, the thumbnail is drawn the first time."""
+        if (pcoll := cls.pv_coll.get('est_template_pv')) is None:
+            from bpy.utils import previews
+            pcoll = cls.pv_coll['est_template_pv'] = previews.new()
+        if (key := cls._key(name)) is None:
+            return 0
+
+        preview = pcoll.get(name) or pcoll.new(name)
+        if cls.thumbnail_keys.get(name) != key:
+            cls.thumbnail_keys[name] = key
+            data = cls.get(name).data
+            size = cls.thumbnail_size
+            preview.image_size = (size, size)
+            preview.image_pixels_float.foreach_set(rasterize_strokes(data, size))
+            preview.icon_size = (size // 2, size // 2)
+            preview.icon_pixels_float.foreach_set(rasterize_strokes(data, size // 2))
+        return preview.icon_id
+
+    @classmethod
+    def clear_cache(cls):
+        """The templates are decoded again and the thumbnails drawn again when used."""
+        cls.cache.clear()
+        cls.thumbnail_keys.clear()
+
+    @classmethod
+    def unregister_icon(cls):
+        from bpy.utils import previews
+        for pcoll in cls.pv_coll.values():
+            previews.remove(pcoll)
+        cls.pv_coll.clear()
+        cls.thumbnail_keys.clear()
+        cls.cache.clear()
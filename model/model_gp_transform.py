@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import ClassVar, Optional, Sequence
+
+import bpy
+
+from .model_gp_hull import convex_hull
+from .model_gp_property import frame_storage
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
+
+
+def affine_translation(v: Sequence[float]) -> np.ndarray:
+    """3x2 affine matrix, row vector convention: p' = p @ m[:2] + m[2]"""
+    return np.array([[1, 0], [0, 1], [v[0], v[1]]], dtype=np.float64)
+
+
+def affine_linear(linear: np.ndarray, pivot: Sequence[float]) -> np.ndarray:
+    """3x2 affine matrix of a 2x2 linear part applied around the pivot."""
+    pivot = np.asarray(pivot[:2], dtype=np.float64)
+    return np.vstack([linear, pivot - pivot @ linear])
+
+
+def affine_rotation(angle: float, pivot: Sequence[float]) -> np.ndarray:
+    """Clockwise rotation around the pivot (row vectors: (1, 0) at 90 degrees is (0, -1)),
+    the rotation of the annotation is stored inverted in layer.rotation[2], see rotate_layer."""
+    c, s = np.cos(angle), np.sin(angle)
+    return affine_linear(np.array([[c, -s], [s, c]]), pivot)
+
+
+def affine_scale(scale: Sequence[float], pivot: Sequence[float], angle: float = 0) -> np.ndarray:
+    """Scale around the pivot, along the axes rotated by the angle (the local axes of a rotated layer)."""
+    linear = np.diag([scale[0], scale[1]]).astype(np.float64)
+    if angle:
+        c, s = np.cos(angle), np.sin(angle)
+        rotate = np.array([[c, -s], [s, c]])
+        linear = rotate @ linear @ rotate.T
+    return affine_linear(linear, pivot)
+
+
+def affine_compose(first: np.ndarray, then: np.ndarray) -> np.ndarray:
+    """The 3x2 matrix of applying first, then the other one."""
+    return np.vstack([first[:2] @ then[:2], first[2] @ then[:2] + then[2]])
+
+
+@dataclass(slots=True)
+class PendingTransform:
+    """The transform of a layer that is not written to the points yet, 3d space."""
+    layer_name: str
+    # hide state of the layer before, the layer is hidden and drawn by the overlay while the transform is pending
+    hide: bool
+    frames: list[bpy.types.GPencilFrame]
+    # per frame: xy of the points when the transform began, index of the first point of every stroke
+    points: list[np.ndarray]
+    offsets: list[np.ndarray]
+    # per frame: convex hull of the points, made on the first extents query, the extents of the transformed
+    # points are the extents of the transformed hull
+    hulls: list[Optional[np.ndarray]] = field(default_factory=list)
+    matrix: np.ndarray = field(default_factory=lambda: affine_translation((0, 0)))
+    # drawing data of the overlay: the displayed frame, the look of the layer, the batch filled by the view
+    active: int = 0
+    color: tuple[float, float, float, float] = (1, 1, 1, 1)
+    thickness: int = 1
+    batch: object = None
+
+
+class GPencilLayerTransform:
+    """Transform the layers by composing a 3x2 matrix, the points are written once by bake.
+    A move / rotate / scale while dragging is then a matrix product instead of a write of every point.
+    The annotations of the node editor do not draw the layer location / rotation / scale channels,
+    so the layer is hidden while the transform is pending and the overlay draws the points with the matrix.
+    usage:
+    >>> GPencilLayerTransform.begin(layer, frames)
+    >>> GPencilLayerTransform.apply(layer, affine_translation((10, 0)))
+    >>> GPencilLayerTransform.bake(layer, edit_layer.affine_layer)
+    """
+    # layer pointer: pending transform
+    pending: ClassVar[dict[int, PendingTransform]] = {}
+    # frame pointer: (layer pointer, index of the frame in the pending transform)
+    frame_index: ClassVar[dict[int, tuple[int, int]]] = {}
+
+    @classmethod
+    def has(cls, layer: bpy.types.GPencilLayer) -> bool:
+        return layer.as_pointer() in cls.pending
+
+    @classmethod
+    def begin(cls, layer: bpy.types.GPencilLayer, frames: list[bpy.types.GPencilFrame]) -> None:
+        """Read the points of the frames once and hide the layer."""
+        if cls.has(layer): return
+        points, offsets = [], []
+        for i, frame in enumerate(frames):
+            co, stroke_offsets = frame_storage(frame).read(frame)
+            points.append(co[:, :2].astype(np.float64))
+            offsets.append(stroke_offsets[:-1])
+            cls.frame_index[frame.as_pointer()] = (layer.as_pointer(), i)
+        frames = list(frames)
+        active = frames.index(layer.active_frame) if layer.active_frame in frames else 0
+        cls.pending[layer.as_pointer()] = PendingTransform(
+            layer.info, layer.hide, frames, points, offsets, active=active,
+            color=(*layer.color, layer.annotation_opacity), thickness=layer.thickness)
+        layer.hide = True
+
+    @classmethod
+    def apply(cls, layer: bpy.types.GPencilLayer, matrix: np.ndarray) -> None:
+        pending = cls.pending[layer.as_pointer()]
+        pending.matrix = affine_compose(pending.matrix, matrix)
+
+    @classmethod
+    def frame_points(cls, frame: bpy.types.GPencilFrame) -> Optional[np.ndarray]:
+        """The xy of the points of the frame with the pending transform, None if the frame has none."""
+        if (index := cls.frame_index.get(frame.as_pointer())) is None:
+            return None
+        pending = cls.pending[index[0]]
+        points = pending.points[index[1]]
+        return points @ pending.matrix[:2] + pending.matrix[2]
+
+    @classmethod
+    def frame_hull(cls, frame: bpy.types.GPencilFrame) -> Optional[np.ndarray]:
+        """The convex hull of the points of the frame with the pending transform, None if the frame has none.
+        The hull is made once per transform, a query is then a product of a few points whatever the points count."""
+        if (index := cls.frame_index.get(frame.as_pointer())) is None:
+            return None
+        pending = cls.pending[index[0]]
+        if not pending.hulls:
+            pending.hulls = [None] * len(pending.points)
+        if (hull := pending.hulls[index[1]]) is None:
+            hull = pending.hulls[index[1]] = convex_hull(pending.points[index[1]])
+        return hull @ pending.matrix[:2] + pending.matrix[2]
+
+    @classmethod
+    def bake(cls, layer: bpy.types.GPencilLayer, affine_layer) -> None:
+        """Write the pending transform to the points in one pass per stroke and show the layer again.
+        :param affine_layer: EditGreasePencilLayer.affine_layer"""
+        if (pending := cls.pending.pop(layer.as_pointer(), None)) is None: return
+        for frame in pending.frames:
+            cls.frame_index.pop(frame.as_pointer(), None)
+        if not np.allclose(pending.matrix, affine_translation((0, 0))):
+            affine_layer(layer, pending.matrix, frames=pending.frames)
+        layer.hide = pending.hide
+
+    @classmethod
+    def bake_all(cls, gp_data: bpy.types.GreasePencil, affine_layer) -> None:
+        for layer in gp_data.layers:
+            cls.bake(layer, affine_layer)
+
+    @classmethod
+    def clear(cls) -> None:
+        """Drop the pending transforms without writing them, when the layers are gone (loading a file)."""
+        cls.pending.clear()
+        cls.frame_index.clear()
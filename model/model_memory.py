@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import functools
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import FunctionType, MethodType, ModuleType
+from typing import Any, Callable, ClassVar, Iterable, Iterator, Optional
+
+import bpy
+
+from .model_gp_property import frame_storage
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
+
+ADDON_DIR = Path(__file__).parent.parent
+
+
+def deep_sizeof(obj: Any, seen: Optional[set[int]] = None, depth: int = 12) -> int:
+    """Bytes held by the object and what it refers to: numpy buffers, containers, dataclasses / instances.
+    Only the python wrapper of the blender data is counted, functions and classes are not counted."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen or isinstance(obj, (type, ModuleType, FunctionType, MethodType, functools.partial)):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if depth <= 0 or isinstance(obj, (str, bytes, int, float, bool, bpy.types.bpy_struct)):
+        return size
+    if isinstance(obj, np.ndarray):
+        # the buffer is in the size of the array that owns it
+        return size + (deep_sizeof(obj.base, seen, depth - 1) if obj.base is not None else 0)
+    if isinstance(obj, dict):
+        return size + sum(deep_sizeof(key, seen, depth - 1) + deep_sizeof(value, seen, depth - 1)
+                          for key, value in list(obj.items()))
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_sizeof(item, seen, depth - 1) for item in list(obj))
+    for attr in getattr(type(obj), '__slots__', ()):
+        size += deep_sizeof(getattr(obj, attr, None), seen, depth - 1)
+    if hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), seen, depth - 1)
+    return size
+
+
+def preview_bytes(pcolls: Iterable[bpy.types.ImagePreviewCollection]) -> int:
+    """Pixels of the previews, RGBA 8 bits of the image and the icon."""
+    size = 0
+    for pcoll in pcolls:
+        for preview in pcoll.values():
+            width, height = preview.image_size
+            icon_width, icon_height = preview.icon_size
+            size += (width * height + icon_width * icon_height) * 4
+    return size
+
+
+@dataclass(slots=True)
+class LayerStats:
+    name: str
+    frames: int
+    strokes: int
+    points: int
+
+
+@dataclass(slots=True)
+class GPencilDataStats:
+    name: str
+    users: int
+    layers: list[LayerStats]
+
+    @property
+    def strokes(self) -> int:
+        return sum(layer.strokes for layer in self.layers)
+
+    @property
+    def points(self) -> int:
+        return sum(layer.points for layer in self.layers)
+
+    @classmethod
+    def from_data(cls, gp_data: bpy.types.GreasePencil) -> 'GPencilDataStats':
+        layers = []
+        for layer in gp_data.layers:
+            strokes = points = 0
+            for frame in layer.frames:
+                storage = frame_storage(frame)
+                strokes += storage.stroke_count(frame)
+                points += storage.point_count(frame)
+            layers.append(LayerStats(layer.info, len(layer.frames), strokes, points))
+        return cls(gp_data.name, gp_data.users, layers)
+
+
+@dataclass
+class MemoryReport:
+    data: list[GPencilDataStats] = field(default_factory=list)
+    # source name: bytes
+    sources: dict[str, int] = field(default_factory=dict)
+    # subsystem: (calls, bytes retained, max peak bytes), see MemoryAccounting.trace
+    traced: dict[str, tuple[int, int, int]] = field(default_factory=dict)
+    # file of the add-on: (bytes, blocks) allocated and still alive
+    top_files: list[tuple[str, int, int]] = field(default_factory=list)
+
+    def lines(self, max_layers: int = 20) -> list[str]:
+        lines = ['Grease pencil data']
+        for stats in sorted(self.data, key=lambda s: s.points, reverse=True):
+            lines.append(f'  {stats.name}: {len(stats.layers)} layers, {stats.strokes} strokes, '
+                         f'{stats.points} points, {stats.users} users')
+            for layer in sorted(stats.layers, key=lambda s: s.points, reverse=True)[:max_layers]:
+                lines.append(f'    {layer.name}: {layer.frames} frames, {layer.strokes} strokes, {layer.points} points')
+        lines.append(f'Add-on memory: {format_bytes(sum(self.sources.values()))}')
+        for name, size in sorted(self.sources.items(), key=lambda item: item[1], reverse=True):
+            lines.append(f'  {name}: {format_bytes(size)}')
+        if self.traced:
+            lines.append('Traced operators: calls, retained, peak')
+            for name, (calls, retained, peak) in sorted(self.traced.items(), key=lambda item: -item[1][1]):
+                lines.append(f'  {name}: {calls}, {format_bytes(retained)}, {format_bytes(peak)}')
+        if self.top_files:
+            lines.append('Alive allocations of the add-on files')
+            for filename, size, count in self.top_files:
+                lines.append(f'  {filename}: {format_bytes(size)} in {count} blocks')
+        return lines
+
+
+def format_bytes(size: int) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GB'
+
+
+class MemoryAccounting:
+    """How big the notes are and how much memory the add-on holds.
+    The holders of memory (caches, previews, sessions...) are registered with a function returning their content,
+    the content is sized by deep_sizeof unless a sizer is given.
+    With tracing on, tracemalloc measures what the traced operator entry points allocate and keep.
+    usage:
+    >>> MemoryAccounting.register('bbox', lambda: CalcBBox.frame_cache)
+    >>> with MemoryAccounting.trace('transform'):
+    ...     ...
+    >>> MemoryAccounting.report().lines()
+    """
+    # name: (content getter, sizer)
+    sources: ClassVar[dict[str, tuple[Callable[[], Any], Callable[[Any], int]]]] = {}
+    # subsystem: [calls, bytes retained, max peak bytes]
+    traced: ClassVar[dict[str, list[int]]] = {}
+    last_report: ClassVar[Optional[MemoryReport]] = None
+
+    @classmethod
+    def register(cls, name: str, content: Callable[[], Any], sizer: Callable[[Any], int] = deep_sizeof) -> None:
+        cls.sources[name] = (content, sizer)
+
+    @classmethod
+    def unregister(cls, name: str) -> None:
+        cls.sources.pop(name, None)
+
+    @classmethod
+    def source_bytes(cls) -> dict[str, int]:
+        """Every source is sized on its own, an object shared by two sources is counted in both."""
+        return {name: sizer(content()) for name, (content, sizer) in cls.sources.items()}
+
+    @staticmethod
+    def is_tracing() -> bool:
+        return tracemalloc.is_tracing()
+
+    @classmethod
+    def start_tracing(cls, frames: int = 1) -> None:
+        cls.traced.clear()
+        tracemalloc.start(frames)
+
+    @classmethod
+    def stop_tracing(cls) -> None:
+        tracemalloc.stop()
+
+    @classmethod
+    @contextmanager
+    def trace(cls, subsystem: str) -> Iterator[None]:
+        """Measure a block of an operator entry point, a check of a flag when not tracing.
+        A context manager and not a decorator: blender checks the argument count of the operator methods.
+        A nested block resets the peak of the outer one."""
+        if not tracemalloc.is_tracing():
+            yield
+            return
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            stats = cls.traced.setdefault(subsystem, [0, 0, 0])
+            stats[0] += 1
+            stats[1] += current - before
+            stats[2] = max(stats[2], peak - before)
+
+    @staticmethod
+    def top_files(limit: int = 10) -> list[tuple[str, int, int]]:
+        """The files of the add-on that allocated the memory still alive, by size."""
+        if not tracemalloc.is_tracing():
+            return []
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(True, f'{ADDON_DIR}*')])
+        return [(Path(stat.traceback[0].filename).relative_to(ADDON_DIR).as_posix(), stat.size, stat.count)
+                for stat in snapshot.statistics('filename')[:limit]]
+
+    @classmethod
+    def report(cls) -> MemoryReport:
+        cls.last_report = MemoryReport(
+            [GPencilDataStats.from_data(gp_data) for gp_data in bpy.data.grease_pencils],
+            cls.source_bytes(),
+            {name: tuple(stats) for name, stats in cls.traced.items()},
+            cls.top_files())
+        return cls.last_report
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import re
+import zlib
+from bisect import bisect_left
+from collections import defaultdict
+from typing import ClassVar
+
+import bpy
+
+from .model_gp_batch import iter_node_trees
+
+# words, every CJK character is a word of its own as there is no space between them
+CJK = '぀-ヿ㐀-䶿一-鿿가-힯'
+TOKEN_PATTERN = re.compile(rf'[^\W{CJK}]+|[{CJK}]')
+
+
+def tokenize(content: str) -> list[str]:
+    return TOKEN_PATTERN.findall(content.casefold())
+
+
+def is_note(node: bpy.types.Node) -> bool:
+    return node.bl_idname == 'NodeFrame' and node.text is not None
+
+
+class NoteIndex:
+    """Inverted index of the text of the notes (frame nodes with a text) of all the node trees.
+    A text is tokenized again only when its checksum changes, the frames are collected on every refresh.
+    usage:
+    >>> NoteIndex.refresh()
+    >>> NoteIndex.search('todo shader')  # [(node tree, frame name), ...], every word is a prefix
+    """
+    # text pointer: (checksum, tokens)
+    texts: ClassVar[dict[int, tuple[int, frozenset[str]]]] = {}
+    # token: text pointers
+    postings: ClassVar[dict[str, set[int]]] = defaultdict(set)
+    # sorted tokens for the prefix search, None when the tokens changed
+    vocabulary: ClassVar[list[str] | None] = None
+    # text pointer: (node tree, frame name), valid until the next refresh
+    frames: ClassVar[dict[int, list[tuple[bpy.types.NodeTree, str]]]] = {}
+
+    @classmethod
+    def clear(cls) -> None:
+        cls.texts.clear()
+        cls.postings.clear()
+        cls.frames = {}
+        cls.vocabulary = None
+
+    @classmethod
+    def _remove(cls, key: int) -> None:
+        _, tokens = cls.texts.pop(key)
+        for token in tokens:
+            keys = cls.postings[token]
+            keys.discard(key)
+            if not keys:
+                del cls.postings[token]
+
+    @classmethod
+    def refresh(cls) -> int:
+        """Collect the notes and index the changed texts.
+        :return: the number of texts tokenized"""
+        frames: dict[int, list[tuple[bpy.types.NodeTree, str]]] = defaultdict(list)
+        texts: dict[int, bpy.types.Text] = {}
+        for node_tree in iter_node_trees():
+            for node in node_tree.nodes:
+                if is_note(node):
+                    key = node.text.as_pointer()
+                    texts[key] = node.text
+                    frames[key].append((node_tree, node.name))
+        cls.frames = frames
+
+        removed = cls.texts.keys() - texts.keys()
+        for key in removed:
+            cls._remove(key)
+        updated = 0
+        for key, text in texts.items():
+            content = text.as_string()
+            checksum = zlib.crc32(content.encode())
+            if (indexed := cls.texts.get(key)) is not None:
+                if indexed[0] == checksum: continue
+                cls._remove(key)
+            tokens = frozenset(tokenize(content))
+            cls.texts[key] = (checksum, tokens)
+            for token in tokens:
+                cls.postings[token].add(key)
+            updated += 1
+        if updated or removed:
+            cls.vocabulary = None
+        return updated
+
+    @classmethod
+    def _prefix(cls, prefix: str) -> set[int]:
+        """The texts with a token starting with the prefix, a binary search in the sorted tokens."""
+        if cls.vocabulary is None:
+            cls.vocabulary = sorted(cls.postings)
+        keys = set()
+        for i in range(bisect_left(cls.vocabulary, prefix), len(cls.vocabulary)):
+            token = cls.vocabulary[i]
+            if not token.startswith(prefix): break
+            keys |= cls.postings[token]
+        return keys
+
+    @classmethod
+    def search(cls, query: str) -> list[tuple[bpy.types.NodeTree, str]]:
+        """The notes with all the words of the query, sorted by node tree and frame name."""
+        keys = None
+        for token in dict.fromkeys(tokenize(query)):
+            keys = cls._prefix(token) if keys is None else keys & cls._prefix(token)
+            if not keys:
+                return []
+        if not keys:
+            return []
+        hits = [hit for key in keys for hit in cls.frames.get(key, ())]
+        return sorted(hits, key=lambda hit: (hit[0].name, hit[1]))
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+import bpy
+
+from .utils import VecTool
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
+
+
+def node_rects(nodes: Sequence[bpy.types.Node] | bpy.types.Nodes) -> np.ndarray:
+    """Rectangles of the nodes in v2d space, read with foreach_get.
+    :return: Nx4 (left, bottom, right, top)"""
+    count = len(nodes)
+    if not count:
+        return np.empty((0, 4))
+    location = np.empty(count * 2, dtype=np.float32)
+    dimensions = np.empty(count * 2, dtype=np.float32)
+    nodes.foreach_get('location', location)
+    nodes.foreach_get('dimensions', dimensions)
+    location = location.reshape(-1, 2).astype(np.float64)
+    # dimensions are scaled by the ui scale, the location is not
+    dimensions = dimensions.reshape(-1, 2) / VecTool.ui_scale()
+
+    # the location of a node in a frame is relative to the frame
+    for i, node in enumerate(nodes):
+        parent = node.parent
+        while parent:
+            location[i] += parent.location
+            parent = parent.parent
+
+    left, top = location[:, 0], location[:, 1]
+    return np.stack([left, top - dimensions[:, 1], left + dimensions[:, 0], top], axis=1)
+
+
+def overlaps(rects: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """Bool mask of the rects (Cx4) overlapping any of the boxes (Nx4), touching is not overlapping."""
+    if not len(boxes):
+        return np.zeros(len(rects), dtype=bool)
+    r, b = rects[:, None, :], boxes[None, :, :]
+    return ((r[..., 0] < b[..., 2]) & (r[..., 2] > b[..., 0]) &
+            (r[..., 1] < b[..., 3]) & (r[..., 3] > b[..., 1])).any(axis=1)
+
+
+@dataclass
+class NoteLayout:
+    """Place the note frames in the free space around the nodes, v2d space.
+    The candidates are the positions around the target and along the edges of the nearby obstacles
+    (the edges a sweep line would stop at), all tested against the obstacles at once.
+    usage:
+    >>> layout = NoteLayout(node_rects(node_tree.nodes))
+    >>> left, top = layout.place((250, 200), target=node_rect)
+    """
+    obstacles: np.ndarray = field(default_factory=lambda: np.empty((0, 4)))
+    margin: float = 20
+    # candidates per axis, the nearest to the target are kept
+    candidates: int = 32
+    # how many times the search window doubles before giving up
+    max_expand: int = 6
+
+    def add_obstacle(self, rect: Sequence[float]) -> None:
+        self.obstacles = np.concatenate([self.obstacles, np.asarray(rect, dtype=np.float64).reshape(1, 4)])
+
+    def _obstacles(self, ignore: Optional[np.ndarray]) -> np.ndarray:
+        return self.obstacles if ignore is None or not len(ignore) else np.delete(self.obstacles, ignore, axis=0)
+
+    def _axis_candidates(self, low: float, high: float, size: float, near_low: np.ndarray,
+                         near_high: np.ndarray) -> np.ndarray:
+        """The start of the note on one axis: next to / aligned with the target, next to the obstacles."""
+        m = self.margin
+        values = np.concatenate([[high + m, low - m - size, low, high - size, (low + high - size) / 2],
+                                 near_high + m, near_low - m - size])
+        values = np.unique(values)
+        center = (low + high - size) / 2
+        return values[np.argsort(np.abs(values - center))[:self.candidates]]
+
+    def place(self, size: Sequence[float], target: Sequence[float],
+              ignore: Optional[np.ndarray] = None) -> tuple[float, float]:
+        """Find the free position nearest to the target, the result is added to the obstacles.
+        :param size: width, height of the note
+        :param target: left, bottom, right, top of the target (a node or the note itself)
+        :param ignore: indices of the obstacles to leave out, e.g. the frames the note is in
+        :return: left, top of the note, the location of a frame"""
+        w, h = size
+        tx0, ty0, tx1, ty1 = target
+        target_center = np.array([(tx0 + tx1) / 2, (ty0 + ty1) / 2])
+        obstacles = self._obstacles(ignore)
+        # obstacles grown by the margin keep the space between the notes and the nodes
+        grown = obstacles + np.array([-1, -1, 1, 1]) * (self.margin - 1e-6)
+        radius = max(w, h, tx1 - tx0, ty1 - ty0) + self.margin * 2
+
+        for _ in range(self.max_expand):
+            window = np.array([tx0 - radius, ty0 - radius, tx1 + radius, ty1 + radius])
+            near = obstacles[overlaps(obstacles, window.reshape(1, 4))] if len(obstacles) else obstacles
+            xs = self._axis_candidates(tx0, tx1, w, near[:, 0], near[:, 2])
+            ys = self._axis_candidates(ty0, ty1, h, near[:, 1], near[:, 3])
+            x0, y0 = (a.ravel() for a in np.meshgrid(xs, ys))
+            rects = np.stack([x0, y0, x0 + w, y0 + h], axis=1)
+            # the candidates reach out of the window by the note size
+            reach = (window + np.array([-w, -h, w, h]) * 2).reshape(1, 4)
+            near_grown = grown[overlaps(grown, reach)] if len(grown) else grown
+            free = ~overlaps(rects, near_grown)
+            if free.any():
+                rects = rects[free]
+                centers = (rects[:, :2] + rects[:, 2:]) / 2
+                best = rects[int(np.argmin(np.linalg.norm(centers - target_center, axis=1)))]
+                self.add_obstacle(best)
+                return float(best[0]), float(best[3])
+            radius *= 2
+
+        # crowded everywhere, above all the obstacles
+        top = float(obstacles[:, 3].max()) + self.margin if len(obstacles) else ty1
+        self.add_obstacle((tx0, top, tx0 + w, top + h))
+        return tx0, top + h
+
+    def relayout(self, notes: np.ndarray, ignore: Optional[Sequence[np.ndarray]] = None) -> np.ndarray:
+        """Move the notes (Mx4) that overlap the obstacles or each other to the nearest free space.
+        The notes are handled top to bottom, left to right, a note that is free keeps its place.
+        :param ignore: per note, indices of the obstacles to leave out (the frames the note is in),
+        the obstacles given to the constructor keep their index, the placed notes are added after them
+        :return: Mx2 left, top of the notes"""
+        result = np.stack([notes[:, 0], notes[:, 3]], axis=1)
+        for i in np.lexsort((notes[:, 0], -notes[:, 3])):
+            rect = notes[i]
+            note_ignore = ignore[i] if ignore is not None else None
+            grown = self._obstacles(note_ignore) + np.array([-1, -1, 1, 1]) * (self.margin - 1e-6)
+            if not overlaps(rect.reshape(1, 4), grown)[0]:
+                self.add_obstacle(rect)
+                continue
+            result[i] = self.place((rect[2] - rect[0], rect[3] - rect[1]), rect, note_ignore)
+        return result
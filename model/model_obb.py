@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import ClassVar, Sequence
+
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
+
+
+@lru_cache(maxsize=256)
+def rotation_matrix(angle: float) -> np.ndarray:
+    """Return the 2x2 matrix rotating row vectors counterclockwise by the angle: rotated = points @ matrix.
+    Cached per angle, a layer keeps its angle while hovered / dragged."""
+    c, s = np.cos(angle), np.sin(angle)
+    matrix = np.array([[c, s], [-s, c]])
+    matrix.setflags(write=False)
+    return matrix
+
+
+@dataclass(slots=True)
+class OrientedBBox:
+    """Oriented bounding box in 2d.
+    center: center of the box, world space
+    half: half extents along the local x / y axis
+    angle: counterclockwise rotation from the local axes to the world axes, radians
+    """
+    center: np.ndarray
+    half: np.ndarray
+    angle: float = 0.0
+
+    # local signs of the corners / edge centers, same order as PointsArea.corner_points / edge_center_points
+    corner_signs: ClassVar[tuple] = ((-1, 1), (1, 1), (-1, -1), (1, -1))
+    edge_center_signs: ClassVar[tuple] = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+    @classmethod
+    def from_extents(cls, min_xy: Sequence[float], max_xy: Sequence[float], angle: float = 0.0,
+                     pivot: Sequence[float] | None = None) -> 'OrientedBBox':
+        """Create from the extents measured in the frame rotated by -angle around the pivot.
+        :param pivot: the pivot of the rotation, default to the center of the extents"""
+        min_xy, max_xy = np.asarray(min_xy, dtype=np.float64), np.asarray(max_xy, dtype=np.float64)
+        mid = (min_xy + max_xy) / 2
+        if pivot is not None and angle:
+            pivot = np.asarray(pivot[:2], dtype=np.float64)
+            mid = pivot + (mid - pivot) @ rotation_matrix(angle)
+        return cls(mid, (max_xy - min_xy) / 2, angle)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return rotation_matrix(self.angle)
+
+    @property
+    def size(self) -> np.ndarray:
+        return self.half * 2
+
+    def to_world(self, local: np.ndarray) -> np.ndarray:
+        """Local coordinates (Nx2, relative to the center) to world space."""
+        return np.asarray(local) @ self.matrix + self.center
+
+    def to_local(self, world: np.ndarray) -> np.ndarray:
+        """World space points (Nx2) to local coordinates, relative to the center."""
+        return (np.asarray(world)[..., :2] - self.center) @ self.matrix.T
+
+    def vector_to_local(self, vector: Sequence[float]) -> np.ndarray:
+        """Rotate a direction (e.g. the mouse delta) to the local axes, no translation."""
+        return np.asarray(vector[:2], dtype=np.float64) @ self.matrix.T
+
+    def corners(self) -> np.ndarray:
+        """4x2 world corners: top_left, top_right, bottom_left, bottom_right"""
+        return self.to_world(np.array(self.corner_signs) * self.half)
+
+    def edge_centers(self) -> np.ndarray:
+        """4x2 world edge centers: top_center, right_center, bottom_center, left_center"""
+        return self.to_world(np.array(self.edge_center_signs) * self.half)
+
+    def contains(self, points: np.ndarray, feather: float = 0.0) -> np.ndarray:
+        """Bool mask of the points (Nx2, world) inside the box grown by the feather."""
+        return np.all(np.abs(self.to_local(np.atleast_2d(points))) <= self.half + feather, axis=-1)
@@ -1,5 +1,6 @@
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import ClassVar, Literal, Sequence
+from typing import Any, ClassVar, Literal, Optional, Sequence
 
 from mathutils import Vector, Euler
 import bpy
@@ -11,6 +12,35 @@ PositionType = Literal[
 ]
 
 
+class ViewTransform:
+    """The view 2d and the ui scale of the space conversions, the ones of the context unless overridden.
+    A replay in background has no region, it overrides them with the recorded view, see bench_replay.
+    usage:
+    >>> with ViewTransform.override(RecordedView2D(...), ui_scale=1.0): ...
+    """
+    # an object with region_to_view / view_to_region, like bpy.types.View2D
+    view2d_override: ClassVar[Optional[Any]] = None
+    ui_scale_override: ClassVar[Optional[float]] = None
+
+    @classmethod
+    def view2d(cls) -> bpy.types.View2D:
+        return cls.view2d_override or bpy.context.region.view2d
+
+    @classmethod
+    def ui_scale(cls) -> float:
+        return cls.ui_scale_override or bpy.context.preferences.system.ui_scale
+
+    @classmethod
+    @contextmanager
+    def override(cls, view2d: Any, ui_scale: float):
+        previous = cls.view2d_override, cls.ui_scale_override
+        cls.view2d_override, cls.ui_scale_override = view2d, ui_scale
+        try:
+            yield
+        finally:
+            cls.view2d_override, cls.ui_scale_override = previous
+
+
 class AreaPoint(Vector):
     """A point with a position and a type."""
     _position_type: PositionType = 'not_defined'
@@ -21,7 +51,7 @@ class AreaPoint(Vector):
 
     @classmethod
     def ui_scale(cls) -> float:
-        return bpy.context.preferences.system.ui_scale
+        return ViewTransform.ui_scale()
 
     def set_position_type(self, position_type: PositionType) -> 'AreaPoint':
         self._position_type = position_type
@@ -29,12 +59,12 @@ class AreaPoint(Vector):
 
     def r2d_2_v2d(self) -> 'AreaPoint':
         """Convert the region 2d space to view 2d space."""
-        return AreaPoint(bpy.context.region.view2d.region_to_view(*self.xy)) / self.ui_scale()
+        return AreaPoint(ViewTransform.view2d().region_to_view(*self.xy)) / self.ui_scale()
 
     def v2d_2_r2d(self) -> 'AreaPoint':
         """Convert the view 2d space to region 2d space."""
         return AreaPoint(
-            bpy.context.region.view2d.view_to_region(*self.xy * self.ui_scale(), clip=False)).set_position_type(
+            ViewTransform.view2d().view_to_region(*self.xy * self.ui_scale(), clip=False)).set_position_type(
             self.position_type)
 
     def loc3d_2_v2d(self) -> 'AreaPoint':
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+import bpy
+
+from .model_gp_bbox import GPencilLayerBBox
+from .model_note_layout import node_rects
+from .utils import VecTool
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
+
+
+def nearest_sorted(targets: np.ndarray, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Nearest target of every value with a binary search, O(log n) per value.
+    :param targets: sorted 1d array, not empty
+    :return: the nearest targets, the offsets from the values to them"""
+    index = np.searchsorted(targets, values).clip(1, max(len(targets) - 1, 1))
+    left, right = targets[index - 1], targets[np.minimum(index, len(targets) - 1)]
+    nearest = np.where(np.abs(values - left) <= np.abs(right - values), left, right)
+    return nearest, nearest - values
+
+
+@dataclass
+class SnapEngine:
+    """Snap targets sorted per axis, built once when the drag starts, in v2d space.
+    x: left / center / right of the other notes and the nodes, y: bottom / center / top
+    usage:
+    >>> engine = SnapEngine.from_node_tree(gp_data, node_tree, exclude_layers=['Note'], grid=20)
+    >>> offset, guides = engine.snap(xs=[left, center_x, right], ys=[bottom, center_y, top], threshold=10)
+    """
+    xs: np.ndarray = field(default_factory=lambda: np.empty(0))
+    ys: np.ndarray = field(default_factory=lambda: np.empty(0))
+    grid: float = 0  # 0 to disable
+
+    @classmethod
+    def from_node_tree(cls, gp_data: Optional[bpy.types.GreasePencil], node_tree: Optional[bpy.types.NodeTree],
+                       exclude_layers: Sequence[str] = (), grid: float = 0) -> 'SnapEngine':
+        xs, ys = [], []
+        if gp_data:
+            x, y = cls.layer_targets(gp_data, exclude_layers)
+            xs.append(x)
+            ys.append(y)
+        if node_tree:
+            x, y = cls.node_targets(node_tree)
+            xs.append(x)
+            ys.append(y)
+        return cls(np.unique(np.concatenate(xs)) if xs else np.empty(0),
+                   np.unique(np.concatenate(ys)) if ys else np.empty(0), grid)
+
+    @staticmethod
+    def layer_targets(gp_data: bpy.types.GreasePencil,
+                      exclude_layers: Sequence[str] = ()) -> tuple[np.ndarray, np.ndarray]:
+        """Edges and centers of the global bbox of the layers, the extents are cached by the bbox model."""
+        bbox = GPencilLayerBBox(gp_data)
+        extents = []
+        for i, layer in enumerate(gp_data.layers):
+            if layer.info in exclude_layers: continue
+            bbox.calc_bbox(i, local=False)
+            extents.append((bbox.min_x, bbox.min_y, bbox.max_x, bbox.max_y))
+        if not extents:
+            return np.empty(0), np.empty(0)
+        e = np.array(extents) / VecTool.ui_scale()
+        return (np.concatenate([e[:, 0], (e[:, 0] + e[:, 2]) / 2, e[:, 2]]),
+                np.concatenate([e[:, 1], (e[:, 1] + e[:, 3]) / 2, e[:, 3]]))
+
+    @staticmethod
+    def node_targets(node_tree: bpy.types.NodeTree) -> tuple[np.ndarray, np.ndarray]:
+        """Edges and centers of the nodes, read with foreach_get so it stays fast with thousands of nodes."""
+        rects = node_rects(node_tree.nodes)
+        left, bottom, right, top = rects.T
+        return (np.concatenate([left, (left + right) / 2, right]),
+                np.concatenate([bottom, (bottom + top) / 2, top]))
+
+    def snap_axis(self, targets: np.ndarray, values: Sequence[float],
+                  threshold: float) -> tuple[float, Optional[float]]:
+        """The smallest offset that moves one of the values to a target or to the grid.
+        :return: offset, the snapped position to draw the guide, None if nothing is in the threshold"""
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return 0, None
+        candidates, offsets = [], []
+        if len(targets):
+            nearest, offset = nearest_sorted(targets, values)
+            candidates.append(nearest)
+            offsets.append(offset)
+        if self.grid > 0:
+            nearest = np.round(values / self.grid) * self.grid
+            candidates.append(nearest)
+            offsets.append(nearest - values)
+        if not candidates:
+            return 0, None
+
+        candidates, offsets = np.concatenate(candidates), np.concatenate(offsets)
+        i = int(np.argmin(np.abs(offsets)))
+        if abs(offsets[i]) > threshold:
+            return 0, None
+        return float(offsets[i]), float(candidates[i])
+
+    def snap(self, xs: Sequence[float], ys: Sequence[float],
+             threshold: float) -> tuple[tuple[float, float], tuple[Optional[float], Optional[float]]]:
+        """Snap the features of the dragged box, every axis independently.
+        :param xs: x of the features, e.g. left, center, right
+        :param ys: y of the features
+        :param threshold: max snap distance, v2d
+        :return: (offset x, offset y), (guide x, guide y)"""
+        offset_x, guide_x = self.snap_axis(self.xs, xs, threshold)
+        offset_y, guide_y = self.snap_axis(self.ys, ys, threshold)
+        return (offset_x, offset_y), (guide_x, guide_y)
+
+
+@dataclass
+class SnapState:
+    """Keep the free (mouse) offset and the applied (snapped) offset of a drag.
+    The features are the positions at the start of the drag, v2d."""
+    engine: SnapEngine
+    xs: np.ndarray
+    ys: np.ndarray
+    threshold: float
+    free: np.ndarray = field(default_factory=lambda: np.zeros(2))
+    applied: np.ndarray = field(default_factory=lambda: np.zeros(2))
+    guides: tuple[Optional[float], Optional[float]] = (None, None)
+
+    def __post_init__(self):
+        self.xs = np.asarray(self.xs, dtype=np.float64)
+        self.ys = np.asarray(self.ys, dtype=np.float64)
+
+    def step(self, delta: Sequence[float], snap: bool = True) -> np.ndarray:
+        """Accumulate the mouse delta.
+        :param snap: False to follow the mouse, e.g. the snap key is released
+        :return: the delta to apply to the dragged layers"""
+        self.free += np.asarray(delta[:2], dtype=np.float64)
+        target = self.free.copy()
+        self.guides = (None, None)
+        if snap:
+            offset, self.guides = self.engine.snap(self.xs + self.free[0], self.ys + self.free[1], self.threshold)
+            target += offset
+        delta = target - self.applied
+        self.applied = target
+        return delta
+
+    def shift(self, delta: Sequence[float]) -> None:
+        """The layers are moved by something else, e.g. the edge pan."""
+        self.free += np.asarray(delta[:2], dtype=np.float64)
+        self.applied += np.asarray(delta[:2], dtype=np.float64)
@@ -5,7 +5,8 @@ from dataclasses import dataclass
 from math import radians, degrees
 from math import cos, sin, pow
 
-from .model_points import AreaPoint
+from .model_points import AreaPoint, ViewTransform
+from .model_color_space import ColorSpace
 
 
 class EulerTool:
@@ -28,16 +29,12 @@ class EulerTool:
 
 
 class ColorTool:
-    """Grease Pencil Color utility class."""
+    """Grease Pencil Color utility class. The conversions are done by ColorSpace, so they also accept arrays."""
 
     @staticmethod
     def hex_2_rgb(hex_color: str) -> list[float, float, float]:
         """Convert hex color to rgb color."""
-        if hex_color.startswith('#'):
-            hex = hex_color[1:]
-        else:
-            hex = hex_color
-        return [int(hex[i:i + 2], 16) / 255 for i in (0, 2, 4)]
+        return list(ColorSpace.hex_2_rgb(hex_color))
 
     @staticmethod
     def set_alpha(color: list[float, float, float], alpha: float) -> list[float, float, float]:
@@ -46,21 +43,13 @@ class ColorTool:
 
     @staticmethod
     def srgb_2_linear(c, gamma=2.4):
-        if c < 0:
-            return 0
-        elif c < 0.04045:
-            return c / 12.92
-        else:
-            return ((c + 0.055) / 1.055) ** gamma
+        res = ColorSpace.srgb_2_linear(c, gamma)
+        return float(res) if res.ndim == 0 else res
 
     @staticmethod
     def linear_2_srgb(c, gamma_value=2.4):
-        if c < 0.0031308:
-            srgb = 0.0 if c < 0.0 else c * 12.92
-        else:
-            srgb = 1.055 * pow(c, 1.0 / gamma_value) - 0.055
-
-        return srgb
+        res = ColorSpace.linear_2_srgb(c, gamma_value)
+        return float(res) if res.ndim == 0 else res
 
 
 class VecTool:
@@ -68,17 +57,17 @@ class VecTool:
 
     @staticmethod
     def ui_scale() -> float:
-        return bpy.context.preferences.system.ui_scale
+        return ViewTransform.ui_scale()
 
     @staticmethod
     def r2d_2_v2d(location: Vector | Sequence) -> Vector:
         """Convert region 2d space point to node editor 2d view."""
-        return Vector(bpy.context.region.view2d.region_to_view(*location.xy)) / VecTool.ui_scale()
+        return Vector(ViewTransform.view2d().region_to_view(*location.xy)) / VecTool.ui_scale()
 
     @staticmethod
     def v2d_2_r2d(location: Vector) -> Vector:
         """Convert node editor 2d view point to region 2d space."""
-        return Vector((bpy.context.region.view2d.view_to_region(*location.xy * VecTool.ui_scale(), clip=False)))
+        return Vector((ViewTransform.view2d().view_to_region(*location.xy * VecTool.ui_scale(), clip=False)))
 
     @staticmethod
     def loc3d_2_v2d(location: Vector) -> Vector:
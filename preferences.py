@@ -3,6 +3,8 @@ from bpy.props import IntProperty, PointerProperty, StringProperty, BoolProperty
     FloatProperty
 from bpy.app.translations import pgettext_iface as _p
 from .bl_operator.op_doc_server import EST_OT_launch_doc
+from .public_path import update_pref_snapshot
+from .view_model.view_model_record import EventRecorder
 
 
 def draw_property_group(layout: bpy.types.UILayout, pointer: bpy.types.PointerProperty):
@@ -16,15 +18,21 @@ class NoteProperty(bpy.types.PropertyGroup):
     title: StringProperty(default='Note', name='Title')
     width: IntProperty(default=250, name='Width')
     height: IntProperty(default=200, name='Height')
+    auto_place: BoolProperty(default=False, name='Auto Place',
+                             description='Place the new note next to the active node, in the free space')
 
     text = 'Add Note Operator'
     icon = 'TEXT'
 
 
 class GreasePencilDrawProperty(bpy.types.PropertyGroup):
-    line_width: IntProperty(default=1, name='Line Width')
-    drag: BoolProperty(default=True, name='Draw Box When Dragging')
-    drag_area: BoolProperty(default=False, name='Drag Box Area When Dragging')
+    line_width: IntProperty(default=1, name='Line Width', update=update_pref_snapshot)
+    drag: BoolProperty(default=True, name='Draw Box When Dragging', update=update_pref_snapshot)
+    drag_area: BoolProperty(default=False, name='Drag Box Area When Dragging', update=update_pref_snapshot)
+    draw_budget_ms: FloatProperty(default=4, min=0, soft_max=16, name='Draw Budget (ms)',
+                                  description='Draw the tool overlay with less detail while it takes longer than this, '
+                                              '0 to always draw every detail',
+                                  update=update_pref_snapshot)
 
     text = 'Tool Draw'
     icon = 'EDITMODE_HLT'
@@ -33,13 +41,41 @@ class GreasePencilDrawProperty(bpy.types.PropertyGroup):
 class GreasePencilPerformanceProperty(bpy.types.PropertyGroup):
     # lazy_update: BoolProperty(default=False, name='Lazy Update')
 
-    try_remove_svg_bound_stroke: BoolProperty(default=True, name='Add Blender Icon: Try to Remove Icon Bound')
-    select_all: BoolProperty(default=False, name='Drag Select: Only all selected layers are considered selected')
-
-    snap_degree: IntProperty(name='Rotate Snap Degree', default=15)
-    detect_edge_px: IntProperty(default=20, name='Detect Edge Radius', subtype='PIXEL')
-    detect_corner_px: IntProperty(default=20, name='Detect Corner Radius', subtype='PIXEL')
-    detect_rotate_px: IntProperty(default=20, name='Detect Rotate Radius', subtype='PIXEL')
+    try_remove_svg_bound_stroke: BoolProperty(default=True, name='Add Blender Icon: Try to Remove Icon Bound',
+                                              update=update_pref_snapshot)
+    select_all: BoolProperty(default=False, name='Drag Select: Only all selected layers are considered selected',
+                             update=update_pref_snapshot)
+    simplify_tolerance_px: FloatProperty(default=0.5, min=0, soft_max=5, name='Simplify Tolerance', subtype='PIXEL',
+                                         description='Remove the points closer than this to the simplified line '
+                                                     'when adding a note, 0 to keep every point',
+                                         update=update_pref_snapshot)
+    proxy_points: IntProperty(default=5000, min=0, name='Drag Proxy Above Points',
+                              description='Transform a simplified copy when dragging a note with more points, '
+                                          '0 to always transform the full resolution',
+                              update=update_pref_snapshot)
+    deferred_transform: BoolProperty(default=False, name='Transform Without Editing Points',
+                                     description='Only compose the transform of the dragged notes and draw them with it, '
+                                                 'the points are edited once when the drag ends',
+                                     update=update_pref_snapshot)
+
+    pick_shape: EnumProperty(items=[('BBOX', 'Bounding Box', 'Click anywhere in the bounding box of a note'),
+                                    ('HULL', 'Convex Hull', 'Click inside the convex hull of the strokes'),
+                                    ('TIGHT', 'Tight Fit', 'Click near the strokes, empty space inside is skipped')],
+                             name='Pick Shape', default='HULL', update=update_pref_snapshot)
+
+    snap_degree: IntProperty(name='Rotate Snap Degree', default=15, update=update_pref_snapshot)
+    use_snap: BoolProperty(default=False, name='Snap When Moving / Scaling',
+                           description='Snap to the other notes, the nodes and the grid, '
+                                       'hold ctrl to toggle when moving',
+                           update=update_pref_snapshot)
+    snap_px: IntProperty(default=10, min=1, name='Snap Distance', subtype='PIXEL', update=update_pref_snapshot)
+    snap_grid: FloatProperty(default=0, min=0, name='Snap Grid Size', description='0 to not snap to the grid',
+                             update=update_pref_snapshot)
+    detect_edge_px: IntProperty(default=20, name='Detect Edge Radius', subtype='PIXEL', update=update_pref_snapshot)
+    detect_corner_px: IntProperty(default=20, name='Detect Corner Radius', subtype='PIXEL',
+                                  update=update_pref_snapshot)
+    detect_rotate_px: IntProperty(default=20, name='Detect Rotate Radius', subtype='PIXEL',
+                                  update=update_pref_snapshot)
 
     text = 'Tool Behavior'
     icon = 'MODIFIER'
@@ -56,7 +92,7 @@ class Preference(bpy.types.AddonPreferences):
     gp_draw: PointerProperty(type=GreasePencilDrawProperty)
     gp_performance: PointerProperty(type=GreasePencilPerformanceProperty)
     # debug
-    debug: BoolProperty(default=False, name='Debug')
+    debug: BoolProperty(default=False, name='Debug', update=update_pref_snapshot)
 
     def draw(self, context):
         layout = self.layout
@@ -79,7 +115,11 @@ class Preference(bpy.types.AddonPreferences):
         col.use_property_split = True
         draw_property_group(col, self.gp_draw)
 
-        layout.prop(self, 'debug')
+        row = layout.row()
+        row.prop(self, 'debug')
+        if self.debug:
+            text = 'Save Event Record' if EventRecorder.recording else 'Record Events'
+            row.operator('est.record_events', text=text, icon='REC', depress=EventRecorder.recording)
 
 
 def register():
@@ -88,6 +128,7 @@ def register():
     register_class(GreasePencilDrawProperty)
     register_class(GreasePencilPerformanceProperty)
     register_class(Preference)
+    update_pref_snapshot()
 
 
 def unregister():
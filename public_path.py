@@ -1,8 +1,26 @@
 import bpy
+import importlib.util
+import sys
+from dataclasses import dataclass
+from types import ModuleType
 from typing import Optional, Union, Any
 from pathlib import Path
 
 
+def lazy_import(name: str) -> ModuleType:
+    """Return the module, the module is executed on the first attribute access.
+    Keep heavy modules (numpy) out of the add-on startup, the modules using it need postponed annotations."""
+    if module := sys.modules.get(name):
+        return module
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
 def get_pref(data_path: Optional[str] = None) -> bpy.types.AddonPreferences | Any:
     pref = bpy.context.preferences.addons.get(__package__).preferences
     if data_path is None:
@@ -19,6 +37,77 @@ def get_pref(data_path: Optional[str] = None) -> bpy.types.AddonPreferences | An
     return search_attr(pref, data_path)
 
 
+@dataclass(frozen=True, slots=True)
+class PreferenceSnapshot:
+    """Read only copy of the preferences read by the hot paths (constructors of the modal models, draw callbacks).
+    Rebuilt by the update callbacks of the preference properties, see update_pref_snapshot.
+    The default values are the ones of the preferences, used when the add-on is not enabled."""
+    debug: bool = False
+    # gp_draw
+    line_width: int = 1
+    drag: bool = True
+    drag_area: bool = False
+    draw_budget_ms: float = 4
+    # gp_performance
+    try_remove_svg_bound_stroke: bool = True
+    select_all: bool = False
+    simplify_tolerance_px: float = 0.5
+    proxy_points: int = 5000
+    deferred_transform: bool = False
+    pick_shape: str = 'HULL'
+    snap_degree: int = 15
+    use_snap: bool = False
+    snap_px: int = 10
+    snap_grid: float = 0
+    detect_edge_px: int = 20
+    detect_corner_px: int = 20
+    detect_rotate_px: int = 20
+
+    @classmethod
+    def from_pref(cls, pref: bpy.types.AddonPreferences) -> 'PreferenceSnapshot':
+        draw, performance = pref.gp_draw, pref.gp_performance
+        return cls(
+            debug=pref.debug,
+            line_width=draw.line_width,
+            drag=draw.drag,
+            drag_area=draw.drag_area,
+            draw_budget_ms=draw.draw_budget_ms,
+            try_remove_svg_bound_stroke=performance.try_remove_svg_bound_stroke,
+            select_all=performance.select_all,
+            simplify_tolerance_px=performance.simplify_tolerance_px,
+            proxy_points=performance.proxy_points,
+            deferred_transform=performance.deferred_transform,
+            pick_shape=performance.pick_shape,
+            snap_degree=performance.snap_degree,
+            use_snap=performance.use_snap,
+            snap_px=performance.snap_px,
+            snap_grid=performance.snap_grid,
+            detect_edge_px=performance.detect_edge_px,
+            detect_corner_px=performance.detect_corner_px,
+            detect_rotate_px=performance.detect_rotate_px,
+        )
+
+
+_pref_snapshot: Optional[PreferenceSnapshot] = None
+
+
+def get_pref_snapshot() -> PreferenceSnapshot:
+    """Return the cached preference snapshot, no lookup of the add-on preferences once built."""
+    global _pref_snapshot
+    if _pref_snapshot is None:
+        if not bpy.context.preferences.addons.get(__package__):
+            return PreferenceSnapshot()
+        _pref_snapshot = PreferenceSnapshot.from_pref(get_pref())
+    return _pref_snapshot
+
+
+def update_pref_snapshot(self=None, context=None):
+    """Update callback of the preference properties, rebuild the snapshot."""
+    global _pref_snapshot
+    _pref_snapshot = None
+    get_pref_snapshot()
+
+
 def get_asset_directory() -> Path:
     return Path(__file__).parent.joinpath('asset')
 
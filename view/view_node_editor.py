@@ -1,14 +1,23 @@
+import time
+
 import bpy
 from mathutils import Color, Vector
 
 from typing import Sequence, Union, ClassVar, Literal, Optional, Callable
 from dataclasses import dataclass, field
 
-from ..model.model_gp_bbox import GPencilLayerBBox
+from ..model.model_gp_bbox import CalcBBox, GPencilLayerBBox
+from ..model.model_gp_cost import CostMetric, GPencilLayerCost
+from ..model.model_gp_transform import GPencilLayerTransform
 from ..model.model_draw import DrawData, DrawPreference
+from ..model.utils import VecTool
 from ..view_model.view_model_drag import DragGreasePencilViewModal
-from ..view_model.view_model_draw import DrawViewModel
+from ..view_model.view_model_draw import DrawViewModel, AdaptiveDrawQuality
 from ..view_model.view_model_select import SelectedGPLayersRuntime
+from ..view_model.view_model_session import EditorSessions
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
 
 
 class ViewDrawHandle:
@@ -41,6 +50,8 @@ class ViewBasic:
     draw_vm: DrawViewModel = field(init=False)
     # show state
     _visible: bool = True
+    # shared by the views, the cost of the overlay depends on the notes, not on the operator
+    quality: ClassVar[AdaptiveDrawQuality] = AdaptiveDrawQuality()
 
     def __post_init__(self):
         if self.draw_preference.lazy_update:
@@ -50,9 +61,24 @@ class ViewBasic:
     def __call__(self, *args, **kwargs):
         if self.drag_vm.build_model.is_empty(): return  # empty data
         if not self._visible: return
+        if not (session := EditorSessions.peek()) or not session.owns(self.drag_vm): return  # another node editor
         if not self.draw_preference.lazy_update:
             self.update()
+        if self.draw_preference.debug:
+            self.drag_vm.debug_info['draw quality'] = f'{self.quality.name} {self.quality.ema_ms:.2f}ms'
+        # only the drawing is timed, the quality can't make the update of the models cheaper
+        start = time.perf_counter()
         self.draw()
+        self.quality.budget_ms = self.draw_preference.draw_budget_ms
+        self.quality.add_sample((time.perf_counter() - start) * 1000)
+
+    def draw_selected(self):
+        """The outlines of the selected layers, at UNION their points are not converted to region space."""
+        if self.quality.at_least('UNION'):
+            self.draw_vm.draw_union_box(SelectedGPLayersRuntime.get_selected_union_r2d())
+        else:
+            self.draw_vm.draw_selected_outlines(SelectedGPLayersRuntime.get_selected_layers_points_r2d(),
+                                                self.quality)
 
     def show(self):
         self._visible = True
@@ -86,8 +112,7 @@ class ViewHover(ViewBasic):
                                       edge_points=self.drag_vm.bbox_model.edge_center_points_r2d, )
 
     def draw(self) -> None:
-        for points in SelectedGPLayersRuntime.get_selected_layers_points_r2d():
-            self.draw_vm.draw_box_outline(points)
+        self.draw_selected()
 
         self.draw_vm.draw_bbox_edge()
 
@@ -98,7 +123,8 @@ class ViewHover(ViewBasic):
         if self.drag_vm.pos_corner:
             self.draw_vm.draw_scale_corner_widget()
         if self.drag_vm.pos_corner_extrude:
-            self.draw_vm.draw_rotate_widget(point=self.drag_vm.pos_corner_extrude)
+            self.draw_vm.draw_rotate_widget(point=self.drag_vm.pos_corner_extrude,
+                                            segments=self.quality.circle_segments)
 
         if self.draw_vm.debug:
             self.draw_vm.draw_debug_info(self.drag_vm.debug_info)
@@ -118,20 +144,72 @@ class ViewDrag(ViewBasic):
     def update(self):
         self.draw_vm.update_draw_data(points=self.drag_vm.bbox_model.bbox_points_r2d,
                                       edge_points=self.drag_vm.bbox_model.edge_center_points_r2d,
-                                      mouse_state=self.drag_vm.mouse_state)
+                                      mouse_state=self.drag_vm.mouse_state,
+                                      snap_guides=self.drag_vm.snap_guides)
 
     def draw(self) -> None:
+        self.draw_vm.draw_pending_transforms()
         if self.draw_vm.drag_area:
             self.draw_vm.draw_bbox_area()
         if self.draw_vm.drag:
             self.draw_vm.draw_bbox_edge()
             self.draw_vm.draw_bbox_points()
-            self.draw_vm.draw_rotate_angle()
+            if not self.quality.at_least('NO_TEXT'):
+                self.draw_vm.draw_rotate_angle()
+        self.draw_vm.draw_snap_guides()
 
-        if SelectedGPLayersRuntime.draw_select_box:
+        if SelectedGPLayersRuntime.draw_select_box():
             self.draw_vm.draw_select_box()
-        for points in SelectedGPLayersRuntime.get_selected_layers_points_r2d():
-            self.draw_vm.draw_box_outline(points)
+        self.draw_selected()
 
         if self.draw_vm.debug:
             self.draw_vm.draw_debug_info(self.drag_vm.debug_info)
+
+
+@dataclass
+class ViewCostInspector:
+    """Tint the box of every layer by its cost, from cold to hot, with the counts as labels.
+    The counts and the boxes are read from the tables of GPencilLayerCost,
+    a layer with a pending transform from its frame extents, they change on every event of the drag."""
+    color_cold: tuple[float, float, float] = (0.2, 0.8, 0.3)
+    color_hot: tuple[float, float, float] = (1.0, 0.15, 0.1)
+    # no label on the smaller boxes, px
+    label_min_size: int = 40
+    draw_vm: Optional[DrawViewModel] = None
+
+    def color(self, heat: float, alpha: float) -> tuple[float, float, float, float]:
+        r, g, b = (cold + (hot - cold) * heat for cold, hot in zip(self.color_cold, self.color_hot))
+        return r, g, b, alpha
+
+    def draw(self, gp_data: bpy.types.GreasePencil, metric: CostMetric) -> None:
+        if self.draw_vm is None:  # the shader can only be made in a draw context
+            self.draw_vm = DrawViewModel(DrawData([], []), DrawPreference())
+        region = bpy.context.region
+        table = GPencilLayerCost.table(gp_data)
+        heat = GPencilLayerCost.heat(gp_data, metric)
+        layer_extents = GPencilLayerCost.extents(gp_data)
+        bbox = CalcBBox(gp_data)
+        for i, layer in enumerate(gp_data.layers):
+            if layer.hide or not table['points'][i]: continue
+            if GPencilLayerTransform.has(layer):
+                frames = [e for frame in bbox.frame_scope.frames(layer) if (e := bbox.calc_frame_extents(frame)) is not None]
+                if not frames: continue
+                frames = np.array(frames)
+                low, high = frames[:, 0].min(axis=0), frames[:, 1].max(axis=0)
+            else:
+                low, high = layer_extents[i]
+                if np.isnan(low).any(): continue
+            min_r2d = VecTool.loc3d_2_r2d(Vector(low))
+            max_r2d = VecTool.loc3d_2_r2d(Vector(high))
+            if max_r2d.x < 0 or max_r2d.y < 0 or min_r2d.x > region.width or min_r2d.y > region.height: continue
+
+            top_left, top_right = Vector((min_r2d.x, max_r2d.y)), max_r2d
+            bottom_left, bottom_right = min_r2d, Vector((max_r2d.x, min_r2d.y))
+            self.draw_vm.draw_box_area([top_left, top_right, bottom_left, bottom_right],
+                                       color=self.color(heat[i], 0.15))
+            self.draw_vm.draw_box_outline([top_left, top_right, bottom_right, bottom_left],
+                                          color=self.color(heat[i], 0.8))
+            if min(max_r2d - min_r2d) >= self.label_min_size:
+                # the position is the baseline of the text, one line below the top of the box
+                self.draw_vm.draw_text(f"{table['points'][i]} pt  {table['strokes'][i]} st  {table['frames'][i]} fr",
+                                       top_left + Vector((4, -4 - 12)), size=12)
@@ -3,33 +3,50 @@ from typing import Callable, Optional, Literal
 import bpy
 from math import degrees
 from mathutils import Vector
+from time import perf_counter
 from timeit import timeit
 
 from ..model.utils import Coord, EdgeCenter, VecTool
 from ..model.model_gp_bbox import GPencilLayerBBox, GPencilLayersBBox
 from ..model.model_gp import BuildGreasePencilData
 from ..model.model_points import AreaPoint
+from ..model.model_snap import SnapEngine, SnapState
 from .view_model_mouse import MouseDragState
-from ..public_path import get_pref
+from ..public_path import get_pref_snapshot
 
 
 @dataclass
 class ViewPan:
-    """Handle the pan operation in the modal. only use in node editor window"""
-    padding: int = 30
-    deltax: int = 0
-    deltay: int = 0
-    step: int = 10
-    step_max: int = 50  # max step
-    pan_count: int = 0  # count the pan event, higher the count, faster the pan
-
-    pan_pos: tuple[int, int] = (0, 0)
-    pan_post_prev: tuple[int, int] = (0, 0)
-
-    def is_on_region_edge(self, mouse_pos: Vector) -> bool:
-        """Check if the mouse is on the edge of the region."""
-        width, height = bpy.context.area.width, bpy.context.area.height
-        for region in bpy.context.area.regions:
+    """Pan the view while the mouse is near the edge of the region, only use in node editor window.
+    A timer pans at a fixed rate, so the view keeps panning when the mouse stays still at the edge
+    and the speed does not depend on the rate of the mouse events.
+    The speed grows with the depth of the mouse in the edge band and with the time held there.
+    usage:
+    >>> view_pan = ViewPan(on_pan=lambda pan_vec: ...)  # pan vector in v2d space
+    >>> view_pan.update(context, mouse_pos)  # on every mouse move, starts the timer in the edge band
+    >>> view_pan.stop()  # when the modal ends
+    """
+    padding: int = 30  # px, width of the edge band
+    speed_min: float = 300  # px per second, when the mouse enters the band
+    speed_max: float = 2400  # px per second, at the edge after the ramp time
+    ramp_time: float = 0.8  # seconds to reach the full speed
+    interval: float = 1 / 60  # seconds between two pans
+    on_pan: Optional[Callable[[Vector], None]] = None
+
+    mouse_pos: Vector = field(default_factory=lambda: Vector((0, 0)))
+    hold_time: float = 0  # seconds in the edge band
+    last_tick: float = 0
+    remainder: Vector = field(default_factory=lambda: Vector((0, 0)))  # the pan operator takes whole pixels
+    window: Optional[bpy.types.Window] = None
+    area: Optional[bpy.types.Area] = None
+    region: Optional[bpy.types.Region] = None
+    # the registered timer function, a bound method is a new object on every access
+    timer: Optional[Callable[[], Optional[float]]] = None
+
+    def edge_depth(self, mouse_pos: Vector) -> Vector:
+        """Depth of the mouse in the edge band per axis, -1 to 1, 0 out of the band."""
+        width, height = self.area.width, self.area.height
+        for region in self.area.regions:
             if region.type == 'WINDOW':
                 continue
             elif region.type == 'UI':
@@ -37,31 +54,73 @@ class ViewPan:
             elif region.type == 'HEADER':
                 height -= region.height
 
-        x, y = mouse_pos
-        self.deltax = self.deltay = 0
-        # speed up the pan
-        if x < self.padding:
-            self.deltax = -self.step
-        elif x > width - self.padding:
-            self.deltax = self.step
-
-        if y < self.padding:
-            self.deltay = -self.step
-        elif y > height - self.padding:
-            self.deltay = self.step
-
-        if self.deltay or self.deltax:
-            self.pan_count += 1
-            if self.pan_count < self.step_max:
-                self.step += 1
-            return True
-
-    def edge_pan(self, event) -> Vector:
-        """pan view return: the pan vector."""
-        self.pan_post_prev: Vector = VecTool.r2d_2_v2d(Vector((event.mouse_region_x, event.mouse_region_y)))
-        bpy.ops.view2d.pan(deltax=self.deltax, deltay=self.deltay)
-        self.pan_pos: Vector = VecTool.r2d_2_v2d(Vector((event.mouse_region_x, event.mouse_region_y)))
-        return self.pan_pos - self.pan_post_prev
+        def depth(pos: float, size: float) -> float:
+            if pos < self.padding:
+                return -min((self.padding - pos) / self.padding, 1)
+            if pos > size - self.padding:
+                return min((pos - size + self.padding) / self.padding, 1)
+            return 0
+
+        return Vector((depth(mouse_pos[0], width), depth(mouse_pos[1], height)))
+
+    def is_on_region_edge(self, mouse_pos: Vector) -> bool:
+        """Check if the mouse is on the edge of the region."""
+        return bool(self.edge_depth(mouse_pos).length)
+
+    def velocity(self, depth: Vector) -> Vector:
+        """px per second"""
+        ramp = min(self.hold_time / self.ramp_time, 1)
+        speed = self.speed_min + (self.speed_max - self.speed_min) * ramp
+        return depth * speed
+
+    def update(self, context: bpy.types.Context, mouse_pos: Vector) -> None:
+        if context.area is None:  # no editor, e.g. a replay in background
+            return
+        self.mouse_pos = mouse_pos.copy()
+        self.window, self.area, self.region = context.window, context.area, context.region
+        if self.timer is None and self.is_on_region_edge(mouse_pos):
+            self.hold_time = 0
+            self.remainder = Vector((0, 0))
+            self.last_tick = perf_counter()
+            self.timer = self.tick
+            bpy.app.timers.register(self.timer, first_interval=self.interval)
+
+    def tick(self) -> Optional[float]:
+        now = perf_counter()
+        delta_time = min(now - self.last_tick, self.interval * 4)  # the timer is late when the redraw is slow
+        self.last_tick = now
+        try:
+            depth = self.edge_depth(self.mouse_pos)
+            if not depth.length:
+                self.timer = None
+                return None
+            self.hold_time += delta_time
+            delta = self.velocity(depth) * delta_time + self.remainder
+            step = Vector((int(delta.x), int(delta.y)))
+            self.remainder = delta - step
+            if step.length:
+                pan_vec = self.pan(step)
+                if self.on_pan:
+                    self.on_pan(pan_vec)
+                self.area.tag_redraw()
+        except ReferenceError:  # the area is closed
+            self.timer = None
+            return None
+        return self.interval
+
+    def pan(self, step: Vector) -> Vector:
+        """Pan the view by the step in px.
+        :return: the pan vector in v2d space, what the point under the mouse moved, 0 if the view is clamped"""
+        view2d = self.region.view2d
+        before = Vector(view2d.region_to_view(0, 0))
+        with bpy.context.temp_override(window=self.window, area=self.area, region=self.region):
+            bpy.ops.view2d.pan(deltax=int(step.x), deltay=int(step.y))
+        return (Vector(view2d.region_to_view(0, 0)) - before) / VecTool.ui_scale()
+
+    def stop(self) -> None:
+        if self.timer is not None and bpy.app.timers.is_registered(self.timer):
+            bpy.app.timers.unregister(self.timer)
+        self.timer = None
 
 
 @dataclass
@@ -79,10 +138,27 @@ class TransformHandler:
     mouse_state: MouseDragState = None
     # time
     cost_time: float = 0
+    # snap
+    use_snap: bool = field(default_factory=lambda: get_pref_snapshot().use_snap)
+    snap_state: Optional[SnapState] = None
 
     def accept_event(self, event: bpy.types.Event) -> bool:
         ...  # subclass should implement this method
 
+    def begin_snap(self, xs: list[float], ys: list[float]) -> SnapState:
+        """Collect the snap targets once for the drag.
+        :param xs: x of the dragged features at this moment, v2d
+        :param ys: y of the dragged features at this moment, v2d"""
+        pref = get_pref_snapshot()
+        layers = self.selected_layers or [self.build_model.active_layer.info]
+        # no editor in the context when replayed in background, the other notes are the only targets
+        node_tree = getattr(bpy.context.space_data, 'edit_tree', None)
+        engine = SnapEngine.from_node_tree(self.build_model.gp_data, node_tree,
+                                           exclude_layers=layers, grid=pref.snap_grid)
+        threshold = (VecTool.r2d_2_v2d(Vector((pref.snap_px, 0))) - VecTool.r2d_2_v2d(Vector((0, 0)))).x
+        self.snap_state = SnapState(engine, xs, ys, threshold)
+        return self.snap_state
+
     def handle(self, event: bpy.types.Event, mouse_state: MouseDragState, models: Optional[dict] = None,
                **kwargs) -> bool:
         # if key in self.__dict__: # set the attribute
@@ -112,7 +188,7 @@ class MoveHandler(TransformHandler):
     view_pan: ViewPan = None
 
     def __post_init__(self):
-        self.view_pan = ViewPan()
+        self.view_pan = ViewPan(on_pan=self.pan_layers)
 
     def accept_event(self, event: bpy.types.Event) -> bool:
         """Handle the move event in the modal."""
@@ -120,6 +196,16 @@ class MoveHandler(TransformHandler):
         end_pos = self.mouse_state.end_pos
         if not delta_vec_v2d:
             return False
+        snap = self.use_snap != event.ctrl  # ctrl to toggle the snap
+        if snap and self.snap_state is None:
+            bbox = GPencilLayersBBox(self.build_model.gp_data)
+            bbox.calc_multiple_layers_bbox(self.selected_layers or [self.build_model.active_layer.info])
+            scale = VecTool.ui_scale()
+            min_x, min_y, max_x, max_y = (v / scale for v in (bbox.min_x, bbox.min_y, bbox.max_x, bbox.max_y))
+            self.begin_snap([min_x, (min_x + max_x) / 2, max_x], [min_y, (min_y + max_y) / 2, max_y])
+        if self.snap_state:
+            delta_vec_v2d = Vector(self.snap_state.step(delta_vec_v2d, snap))
+
         if not self.selected_layers:
             self.build_model.move_active(delta_vec_v2d, space='v2d')
         else:
@@ -127,12 +213,23 @@ class MoveHandler(TransformHandler):
                 self.build_model.move(layer, delta_vec_v2d, space='v2d')
         self.delta_move = delta_vec_v2d
         self.total_move += delta_vec_v2d
-        if self.view_pan.is_on_region_edge(end_pos):
-            pan_vec = self.view_pan.edge_pan(event)
-            self.build_model.move_active(pan_vec, space='v2d')
-            self.total_move += pan_vec
+        self.view_pan.update(bpy.context, end_pos)
         return True
 
+    def pan_layers(self, pan_vec: Vector) -> None:
+        """Keep the dragged layers under the mouse while the view pans, called by the timer of the view pan."""
+        if not self.selected_layers:
+            self.build_model.move_active(pan_vec, space='v2d')
+        else:
+            for layer in self.selected_layers:
+                self.build_model.move(layer, pan_vec, space='v2d')
+        self.delta_move = pan_vec
+        self.total_move += pan_vec
+        if self.snap_state:
+            self.snap_state.shift(pan_vec)
+        if self.call_after is not None:
+            self.call_after(self)
+
 
 @dataclass
 class RotateHandler(TransformHandler):
@@ -141,7 +238,7 @@ class RotateHandler(TransformHandler):
     delta_degree: float = 0
     # in
     pivot: Vector = None
-    snap_degree: int = field(default_factory=lambda: get_pref().gp_performance.snap_degree)
+    snap_degree: int = field(default_factory=lambda: get_pref_snapshot().snap_degree)
     snap_degree_count: int = 0
 
     def accept_event(self, event: bpy.types.Event) -> bool:
@@ -204,6 +301,7 @@ class ScaleHandler(TransformHandler):
 
         self.delta_vec_v2d = self.mouse_state.delta_vec_v2d
         self.mouse_pos = self.mouse_state.mouse_pos
+        self.snap_handle()
 
         if self.force_center_scale:
             bboxs = GPencilLayersBBox(self.bbox_model.gp_data)
@@ -242,6 +340,21 @@ class ScaleHandler(TransformHandler):
 
         return True
 
+    def snap_handle(self) -> None:
+        """Snap the dragged corner / edge center by correcting the mouse delta.
+        Not for the center scale of the selected layers or a rotated box, the handle is not on the snap axes."""
+        handle = self.pos_edge_center or self.pos_corner
+        if not self.use_snap or self.force_center_scale or not handle:
+            return
+        if self.bbox_model.is_local and self.bbox_model.obb.angle:
+            return
+        if self.snap_state is None:
+            handle_v2d = VecTool.r2d_2_v2d(handle)
+            xs = [] if handle.position_type in ('top_center', 'bottom_center') else [handle_v2d.x]
+            ys = [] if handle.position_type in ('left_center', 'right_center') else [handle_v2d.y]
+            self.begin_snap(xs, ys)
+        self.delta_vec_v2d = Vector(self.snap_state.step(self.delta_vec_v2d))
+
     def calc_both_side(self) -> tuple[Vector, Vector, float, float, float, float]:
         if not self.selected_layers:
             pivot = self.bbox_model.center
@@ -256,8 +369,8 @@ class ScaleHandler(TransformHandler):
 
         if self.bbox_model.is_local and not self.selected_layers:
             # rotate the delta vector to the local space
-            correct_delta_vec = VecTool.rotate_by_angle(self.delta_vec_v2d, self.bbox_model.layer_rotate_2d())
-            delta_x, delta_y = correct_delta_vec.xy
+            correct_delta_vec = self.bbox_model.obb.vector_to_local(self.delta_vec_v2d)
+            delta_x, delta_y = (float(v) for v in correct_delta_vec)
         else:
             delta_x, delta_y = (self.delta_vec_v2d * 2).xy
 
@@ -271,8 +384,8 @@ class ScaleHandler(TransformHandler):
     def calc_one_side(self) -> tuple[float, float, float, float]:
         if self.bbox_model.is_local:
             # rotate the delta vector to the local space
-            correct_delta_vec = VecTool.rotate_by_angle(self.delta_vec_v2d, self.bbox_model.layer_rotate_2d())
-            delta_x, delta_y = correct_delta_vec.xy
+            correct_delta_vec = self.bbox_model.obb.vector_to_local(self.delta_vec_v2d)
+            delta_x, delta_y = (float(v) for v in correct_delta_vec)
         else:
             delta_x, delta_y = self.delta_vec_v2d.xy
         size_x_v2d, size_y_v2d = self.bbox_model.size_v2d
@@ -1,17 +1,19 @@
 from contextlib import contextmanager
 from dataclasses import dataclass, field
 from mathutils import Vector
-from typing import Literal, Optional, Any, ClassVar
+from typing import Literal, Optional, Any
 import bpy
 from collections import OrderedDict
 
 from .view_model_mouse import MouseDragState
-from ..public_path import get_pref
+from ..public_path import get_pref_snapshot
 from ..model.model_gp import BuildGreasePencilData
 from ..model.model_points import AreaPoint
 from ..model.model_gp_bbox import GPencilLayerBBox
+from ..model.model_gp_layer_id import GPencilLayerID
 from ..view_model.view_model_mouse import MouseDetectModel
 from .view_model_select import SelectedGPLayersRuntime
+from .view_model_session import EditorSessions
 from .handlers import TransformHandler
 
 
@@ -19,7 +21,6 @@ from .handlers import TransformHandler
 class DragGreasePencilViewModal:
     # need to pass in
     gp_data: bpy.types.GreasePencil
-    last_gp_data: ClassVar[bpy.types.GreasePencil] = None
     #
     select_runtime: SelectedGPLayersRuntime = SelectedGPLayersRuntime()
     # drag_handle
@@ -41,21 +42,49 @@ class DragGreasePencilViewModal:
     # copy
     already_copied: bool = False
     # select
-    select_all: bool = field(default_factory=lambda: get_pref().gp_performance.select_all)
+    select_all: bool = field(default_factory=lambda: get_pref_snapshot().select_all)
     # debug
-    debug: bool = field(default_factory=lambda: get_pref().debug)
+    debug: bool = field(default_factory=lambda: get_pref_snapshot().debug)
     debug_info: OrderedDict[str, str] = field(default_factory=OrderedDict)
 
     def __post_init__(self):
         self.bbox_model = GPencilLayerBBox(self.gp_data)
         self.build_model = BuildGreasePencilData(self.gp_data)
         self.detect_model = MouseDetectModel().bind_bbox(self.bbox_model)
-
-        if self.__class__.last_gp_data is None:
-            self.__class__.last_gp_data = self.gp_data
-        elif self.__class__.last_gp_data != self.gp_data:
-            self.__class__.last_gp_data = self.gp_data
-            self.__class__.clear_selected_layers_points(self)
+        # the selection of the editor is cleared if it showed another grease pencil data
+        EditorSessions.get().bind(self.gp_data)
+
+    @classmethod
+    def from_session(cls, gp_data: bpy.types.GreasePencil) -> 'DragGreasePencilViewModal':
+        """The view model of the editor in the context, built once and reset for every click / drag operator."""
+        session = EditorSessions.activate()
+        session.bind(gp_data)
+        # the selection keys the layers by id, give the new / copied layers one before selecting
+        GPencilLayerID.assign(gp_data)
+        if session.drag_vm is None or session.drag_vm.gp_data != gp_data:
+            session.drag_vm = cls(gp_data=gp_data)
+        else:
+            session.drag_vm.reset()
+        return session.drag_vm
+
+    def reset(self):
+        """Forget the state of the last operator, keep the models."""
+        self.drag_handles = {}
+        self.pos_edge_center = self.pos_corner = self.pos_corner_extrude = None
+        self.mouse_state = MouseDragState()
+        self.in_drag_area = False
+        self.already_copied = False
+        self.select_all = get_pref_snapshot().select_all
+        self.debug = get_pref_snapshot().debug
+        self.debug_info.clear()
+
+    @property
+    def snap_guides(self) -> tuple[Optional[float], Optional[float]]:
+        """x / y of the guides of the handler that is snapping, v2d"""
+        for handler in self.drag_handles.values():
+            if handler.snap_state:
+                return handler.snap_state.guides
+        return None, None
 
     def has_active_layer(self) -> bool:
         return self.build_model.has_active_layer()
@@ -112,6 +141,7 @@ class DragGreasePencilViewModal:
                 with self.build_model:  # clean up in with statement
                     self.build_model.copy_active().to_2d()
                     self.already_copied = True
+            GPencilLayerID.assign(self.gp_data)
 
     @staticmethod
     @contextmanager
@@ -171,11 +201,11 @@ class DragGreasePencilViewModal:
             bbox_model.calc_bbox(layer.info)
             if not detect_model.bbox_in_area(box_area_points, all=self.select_all): continue
             if event.ctrl:  # remove
-                self.select_runtime.remove(layer.info)
+                self.select_runtime.remove(layer)
             else:
                 points = list(bbox_model.bbox_points_v2d)
                 points[2], points[3] = points[3], points[2]
-                self.select_runtime.update(layer.info, points)
+                self.select_runtime.update(layer, points)
         # clear the selected layers if no layer is selected
         if not event.shift and not event.ctrl and not self.select_runtime.selected_layers():
             self.select_runtime.clear()
@@ -1,7 +1,9 @@
+from __future__ import annotations
+
 from dataclasses import dataclass, field
-from mathutils import Vector, Color
-from typing import Sequence, OrderedDict
-import numpy as np
+from mathutils import Vector, Color, Matrix
+from typing import ClassVar, Optional, Sequence, OrderedDict
+import bpy
 import gpu
 from gpu_extras.batch import batch_for_shader
 from gpu_extras.presets import draw_circle_2d
@@ -9,11 +11,66 @@ import blf
 
 from ..model.model_draw import DrawData, DrawPreference
 from ..model.model_gp_bbox import GPencilLayerBBox
+from ..model.model_gp_transform import GPencilLayerTransform, PendingTransform
 from ..model.model_points import PointsArea
+from ..model.utils import VecTool
+from ..public_path import lazy_import
+
+np = lazy_import('numpy')
 
 indices = PointsArea.indices
 
 
+@dataclass
+class AdaptiveDrawQuality:
+    """Lower the quality of the tool overlay step by step while drawing it takes longer than the budget.
+    The time of the draw callbacks is smoothed by an exponential moving average, the level is changed by one step,
+    then kept for a few draws so that the average settles on the new level. The levels add up:
+    FULL: everything
+    MERGED: the outlines of the selected layers in one batch
+    UNION: one box around the selected layers instead of an outline each
+    NO_TEXT: no angle / distance label
+    COARSE: fewer segments for the rotate circle
+    """
+    levels: ClassVar[tuple[str, ...]] = ('FULL', 'MERGED', 'UNION', 'NO_TEXT', 'COARSE')
+    # ms, 0 to always draw at full quality
+    budget_ms: float = 4.0
+    # weight of the new sample in the average
+    smoothing: float = 0.2
+    # a level is restored when the average is under this part of the budget
+    headroom: float = 0.5
+    settle_draws: int = 8
+    level: int = 0
+    ema_ms: float = 0.0
+    _wait: int = 0
+
+    @property
+    def name(self) -> str:
+        return self.levels[self.level]
+
+    def at_least(self, name: str) -> bool:
+        return self.level >= self.levels.index(name)
+
+    @property
+    def circle_segments(self) -> int:
+        return 12 if self.at_least('COARSE') else 32
+
+    def add_sample(self, ms: float) -> int:
+        """:return: the level for the next draw"""
+        self.ema_ms = ms if not self.ema_ms else self.ema_ms + self.smoothing * (ms - self.ema_ms)
+        if self.budget_ms <= 0:
+            self.level = 0
+        elif self._wait > 0:
+            self._wait -= 1
+        elif self.ema_ms > self.budget_ms and self.level < len(self.levels) - 1:
+            self.level += 1
+            self._wait = self.settle_draws
+        elif self.ema_ms < self.budget_ms * self.headroom and self.level > 0:
+            self.level -= 1
+            self._wait = self.settle_draws
+        return self.level
+
+
 @dataclass
 class DrawViewModel:
     draw_data: DrawData
@@ -60,9 +117,9 @@ class DrawViewModel:
         batch = batch_for_shader(self.shader, 'TRIS', {"pos": self.points}, indices=indices)
         batch.draw(self.shader)
 
-    def draw_rotate_widget(self, point: Vector):
+    def draw_rotate_widget(self, point: Vector, segments: int = 32):
         gpu.state.point_size_set(self.rotate_px)
-        draw_circle_2d(point, self.color_hover, radius=15, segments=32)
+        draw_circle_2d(point, self.color_hover, radius=15, segments=segments)
 
     def draw_scale_corner_widget(self):
         gpu.state.point_size_set(self.corner_px)
@@ -94,6 +151,26 @@ class DrawViewModel:
         batch = batch_for_shader(self.shader, 'LINE_LOOP', {"pos": points})
         batch.draw(self.shader)
 
+    def draw_selected_outlines(self, outlines: list[list[Vector]], quality: AdaptiveDrawQuality):
+        """The outlines of the selected layers, points in line order, merged in one batch at a lower quality.
+        At UNION, draw_union_box is drawn instead."""
+        outlines = [points for points in outlines if points]
+        if not outlines: return
+        if not quality.at_least('MERGED'):
+            for points in outlines:
+                self.draw_box_outline(points)
+            return
+        lines = [(points[i], points[(i + 1) % len(points)]) for points in outlines for i in range(len(points))]
+        self.shader.uniform_float("color", self.color_hover)
+        batch = batch_for_shader(self.shader, 'LINES', {"pos": [point for line in lines for point in line]})
+        batch.draw(self.shader)
+
+    def draw_union_box(self, box: Optional[tuple[Vector, Vector]]):
+        """One box around the selected layers, min / max in region space."""
+        if box is None: return
+        (min_x, min_y), (max_x, max_y) = box
+        self.draw_box_outline([(min_x, max_y), (max_x, max_y), (max_x, min_y), (min_x, min_y)])
+
     def draw_box_area(self, points: Sequence[Vector], color: Color | list = None):
         if color:
             self.shader.uniform_float("color", color)
@@ -129,6 +206,64 @@ class DrawViewModel:
         if self.delta_degree:
             self.draw_text(f"{round(self.delta_degree, 1)}°", Vector((self.mouse_state.end_pos)) + Vector((0, 20)))
 
+    def draw_snap_guides(self):
+        """Draw a line across the region at the snapped x / y."""
+        x, y = self.snap_guides or (None, None)
+        if x is None and y is None: return
+        region = bpy.context.region
+        lines = []
+        if x is not None:
+            x_r2d = VecTool.v2d_2_r2d(Vector((x, 0))).x
+            lines.extend(((x_r2d, 0), (x_r2d, region.height)))
+        if y is not None:
+            y_r2d = VecTool.v2d_2_r2d(Vector((0, y))).y
+            lines.extend(((0, y_r2d), (region.width, y_r2d)))
+        self.shader.uniform_float("color", self.color_highlight)
+        batch = batch_for_shader(self.shader, 'LINES', {"pos": lines})
+        batch.draw(self.shader)
+
+    @staticmethod
+    def _pending_batch(shader: gpu.types.GPUShader, pending: PendingTransform) -> gpu.types.GPUBatch:
+        """Lines of the displayed frame, built once, the transform is applied by the matrix when drawing."""
+        points, offsets = pending.points[pending.active], pending.offsets[pending.active]
+        pos = np.zeros((len(points), 3), dtype=np.float32)
+        pos[:, :2] = points
+        index = np.arange(max(len(points) - 1, 0))
+        # no line from the end of a stroke to the start of the next one
+        keep = np.ones(len(index), dtype=bool)
+        ends = offsets[1:] - 1
+        keep[ends[ends < len(index)]] = False
+        lines = np.stack([index[keep], index[keep] + 1], axis=1).astype(np.int32)
+        return batch_for_shader(shader, 'LINES', {"pos": pos}, indices=lines)
+
+    @staticmethod
+    def draw_pending_transforms():
+        """Draw the layers with a pending transform, they are hidden until the transform is baked."""
+        if not GPencilLayerTransform.pending: return
+        shader = gpu.shader.from_builtin('UNIFORM_COLOR')
+        # 3d space to region, the view is an axis aligned scale and offset
+        origin = np.array(VecTool.v2d_2_r2d(Vector((0, 0))))
+        to_region = np.array([VecTool.v2d_2_r2d(Vector((1, 0))), VecTool.v2d_2_r2d(Vector((0, 1)))]) - origin
+        to_region /= VecTool.ui_scale()
+
+        line_width = gpu.state.line_width_get()
+        for pending in GPencilLayerTransform.pending.values():
+            if not len(pending.points[pending.active]): continue
+            if pending.batch is None:
+                pending.batch = DrawViewModel._pending_batch(shader, pending)
+            linear = pending.matrix[:2] @ to_region
+            offset = pending.matrix[2] @ to_region + origin
+            matrix = Matrix(((linear[0, 0], linear[1, 0], 0, offset[0]),
+                             (linear[0, 1], linear[1, 1], 0, offset[1]),
+                             (0, 0, 1, 0),
+                             (0, 0, 0, 1)))
+            gpu.state.line_width_set(pending.thickness)
+            with gpu.matrix.push_pop():
+                gpu.matrix.multiply_matrix(matrix)
+                shader.uniform_float("color", pending.color)
+                pending.batch.draw(shader)
+        gpu.state.line_width_set(line_width)
+
     def draw_select_box(self):
         if not self.mouse_state: return
         if not self.mouse_state.is_move: return
@@ -6,7 +6,7 @@ from mathutils import Vector
 from ..model.model_gp_bbox import GPencilLayerBBox
 from ..model.model_points import PointsArea, AreaPoint
 from ..model.utils import VecTool
-from ..public_path import get_pref
+from ..public_path import get_pref_snapshot
 
 
 @dataclass
@@ -17,9 +17,9 @@ class MouseDetectModel:
 
     bbox_model: 'GPencilLayerBBox' = Optional[None]
     # preference
-    d_edge: int = field(default_factory=lambda: get_pref().gp_performance.detect_edge_px)
-    d_corner: int = field(default_factory=lambda: get_pref().gp_performance.detect_corner_px)
-    d_rotate: int = field(default_factory=lambda: get_pref().gp_performance.detect_rotate_px)
+    d_edge: int = field(default_factory=lambda: get_pref_snapshot().detect_edge_px)
+    d_corner: int = field(default_factory=lambda: get_pref_snapshot().detect_corner_px)
+    d_rotate: int = field(default_factory=lambda: get_pref_snapshot().detect_rotate_px)
 
     def bind_bbox(self, bbox_model: 'GPencilLayerBBox') -> 'MouseDetectModel':
         """Need to bind the bbox model to work."""
@@ -40,26 +40,18 @@ class MouseDetectModel:
         :param feather: the feather to expand the area, unit: pixel
         :return: True if the pos is in the area, False otherwise
         """
+        if self.bbox_model.is_local:
+            # test in 3d space, where the oriented box of the layer lives
+            return bool(self.bbox_model.obb.contains(VecTool.r2d_2_loc3d(pos).xy)[0])
+
         x, y = pos
-        points = self.bbox_model.bbox_points_r2d
-        top_left, top_right, bottom_left, bottom_right = points
-        if not self.bbox_model.is_local:
-            if feather != 0:
-                top_left = (top_left[0] - feather, top_left[1] + feather)
-                top_right = (top_right[0] + feather, top_right[1] + feather)
-                bottom_left = (bottom_left[0] - feather, bottom_left[1] - feather)
+        top_left, top_right, bottom_left, bottom_right = self.bbox_model.bbox_points_r2d
+        if feather != 0:
+            top_left = (top_left[0] - feather, top_left[1] + feather)
+            top_right = (top_right[0] + feather, top_right[1] + feather)
+            bottom_left = (bottom_left[0] - feather, bottom_left[1] - feather)
 
-            if top_left[0] < x < top_right[0] and bottom_left[1] < y < top_left[1]:
-                return True
-        else:
-            polygon = [top_left, top_right, bottom_right, bottom_left]
-            inside = False
-
-            for i in range(4):
-                p1, p2 = polygon[i], polygon[(i + 1) % 4]
-                if (p1[1] > y) != (p2[1] > y) and (x < (p2[0] - p1[0]) * (y - p1[1]) / (p2[1] - p1[1]) + p1[0]):
-                    inside = not inside
-            return inside
+        return top_left[0] < x < top_right[0] and bottom_left[1] < y < top_left[1]
 
     def bbox_in_area(self, points: Sequence[Vector | AreaPoint], all=True) -> bool:
         """check if the bbox is in the area defined by the points
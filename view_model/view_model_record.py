@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import ClassVar, Optional
+
+import bpy
+
+from .view_model_select import SelectedGPLayersRuntime
+
+
+@dataclass(slots=True)
+class RecordedView2D:
+    """The view 2d of a recorded event, region_to_view / view_to_region like bpy.types.View2D.
+    The node editor view is not rotated, so it is an offset and a scale per axis:
+    view = origin + region * scale"""
+    origin: tuple[float, float]
+    scale: tuple[float, float]
+
+    @classmethod
+    def from_view2d(cls, view2d: bpy.types.View2D) -> 'RecordedView2D':
+        ox, oy = view2d.region_to_view(0, 0)
+        ux, uy = view2d.region_to_view(1000, 1000)
+        return cls((ox, oy), ((ux - ox) / 1000, (uy - oy) / 1000))
+
+    def region_to_view(self, x: float, y: float) -> tuple[float, float]:
+        return self.origin[0] + x * self.scale[0], self.origin[1] + y * self.scale[1]
+
+    def view_to_region(self, x: float, y: float, clip: bool = True) -> tuple[float, float]:
+        return (x - self.origin[0]) / self.scale[0], (y - self.origin[1]) / self.scale[1]
+
+
+@dataclass(slots=True)
+class RecordedEvent:
+    """An event received by a modal operator, with the view it was received in.
+    It has the attributes of bpy.types.Event that the view models read, so it is replayed as the event."""
+    operator: str  # bl_idname
+    phase: str  # INVOKE / MODAL
+    time: float  # seconds since the start of the record
+    type: str
+    value: str
+    shift: bool
+    ctrl: bool
+    alt: bool
+    mouse_region_x: int
+    mouse_region_y: int
+    region_size: tuple[int, int]
+    view2d: RecordedView2D
+    ui_scale: float
+    # state of the data when the operator is invoked
+    gp_data: str = ''
+    active_layer: int = -1
+    selected_layers: list[str] = field(default_factory=list)
+
+
+class EventRecorder:
+    """Record the events of the transform modals, for the replay benchmark (benchmark/bench_replay.py).
+    Started from the debug section of the preferences, the modals call record on every event.
+    usage:
+    >>> EventRecorder.start()
+    >>> EventRecorder.record(self.bl_idname, context, event)  # in invoke / modal
+    >>> EventRecorder.stop('events.json')
+    """
+    recording: ClassVar[bool] = False
+    events: ClassVar[list[RecordedEvent]] = []
+    start_time: ClassVar[float] = 0
+    # a record is not meant to be long, stop growing after this
+    max_events: ClassVar[int] = 100_000
+
+    @classmethod
+    def start(cls) -> None:
+        cls.events = []
+        cls.start_time = time.perf_counter()
+        cls.recording = True
+
+    @classmethod
+    def record(cls, operator: str, context: bpy.types.Context, event: bpy.types.Event, invoke: bool = False) -> None:
+        if not cls.recording or len(cls.events) >= cls.max_events or not context.region:
+            return
+        recorded = RecordedEvent(
+            operator, 'INVOKE' if invoke else 'MODAL', time.perf_counter() - cls.start_time,
+            event.type, event.value, event.shift, event.ctrl, event.alt,
+            event.mouse_region_x, event.mouse_region_y,
+            (context.region.width, context.region.height),
+            RecordedView2D.from_view2d(context.region.view2d),
+            context.preferences.system.ui_scale)
+        if invoke and (gp_data := context.space_data.edit_tree.grease_pencil):
+            recorded.gp_data = gp_data.name
+            recorded.active_layer = gp_data.layers.active_index
+            recorded.selected_layers = SelectedGPLayersRuntime.selected_layers()
+        cls.events.append(recorded)
+
+    @classmethod
+    def stop(cls, filepath: Optional[str | Path] = None) -> int:
+        """Stop and write the record as json if a path is given.
+        :return: the number of events recorded"""
+        cls.recording = False
+        count = len(cls.events)
+        if filepath:
+            cls.save(filepath, cls.events)
+        cls.events = []
+        return count
+
+    @staticmethod
+    def save(filepath: str | Path, events: list[RecordedEvent]) -> None:
+        data = {'version': 1, 'blender': bpy.app.version_string, 'events': [asdict(event) for event in events]}
+        Path(filepath).write_text(json.dumps(data), encoding='utf-8')
+
+    @staticmethod
+    def load(filepath: str | Path) -> list[RecordedEvent]:
+        data = json.loads(Path(filepath).read_text(encoding='utf-8'))
+        events = []
+        for item in data['events']:
+            item['region_size'] = tuple(item['region_size'])
+            item['view2d'] = RecordedView2D(tuple(item['view2d']['origin']), tuple(item['view2d']['scale']))
+            events.append(RecordedEvent(**item))
+        return events
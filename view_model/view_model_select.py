@@ -1,59 +1,123 @@
-from typing import ClassVar, Literal
+from __future__ import annotations
+
+from typing import Literal, Optional
 
 import bpy.types
 from mathutils import Vector
 from ..model.utils import VecTool
 from ..model.model_gp_bbox import GPencilLayerBBox
+from ..model.model_gp_layer_id import GPencilLayerID
+from ..public_path import lazy_import
+from .view_model_session import EditorSession, EditorSessions
+
+np = lazy_import('numpy')
 
 
 class SelectedGPLayersRuntime:
-    draw_select_box: ClassVar[bool] = True  # draw the select box, disable it when the user is dragging
-    selected_layers_points_v2d: ClassVar[dict[str, list[Vector]]] = {}
-    selected_layers_bbox_points_v2d: ClassVar[list[Vector]] = []
+    """The selected layers of the node editor in the context, stored in its session, see EditorSessions.
+    The layers are stored by their stable id, so the selection follows a rename or a reorder.
+    A layer is given by itself, or by its name in the grease pencil data of the session."""
+
+    @staticmethod
+    def session() -> EditorSession:
+        # read by the draw callbacks, an existing session is not reordered
+        return EditorSessions.peek() or EditorSessions.get()
+
+    @classmethod
+    def selected_layers_points_v2d(cls) -> dict[int, list[Vector]]:
+        """layer id: bbox points v2d"""
+        return cls.session().selected_layers_points_v2d
+
+    @classmethod
+    def draw_select_box(cls) -> bool:
+        """draw the select box, disable it when the user is dragging"""
+        return cls.session().draw_select_box
 
     @classmethod
-    def update(cls, layer: str, points: list[Vector]):
-        cls.selected_layers_points_v2d[layer] = points
+    def _layer_id(cls, layer: str | bpy.types.GPencilLayer) -> Optional[int]:
+        session = cls.session()
+        if isinstance(layer, str):
+            layer = session.gp_data.layers.get(layer) if session.gp_data else None
+            if layer is None:
+                return None
+        else:
+            session.bind(layer.id_data)
+        return GPencilLayerID.layer_id(layer)
+
+    @classmethod
+    def update(cls, layer: str | bpy.types.GPencilLayer, points: list[Vector]):
+        if (layer_id := cls._layer_id(layer)) is not None:
+            cls.selected_layers_points_v2d()[layer_id] = points
 
     @classmethod
     def show_select_box(cls):
-        cls.draw_select_box = True
+        cls.session().draw_select_box = True
 
     @classmethod
     def hide_select_box(cls):
-        cls.draw_select_box = False
+        cls.session().draw_select_box = False
 
     @classmethod
-    def remove(cls, layer: str):
-        if layer in cls.selected_layers_points_v2d:
-            cls.selected_layers_points_v2d.pop(layer)
+    def remove(cls, layer: str | bpy.types.GPencilLayer):
+        if (layer_id := cls._layer_id(layer)) is not None:
+            cls.selected_layers_points_v2d().pop(layer_id, None)
 
     @classmethod
     def clear(cls):
-        cls.selected_layers_points_v2d.clear()
+        cls.selected_layers_points_v2d().clear()
 
     @classmethod
     def get_selected_layers_points_r2d(cls) -> list[list[Vector]]:
-        return [[VecTool.v2d_2_r2d(p) for p in points] for points in cls.selected_layers_points_v2d.values()]
+        return [[VecTool.v2d_2_r2d(p) for p in points] for points in cls.selected_layers_points_v2d().values()]
+
+    @classmethod
+    def get_selected_union_r2d(cls) -> Optional[tuple[Vector, Vector]]:
+        """min, max of the boxes of the selected layers, only the two corners are converted to region space."""
+        points = [point for points in cls.selected_layers_points_v2d().values() for point in points]
+        if not points:
+            return None
+        xs, ys = [point.x for point in points], [point.y for point in points]
+        return (VecTool.v2d_2_r2d(Vector((min(xs), min(ys)))),
+                VecTool.v2d_2_r2d(Vector((max(xs), max(ys)))))
+
+    @classmethod
+    def selected_ids(cls) -> list[int]:
+        return list(cls.selected_layers_points_v2d().keys())
 
     @classmethod
-    def get_selected_layers_bbox_points_v2d(cls) -> list[Vector]:
-        return [points for points in cls.selected_layers_bbox_points_v2d]
+    def selected_mask(cls) -> np.ndarray:
+        """Bool mask over the layer indices of the grease pencil data of the session."""
+        session = cls.session()
+        if not session.gp_data:
+            return np.zeros(0, dtype=bool)
+        return GPencilLayerID.mask(session.gp_data, session.selected_layers_points_v2d.keys())
 
     @classmethod
     def selected_layers(cls) -> list[str]:
-        return list(cls.selected_layers_points_v2d.keys())
+        """The current names of the selected layers, the removed layers are dropped."""
+        session = cls.session()
+        if not session.gp_data or not session.selected_layers_points_v2d:
+            return []
+        names = []
+        for layer_id in list(session.selected_layers_points_v2d):
+            if (layer := GPencilLayerID.layer_of(session.gp_data, layer_id)) is None:
+                session.selected_layers_points_v2d.pop(layer_id)
+            else:
+                names.append(layer.info)
+        return names
 
     @classmethod
     def update_from_gp_data(cls, gp_data: bpy.types.GreasePencil, mode: Literal['GLOBAL', 'LOCAL'] = 'LOCAL'):
+        session = cls.session()
+        session.bind(gp_data)
         bbox_model = GPencilLayerBBox(gp_data, mode=mode)
-        for layer_name in cls.selected_layers_points_v2d.keys():
-            if layer_name not in gp_data.layers: continue
-            bbox_model.calc_bbox(layer_name, local=True)
+        for layer_id in list(session.selected_layers_points_v2d):
+            if (index := GPencilLayerID.index_of(gp_data, layer_id)) is None: continue
+            bbox_model.calc_bbox(index, local=True)
             points = list(bbox_model.bbox_points_v2d)
             points[2], points[3] = points[3], points[2]  # swap the bottom left and bottom right
-            cls.update(layer_name, points)
+            session.selected_layers_points_v2d[layer_id] = points
 
     @classmethod
-    def set_active(cls, layer: str):
+    def set_active(cls, layer: str | bpy.types.GPencilLayer):
         cls.update(layer, [])  # update the active layer, but no need to update the points
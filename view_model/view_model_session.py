@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import ClassVar, Optional, Any
+
+import bpy
+from mathutils import Vector
+
+# window pointer, area pointer, edit tree pointer
+SessionKey = tuple[int, int, int]
+
+
+@dataclass
+class EditorSession:
+    """State of the tool in one node editor showing one node tree, kept across the operator invocations."""
+    key: SessionKey
+    gp_data: Optional[bpy.types.GreasePencil] = None
+    # selection, layer id: bbox points v2d, see GPencilLayerID
+    selected_layers_points_v2d: dict[int, list[Vector]] = field(default_factory=dict)
+    draw_select_box: bool = True
+    # hover view of EST_OT_gp_view: (view model, view, draw handle)
+    hover: Optional[tuple[Any, Any, Any]] = None
+    # view model reused by the click / drag operators, see DragGreasePencilViewModal.from_session
+    drag_vm: Any = None
+
+    def owns(self, view_model) -> bool:
+        """The view model draws in the editor of this session, the draw callbacks are called by every node editor."""
+        return view_model is self.drag_vm or (self.hover is not None and view_model is self.hover[0])
+
+    def bind(self, gp_data: bpy.types.GreasePencil) -> None:
+        """The selection belongs to one grease pencil data, clear it when the tree shows another one."""
+        if self.gp_data != gp_data:
+            self.gp_data = gp_data
+            self.selected_layers_points_v2d.clear()
+            self.drag_vm = None
+
+
+class EditorSessions:
+    """The sessions of the node editors, least recently used first.
+    A session is found by the window, area and edit tree of the context, so two editors don't share the selection,
+    and a tree shown again in the same editor gets its session back.
+    get: the session of the editor in the context, made if missing
+    peek: the same without making / reordering anything, for the draw callbacks and polls of every node editor
+    activate: get, and remember it for the calls without a node editor in the context, from the operator invokes
+    usage:
+    >>> EditorSessions.get(context).selected_layers_points_v2d
+    """
+    max_sessions: ClassVar[int] = 8
+    sessions: ClassVar[OrderedDict[SessionKey, EditorSession]] = OrderedDict()
+    # used when the context has no node editor (timers, handlers)
+    fallback: ClassVar[EditorSession] = EditorSession((0, 0, 0))
+    # the session of the last operator invoked, the context of the timers and handlers is not the editor
+    last: ClassVar[Optional[EditorSession]] = None
+
+    @staticmethod
+    def key(context: bpy.types.Context) -> Optional[SessionKey]:
+        area, space = context.area, context.space_data
+        if not area or area.type != 'NODE_EDITOR' or not space or not space.edit_tree:
+            return None
+        window = context.window
+        return window.as_pointer() if window else 0, area.as_pointer(), space.edit_tree.as_pointer()
+
+    @classmethod
+    def get(cls, context: Optional[bpy.types.Context] = None) -> EditorSession:
+        if (key := cls.key(context or bpy.context)) is None:
+            return cls.last or cls.fallback
+        if (session := cls.sessions.get(key)) is None:
+            session = cls.sessions[key] = EditorSession(key)
+            cls.evict()
+        else:
+            cls.sessions.move_to_end(key)
+        return session
+
+    @classmethod
+    def peek(cls, context: Optional[bpy.types.Context] = None) -> Optional[EditorSession]:
+        if (key := cls.key(context or bpy.context)) is None:
+            return cls.last
+        return cls.sessions.get(key)
+
+    @classmethod
+    def activate(cls, context: Optional[bpy.types.Context] = None) -> EditorSession:
+        session = cls.get(context)
+        if session is not cls.fallback:
+            cls.last = session
+        return session
+
+    @classmethod
+    def evict(cls) -> None:
+        """Remove the sessions of the closed areas, then the least recently used ones above max_sessions."""
+        alive = {area.as_pointer() for window in bpy.context.window_manager.windows for area in window.screen.areas}
+        for key in [key for key in cls.sessions if key[1] not in alive]:
+            cls.remove(key)
+        while len(cls.sessions) > cls.max_sessions:
+            cls.remove(next(iter(cls.sessions)))
+
+    @classmethod
+    def remove(cls, key: SessionKey) -> None:
+        session = cls.sessions.pop(key)
+        if session.hover and session.hover[2]:
+            session.hover[2].remove_from_node_editor()
+        if cls.last is session:
+            cls.last = None
+
+    @classmethod
+    def forget_data(cls) -> None:
+        """An undo / loading a file may free the data the view models point to, they are built again."""
+        for session in (*cls.sessions.values(), cls.fallback):
+            session.drag_vm = None
+
+    @classmethod
+    def clear(cls) -> None:
+        for key in list(cls.sessions):
+            cls.remove(key)
+        cls.fallback = EditorSession((0, 0, 0))